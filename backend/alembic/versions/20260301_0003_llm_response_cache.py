@@ -0,0 +1,39 @@
+"""llm response cache
+
+Revision ID: 20260301_0003
+Revises: 20260218_0002
+Create Date: 2026-03-01 00:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260301_0003"
+down_revision = "20260218_0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "llm_response_cache",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("cache_key", sa.String(length=64), nullable=False),
+        sa.Column("model", sa.String(length=100), nullable=False),
+        sa.Column("response_json", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_llm_response_cache_cache_key", "llm_response_cache", ["cache_key"], unique=True)
+    op.create_index("ix_llm_response_cache_last_used_at", "llm_response_cache", ["last_used_at"], unique=False)
+    op.create_index("ix_llm_response_cache_expires_at", "llm_response_cache", ["expires_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_llm_response_cache_expires_at", table_name="llm_response_cache")
+    op.drop_index("ix_llm_response_cache_last_used_at", table_name="llm_response_cache")
+    op.drop_index("ix_llm_response_cache_cache_key", table_name="llm_response_cache")
+    op.drop_table("llm_response_cache")
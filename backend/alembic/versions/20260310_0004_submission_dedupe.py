@@ -0,0 +1,33 @@
+"""submission payload hash and pipeline version for dedupe
+
+Revision ID: 20260310_0004
+Revises: 20260301_0003
+Create Date: 2026-03-10 00:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260310_0004"
+down_revision = "20260301_0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("submissions", sa.Column("payload_sha256", sa.String(length=64), nullable=True))
+    op.add_column("submissions", sa.Column("pipeline_version", sa.String(length=32), nullable=True))
+    op.create_index(
+        "ix_submissions_dedupe",
+        "submissions",
+        ["tenant_id", "payload_sha256", "pipeline_version"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_submissions_dedupe", table_name="submissions")
+    op.drop_column("submissions", "pipeline_version")
+    op.drop_column("submissions", "payload_sha256")
@@ -0,0 +1,34 @@
+"""memoized pipeline stage outputs
+
+Revision ID: 20260320_0005
+Revises: 20260310_0004
+Create Date: 2026-03-20 00:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260320_0005"
+down_revision = "20260310_0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stage_outputs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("cache_key", sa.String(length=64), nullable=False),
+        sa.Column("stage", sa.String(length=64), nullable=False),
+        sa.Column("stage_version", sa.String(length=32), nullable=False),
+        sa.Column("output_json", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_stage_outputs_cache_key", "stage_outputs", ["cache_key"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_stage_outputs_cache_key", table_name="stage_outputs")
+    op.drop_table("stage_outputs")
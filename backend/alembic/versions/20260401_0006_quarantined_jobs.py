@@ -0,0 +1,49 @@
+"""quarantined async jobs
+
+Revision ID: 20260401_0006
+Revises: 20260320_0005
+Create Date: 2026-04-01 00:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260401_0006"
+down_revision = "20260320_0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "quarantined_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("tenant_id", sa.Integer(), sa.ForeignKey("tenants.id"), nullable=False),
+        sa.Column("submission_id", sa.String(length=64), nullable=False),
+        sa.Column("job_id", sa.String(length=128), nullable=False),
+        sa.Column("job_kind", sa.String(length=32), nullable=False),
+        sa.Column("task_name", sa.String(length=128), nullable=False),
+        sa.Column("source_object_key", sa.String(length=512), nullable=True),
+        sa.Column("failure_class", sa.String(length=32), nullable=False),
+        sa.Column("error_type", sa.String(length=128), nullable=False),
+        sa.Column("error_message", sa.Text(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("payload_json", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(length=32), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("replayed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_quarantined_jobs_tenant_id", "quarantined_jobs", ["tenant_id"])
+    op.create_index("ix_quarantined_jobs_submission_id", "quarantined_jobs", ["submission_id"])
+    op.create_index("ix_quarantined_jobs_job_id", "quarantined_jobs", ["job_id"])
+    op.create_index("ix_quarantined_jobs_tenant_status", "quarantined_jobs", ["tenant_id", "status", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_quarantined_jobs_tenant_status", table_name="quarantined_jobs")
+    op.drop_index("ix_quarantined_jobs_job_id", table_name="quarantined_jobs")
+    op.drop_index("ix_quarantined_jobs_submission_id", table_name="quarantined_jobs")
+    op.drop_index("ix_quarantined_jobs_tenant_id", table_name="quarantined_jobs")
+    op.drop_table("quarantined_jobs")
@@ -0,0 +1,48 @@
+"""unique profile version numbers per submission
+
+Revision ID: 20260410_0007
+Revises: 20260401_0006
+Create Date: 2026-04-10 00:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260410_0007"
+down_revision = "20260401_0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Concurrent writers could already have stored the same version number twice; renumber
+    # each submission's versions in write order before the constraint goes on.
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text(
+            "SELECT id, tenant_id, submission_id, version FROM profile_versions "
+            "ORDER BY tenant_id, submission_id, version, id"
+        )
+    )
+    current = None
+    expected = 0
+    for row_id, tenant_id, submission_id, version in rows.fetchall():
+        if (tenant_id, submission_id) != current:
+            current, expected = (tenant_id, submission_id), version
+        elif version <= expected:
+            expected += 1
+            bind.execute(
+                sa.text("UPDATE profile_versions SET version = :version WHERE id = :id"), {"version": expected, "id": row_id}
+            )
+            continue
+        expected = version
+
+    with op.batch_alter_table("profile_versions") as batch_op:
+        batch_op.create_unique_constraint("uq_profile_versions_version", ["tenant_id", "submission_id", "version"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("profile_versions") as batch_op:
+        batch_op.drop_constraint("uq_profile_versions_version", type_="unique")
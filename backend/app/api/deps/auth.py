@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import hmac
+
 from fastapi import Depends, Header, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session
@@ -59,3 +61,19 @@ async def current_user(
     if not user or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
     return user
+
+
+async def metrics_reader(authorization: str | None = Header(default=None)) -> None:
+    # Metrics carry tenant labels, so they are for operators holding METRICS_TOKEN, not tenant users.
+    if settings.auth_disabled:
+        return
+    if not settings.metrics_token:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Metrics are disabled; set METRICS_TOKEN")
+    if not hmac.compare_digest(_extract_bearer(authorization), settings.metrics_token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+
+async def admin_user(user: User = Depends(current_user)) -> User:
+    if user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin role required")
+    return user
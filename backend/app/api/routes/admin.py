@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps.auth import admin_user
+from app.api.deps.tenant import tenant_id
+from app.db.session import get_db
+from app.schemas.admin import (
+    QuarantinedJobItem,
+    QuarantineReplayFailure,
+    QuarantineReplayItem,
+    QuarantineReplayRequest,
+    QuarantineReplayResponse,
+)
+from app.services.repository import list_quarantined_jobs
+from app.services.tasks import replay_quarantined_jobs
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(admin_user)])
+
+
+@router.get("/quarantine", response_model=list[QuarantinedJobItem])
+def get_quarantined_jobs(
+    status: str | None = Query(default="quarantined"),
+    failure_class: str | None = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=500),
+    after_id: int = Query(default=0, ge=0),
+    tenant: str = Depends(tenant_id),
+    db: Session = Depends(get_db),
+) -> list[QuarantinedJobItem]:
+    rows = list_quarantined_jobs(
+        db, tenant_external_id=tenant, status=status, failure_class=failure_class, limit=limit, after_id=after_id
+    )
+    return [QuarantinedJobItem.model_validate(row, from_attributes=True) for row in rows]
+
+
+@router.post("/quarantine/replay", response_model=QuarantineReplayResponse)
+def replay_quarantine(
+    body: QuarantineReplayRequest,
+    tenant: str = Depends(tenant_id),
+    db: Session = Depends(get_db),
+) -> QuarantineReplayResponse:
+    # Without ids, replays the oldest quarantined jobs (optionally of one failure class).
+    rows = list_quarantined_jobs(
+        db, tenant_external_id=tenant, failure_class=body.failure_class, ids=body.ids, limit=body.limit
+    )
+    replayed, failed = replay_quarantined_jobs(db, tenant_external_id=tenant, rows=rows)
+    return QuarantineReplayResponse(
+        replayed=[
+            QuarantineReplayItem(id=row.id, submission_id=row.submission_id, replay_of=row.job_id, job_id=job_id)
+            for row, job_id in replayed
+        ],
+        failed=[
+            QuarantineReplayFailure(id=row.id, submission_id=row.submission_id, error=error) for row, error in failed
+        ],
+    )
@@ -1,4 +1,9 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from app.api.deps.auth import metrics_reader
+from app.core import metrics
+from app.services.job_scheduler import scheduler_gauges
+from app.services.shared_metrics import shared_snapshot
 
 router = APIRouter(tags=["health"])
 
@@ -6,3 +11,15 @@ router = APIRouter(tags=["health"])
 @router.get("/health")
 def health() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@router.get("/metrics", dependencies=[Depends(metrics_reader)])
+def get_metrics() -> dict[str, dict]:
+    # This process's own metrics, plus the ones every API and worker process records in shared
+    # storage and the scheduler gauges read from its shared state.
+    shared = shared_snapshot()
+    snapshot = metrics.snapshot()
+    snapshot["counters"].update(shared["counters"])
+    snapshot["summaries"].update(shared["summaries"])
+    snapshot["gauges"].update(scheduler_gauges())
+    return snapshot
@@ -3,6 +3,7 @@ from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from app.api.deps.tenant import tenant_id
 from app.schemas.ingestion import IngestionResponse
 from app.services.ingestion import ingest_file
+from app.services.uploads import UploadTooLargeError
 
 router = APIRouter(prefix="/ingestion", tags=["ingestion"])
 
@@ -14,5 +15,7 @@ async def upload_submission(
 ) -> IngestionResponse:
     try:
         return await ingest_file(file)
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
@@ -1,74 +1,159 @@
-import base64
+from contextlib import ExitStack
+from hashlib import sha256
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, File, Header, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.api.deps.tenant import tenant_id
-from app.db.session import get_db
+from app.core.config import settings
+from app.db.session import SessionLocal, get_db
 from app.schemas.async_jobs import AsyncPipelineAccepted, AsyncPipelineStatus
 from app.schemas.pipeline import PipelineResponse
 from app.services.document_text import DocumentParseError
-from app.services.pipeline_engine import compute_payload_sha256, run_pipeline_bytes
+from app.services.export import pipeline_from_stored_json
+from app.services.job_scheduler import job_lane
+from app.services.job_status import TERMINAL_STATUSES, now_iso, read_job_status, update_job_status
+from app.services.pipeline_engine import (
+    MULTI_DOCUMENT_CONTENT_TYPE,
+    DocumentInput,
+    multi_document_filename,
+    run_pipeline_bytes,
+    run_pipeline_documents,
+)
+from app.services.pipeline_executor import ExecutorSaturatedError, get_pipeline_executor
+from app.services.progress import format_sse, job_event_stream, publish_progress
 from app.services.repository import (
     create_queued_submission,
     generate_idempotency_key,
+    get_latest_profile_version,
     get_submission_by_idempotency,
+    get_submission_by_job,
     get_submission_by_job_and_tenant,
 )
 from app.services.storage import get_storage, safe_filename
-from app.services.tasks import process_submission_task
+from app.services.tasks import MULTI_DOCUMENT_JOB, PIPELINE_JOB, schedule_job
+from app.services.uploads import SpooledUpload, UploadTooLargeError, spool_upload
 from app.worker import celery_app
 
 router = APIRouter(prefix="/pipeline", tags=["pipeline"])
 
 
+async def _spool_or_413(file: UploadFile) -> SpooledUpload:
+    try:
+        return await spool_upload(file)
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+
+
 @router.post("/run", response_model=PipelineResponse)
 async def run_pipeline(
     file: UploadFile = File(...),
+    dedupe: bool = Query(default=False),
     tenant: str = Depends(tenant_id),
     db: Session = Depends(get_db),
 ) -> PipelineResponse:
     if not file.filename:
         raise HTTPException(status_code=400, detail="Missing file name")
 
-    payload = await file.read()
+    upload = await _spool_or_413(file)
     try:
-        result = run_pipeline_bytes(
-            db=db,
-            tenant_external_id=tenant,
-            filename=file.filename,
-            content_type=file.content_type or "application/octet-stream",
-            payload=payload,
-            persist=True,
-        )
+        with upload:
+            result = await get_pipeline_executor().run(
+                run_pipeline_bytes,
+                db=db,
+                tenant_external_id=tenant,
+                filename=file.filename,
+                content_type=upload.content_type,
+                payload=upload.view(),
+                persist=True,
+                payload_sha256=upload.sha256,
+                dedupe=dedupe,
+            )
+    except ExecutorSaturatedError as exc:
+        raise HTTPException(
+            status_code=503,
+            detail="Pipeline is at capacity; retry shortly",
+            headers={"Retry-After": str(settings.pipeline_retry_after_seconds)},
+        ) from exc
     except DocumentParseError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
     return result
 
 
+def _check_documents(files: list[UploadFile]) -> None:
+    if not files:
+        raise HTTPException(status_code=400, detail="No files uploaded")
+    if len(files) > settings.pipeline_max_documents:
+        raise HTTPException(
+            status_code=400, detail=f"At most {settings.pipeline_max_documents} documents per submission"
+        )
+    if any(not file.filename for file in files):
+        raise HTTPException(status_code=400, detail="Missing file name")
+
+
+@router.post("/run-multi", response_model=PipelineResponse)
+async def run_pipeline_multi(
+    files: list[UploadFile] = File(...),
+    tenant: str = Depends(tenant_id),
+    db: Session = Depends(get_db),
+) -> PipelineResponse:
+    _check_documents(files)
+    with ExitStack() as stack:
+        uploads = [stack.enter_context(await _spool_or_413(file)) for file in files]
+        documents = [
+            DocumentInput(
+                filename=file.filename,
+                content_type=upload.content_type,
+                payload=upload.view(),
+                payload_sha256=upload.sha256,
+            )
+            for file, upload in zip(files, uploads)
+        ]
+        try:
+            return await get_pipeline_executor().run(
+                run_pipeline_documents,
+                db=db,
+                tenant_external_id=tenant,
+                documents=documents,
+                persist=True,
+            )
+        except ExecutorSaturatedError as exc:
+            raise HTTPException(
+                status_code=503,
+                detail="Pipeline is at capacity; retry shortly",
+                headers={"Retry-After": str(settings.pipeline_retry_after_seconds)},
+            ) from exc
+        except DocumentParseError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
 @router.post("/run-async", response_model=AsyncPipelineAccepted)
 async def run_pipeline_async(
     file: UploadFile = File(...),
     tenant: str = Depends(tenant_id),
     idempotency_key_header: str | None = Header(default=None, alias="Idempotency-Key"),
+    priority: bool | None = Query(default=None),
     db: Session = Depends(get_db),
 ) -> AsyncPipelineAccepted:
     if not file.filename:
         raise HTTPException(status_code=400, detail="Missing file name")
 
-    payload = await file.read()
-    payload_hash = compute_payload_sha256(payload)
-    derived_key = idempotency_key_header or generate_idempotency_key(tenant, file.filename, payload_hash)
-    existing = get_submission_by_idempotency(db, derived_key)
-    if existing and existing.job_id:
-        return AsyncPipelineAccepted(job_id=existing.job_id, submission_id=existing.submission_id, status=existing.job_status)
+    upload = await _spool_or_413(file)
+    with upload:
+        derived_key = idempotency_key_header or generate_idempotency_key(tenant, file.filename, upload.sha256)
+        existing = get_submission_by_idempotency(db, derived_key)
+        if existing and existing.job_id:
+            return AsyncPipelineAccepted(job_id=existing.job_id, submission_id=existing.submission_id, status=existing.job_status)
 
-    submission_id = f"sub_{uuid4().hex[:12]}"
-    storage = get_storage()
-    source_key = f"submissions/{tenant}/{submission_id}/{safe_filename(file.filename)}"
-    storage.put_bytes(source_key, payload, file.content_type or "application/octet-stream")
+        submission_id = f"sub_{uuid4().hex[:12]}"
+        storage = get_storage()
+        source_key = f"submissions/{tenant}/{submission_id}/{safe_filename(file.filename)}"
+        storage.put_bytes(source_key, upload.view(), upload.content_type)
+        lane = job_lane(priority, upload.size)
 
     job_id = f"job_{uuid4().hex[:20]}"
     create_queued_submission(
@@ -80,37 +165,150 @@ async def run_pipeline_async(
         source_object_key=source_key,
         idempotency_key=derived_key,
         job_id=job_id,
+        lane=lane,
+    )
+
+    _record_queued(job_id, tenant, submission_id, lane)
+    schedule_job(
+        PIPELINE_JOB,
+        job_id,
+        tenant_external_id=tenant,
+        lane=lane,
+        submission_id=submission_id,
+        filename=file.filename,
+        content_type=file.content_type or "application/octet-stream",
+        source_object_key=source_key,
+        payload_sha256=upload.sha256,
+    )
+    return AsyncPipelineAccepted(job_id=job_id, submission_id=submission_id)
+
+
+@router.post("/run-multi-async", response_model=AsyncPipelineAccepted)
+async def run_pipeline_multi_async(
+    files: list[UploadFile] = File(...),
+    tenant: str = Depends(tenant_id),
+    idempotency_key_header: str | None = Header(default=None, alias="Idempotency-Key"),
+    priority: bool | None = Query(default=None),
+    db: Session = Depends(get_db),
+) -> AsyncPipelineAccepted:
+    _check_documents(files)
+    with ExitStack() as stack:
+        uploads = [stack.enter_context(await _spool_or_413(file)) for file in files]
+        combined_sha256 = sha256("".join(upload.sha256 for upload in uploads).encode("utf-8")).hexdigest()
+        derived_key = idempotency_key_header or generate_idempotency_key(tenant, f"multi:{len(uploads)}", combined_sha256)
+        existing = get_submission_by_idempotency(db, derived_key)
+        if existing and existing.job_id:
+            return AsyncPipelineAccepted(job_id=existing.job_id, submission_id=existing.submission_id, status=existing.job_status)
+
+        submission_id = f"sub_{uuid4().hex[:12]}"
+        storage = get_storage()
+        documents: list[dict] = []
+        for index, (file, upload) in enumerate(zip(files, uploads)):
+            source_key = f"submissions/{tenant}/{submission_id}/{index}-{safe_filename(file.filename)}"
+            storage.put_bytes(source_key, upload.view(), upload.content_type)
+            documents.append(
+                {
+                    "filename": file.filename,
+                    "content_type": upload.content_type,
+                    "source_object_key": source_key,
+                    "payload_sha256": upload.sha256,
+                }
+            )
+        lane = job_lane(priority, sum(upload.size for upload in uploads))
+
+    filename = multi_document_filename([document["filename"] for document in documents])
+    job_id = f"job_{uuid4().hex[:20]}"
+    create_queued_submission(
+        db=db,
+        tenant_external_id=tenant,
+        submission_id=submission_id,
+        filename=filename,
+        content_type=MULTI_DOCUMENT_CONTENT_TYPE,
+        source_object_key=None,
+        idempotency_key=derived_key,
+        job_id=job_id,
+        lane=lane,
     )
+    _record_queued(job_id, tenant, submission_id, lane)
+    schedule_job(
+        MULTI_DOCUMENT_JOB,
+        job_id,
+        tenant_external_id=tenant,
+        lane=lane,
+        submission_id=submission_id,
+        documents=documents,
+    )
+    return AsyncPipelineAccepted(job_id=job_id, submission_id=submission_id)
+
 
-    task = process_submission_task.apply_async(
-        task_id=job_id,
-        kwargs={
-            "tenant_external_id": tenant,
-            "submission_id": submission_id,
-            "filename": file.filename,
-            "content_type": file.content_type or "application/octet-stream",
-            "payload_b64": base64.b64encode(payload).decode("utf-8"),
-            "source_object_key": source_key,
-        },
+def _record_queued(job_id: str, tenant: str, submission_id: str, lane: str) -> None:
+    update_job_status(
+        job_id, status="queued", tenant=tenant, submission_id=submission_id, lane=lane, attempt=0, queued_at=now_iso()
     )
+    publish_progress(job_id, "queued", submission_id=submission_id)
+
+
+def _tenant_job_status(job_id: str, tenant: str) -> dict | None:
+    record = read_job_status(job_id)
+    if record is None or "tenant" not in record:
+        # A record the worker created on its own (the job was queued without one) carries no
+        # tenant; callers then check ownership through the submission row instead.
+        return None
+    if record["tenant"] != tenant:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return record
 
-    return AsyncPipelineAccepted(job_id=task.id, submission_id=submission_id)
+
+def _load_result(db: Session, tenant: str, submission_id: str) -> PipelineResponse | None:
+    version = get_latest_profile_version(db, tenant_external_id=tenant, submission_id=submission_id)
+    if version is None:
+        return None
+    return pipeline_from_stored_json(version.profile_json, version.completeness_json, version.questions_json)
 
 
 @router.get("/jobs/{job_id}", response_model=AsyncPipelineStatus)
 def get_job_status(
     job_id: str,
+    include_result: bool = Query(default=True),
     tenant: str = Depends(tenant_id),
     db: Session = Depends(get_db),
 ) -> AsyncPipelineStatus:
+    record = _tenant_job_status(job_id, tenant)
+    if record is not None:
+        status = AsyncPipelineStatus(
+            job_id=job_id,
+            status=record["status"],
+            submission_id=record.get("submission_id"),
+            stage=record.get("stage"),
+            lane=record.get("lane"),
+            attempt=record.get("attempt"),
+            queued_at=record.get("queued_at"),
+            dispatched_at=record.get("dispatched_at"),
+            started_at=record.get("started_at"),
+            finished_at=record.get("finished_at"),
+            updated_at=record.get("updated_at"),
+            error=record.get("error"),
+        )
+        if status.status == "succeeded":
+            status.result_url = f"{settings.api_prefix}/pipeline/jobs/{job_id}/result"
+            if include_result and status.submission_id:
+                status.result = _load_result(db, tenant, status.submission_id)
+        return status
+
+    # Jobs queued before status records existed, or whose record is unavailable.
     task = celery_app.AsyncResult(job_id)
     status = (task.status or "PENDING").lower()
     if task.successful():
-        return AsyncPipelineStatus(
-            job_id=job_id,
-            status="succeeded",
-            result=PipelineResponse.model_validate(task.result),
-        )
+        reference = task.result if isinstance(task.result, dict) else {}
+        submission_id = reference.get("submission_id")
+        result = None
+        if include_result and "profile" in reference:
+            # Tasks from before result references returned the full response.
+            result = PipelineResponse.model_validate(reference)
+            submission_id = result.profile.submission_id
+        elif include_result and submission_id:
+            result = _load_result(db, tenant, submission_id)
+        return AsyncPipelineStatus(job_id=job_id, status="succeeded", submission_id=submission_id, result=result)
     if task.failed():
         return AsyncPipelineStatus(
             job_id=job_id,
@@ -123,3 +321,77 @@ def get_job_status(
         status = submission.job_status
 
     return AsyncPipelineStatus(job_id=job_id, status=status)
+
+
+@router.get("/jobs/{job_id}/result", response_model=PipelineResponse)
+def get_job_result(
+    job_id: str,
+    request: Request,
+    tenant: str = Depends(tenant_id),
+    db: Session = Depends(get_db),
+) -> Response:
+    record = _tenant_job_status(job_id, tenant)
+    if record is not None:
+        submission_id, succeeded = record.get("submission_id"), record["status"] == "succeeded"
+    else:
+        submission = get_submission_by_job_and_tenant(db, job_id, tenant_external_id=tenant)
+        if not submission:
+            raise HTTPException(status_code=404, detail="Job not found")
+        submission_id, succeeded = submission.submission_id, submission.job_status == "processed"
+    if not succeeded:
+        raise HTTPException(status_code=409, detail="Job has not succeeded")
+
+    version = get_latest_profile_version(db, tenant_external_id=tenant, submission_id=submission_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Result not found")
+    # Stored versions never change, so the version number is a strong validator; a later
+    # version (late LLM upgrade, re-run) changes the ETag.
+    etag = f'"{submission_id}-v{version.version}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    result = pipeline_from_stored_json(version.profile_json, version.completeness_json, version.questions_json)
+    return Response(content=result.model_dump_json(), media_type="application/json", headers=headers)
+
+
+_TERMINAL_JOB_STATUSES = {"processed": "succeeded", "failed": "failed"}
+
+
+def _terminal_job_event(job_id: str) -> str | None:
+    record = read_job_status(job_id)
+    if record is not None:
+        return record["status"] if record["status"] in TERMINAL_STATUSES else None
+    with SessionLocal() as db:
+        submission = get_submission_by_job(db, job_id)
+        return _TERMINAL_JOB_STATUSES.get(submission.job_status) if submission else None
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    tenant: str = Depends(tenant_id),
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    # The tenant check and the heartbeat status checks read the job status record; the database
+    # is only consulted for jobs without one.
+    record = _tenant_job_status(job_id, tenant)
+    if record is not None:
+        submission_id = record.get("submission_id")
+        finished = record["status"] if record["status"] in TERMINAL_STATUSES else None
+    else:
+        submission = get_submission_by_job_and_tenant(db, job_id, tenant_external_id=tenant)
+        if not submission:
+            raise HTTPException(status_code=404, detail="Job not found")
+        submission_id = submission.submission_id
+        finished = _TERMINAL_JOB_STATUSES.get(submission.job_status)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if finished is not None:
+        done = format_sse({"event": finished, "job_id": job_id, "submission_id": submission_id})
+        return StreamingResponse(iter([done]), media_type="text/event-stream", headers=headers)
+
+    return StreamingResponse(
+        job_event_stream(job_id, lambda: run_in_threadpool(_terminal_job_event, job_id)),
+        media_type="text/event-stream",
+        headers=headers,
+    )
@@ -6,9 +6,17 @@ from sqlalchemy.orm import Session
 
 from app.api.deps.tenant import tenant_id
 from app.db.session import get_db
+from app.schemas.pipeline import PipelineResponse
 from app.schemas.submission import AuditLogItem, SubmissionListItem
 from app.services.export import as_json, as_markdown, as_pdf_bytes, pipeline_from_stored_json
-from app.services.repository import get_latest_profile_version, list_audit_logs, list_submissions, set_export_key
+from app.services.pipeline_engine import rerun_submission
+from app.services.repository import (
+    get_latest_profile_version,
+    get_submission,
+    list_audit_logs,
+    list_submissions,
+    set_export_key,
+)
 from app.services.storage import get_storage
 
 router = APIRouter(prefix="/submissions", tags=["submissions"])
@@ -73,6 +81,20 @@ def export_submission(
     return PlainTextResponse(content=payload.decode("utf-8"), media_type="text/markdown")
 
 
+@router.post("/{submission_id}/rerun", response_model=PipelineResponse)
+def rerun(
+    submission_id: str,
+    tenant: str = Depends(tenant_id),
+    db: Session = Depends(get_db),
+) -> PipelineResponse:
+    submission = get_submission(db, tenant_external_id=tenant, submission_id=submission_id)
+    if not submission:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    if not submission.source_object_key:
+        raise HTTPException(status_code=409, detail="Submission has no stored source to re-run")
+    return rerun_submission(db, tenant_external_id=tenant, submission=submission)
+
+
 @router.get("/{submission_id}/audit", response_model=list[AuditLogItem])
 def submission_audit(
     submission_id: str,
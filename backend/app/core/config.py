@@ -5,6 +5,37 @@ class Settings(BaseSettings):
     app_env: str = "local"
     api_prefix: str = "/api/v1"
     openai_api_key: str = ""
+    openai_base_url: str = ""
+    openai_model: str = "gpt-4.1-mini"
+    openai_timeout_seconds: float = 60.0
+    openai_max_retries: int = 2
+    llm_max_concurrency: int = 4
+    llm_tokens_per_minute: int = 0
+    llm_chunk_chars: int = 16000
+    llm_max_chunks: int = 8
+    llm_mode: str = "full"
+    llm_confidence_threshold: float = 0.7
+    llm_deadline_seconds: float = 0.0
+    llm_async_deadline_seconds: float = 0.0
+    llm_late_result_upgrade: bool = False
+    llm_speculative_workers: int = 8
+    llm_speculative_max_queued: int = 16
+    llm_breaker_enabled: bool = True
+    llm_breaker_backend: str = "file"
+    llm_breaker_state_path: str = "./storage/llm-breaker.json"
+    llm_breaker_window_seconds: float = 60.0
+    llm_breaker_min_calls: int = 10
+    llm_breaker_failure_rate: float = 0.5
+    llm_breaker_slow_call_seconds: float = 20.0
+    llm_breaker_slow_call_rate: float = 0.8
+    llm_breaker_open_seconds: float = 30.0
+    llm_prune_enabled: bool = False
+    llm_prune_context_lines: int = 3
+    llm_prune_token_budget: int = 6000
+    llm_prune_ms_per_1k_tokens: float = 20.0
+    llm_cache_enabled: bool = True
+    llm_cache_ttl_seconds: int = 7 * 24 * 3600
+    llm_cache_max_entries: int = 50000
     database_url: str = "postgresql+psycopg://postgres:postgres@db:5432/ghostwriter"
     redis_url: str = "redis://localhost:6379/0"
     auth_disabled: bool = False
@@ -24,6 +55,41 @@ class Settings(BaseSettings):
     storage_s3_endpoint: str = ""
     storage_s3_access_key: str = ""
     storage_s3_secret_key: str = ""
+    pdf_extract_workers: int = 0
+    pdf_parallel_min_pages: int = 48
+    pdf_min_pages_per_shard: int = 8
+    pdf_fallback_parallel_min_pages: int = 4
+    text_cache_enabled: bool = True
+    text_cache_memory_max_bytes: int = 64 * 1024 * 1024
+    text_cache_dir: str = "./storage/cache/extracted-text"
+    text_cache_disk_max_bytes: int = 1024 * 1024 * 1024
+    upload_max_bytes: int = 100 * 1024 * 1024
+    upload_chunk_bytes: int = 1024 * 1024
+    upload_spool_memory_bytes: int = 4 * 1024 * 1024
+    pipeline_executor_workers: int = 4
+    pipeline_executor_max_queued: int = 8
+    pipeline_retry_after_seconds: int = 5
+    pipeline_stage_workers: int = 8
+    pipeline_max_documents: int = 20
+    stage_memo_enabled: bool = True
+    stage_memo_ttl_seconds: int = 30 * 24 * 3600
+    stage_memo_max_entries: int = 100000
+    progress_backend: str = "redis"
+    progress_event_ttl_seconds: int = 3600
+    progress_heartbeat_seconds: float = 15.0
+    progress_stream_timeout_seconds: float = 600.0
+    job_status_backend: str = "redis"
+    job_status_ttl_seconds: int = 7 * 24 * 3600
+    celery_result_expires_seconds: int = 3600
+    job_scheduler_backend: str = "redis"
+    job_scheduler_max_in_flight: int = 32
+    job_scheduler_tenant_max_in_flight: int = 8
+    job_scheduler_tenant_weights: dict[str, int] = {}
+    job_scheduler_priority_max_bytes: int = 0
+    job_scheduler_in_flight_timeout_seconds: int = 3600
+    job_scheduler_sweep_seconds: float = 60.0
+    metrics_backend: str = "redis"
+    metrics_token: str = ""
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
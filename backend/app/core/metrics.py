@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters: dict[str, float] = defaultdict(float)
+_gauges: dict[str, float] = {}
+_summaries: dict[str, dict[str, float]] = {}
+
+
+def metric_key(name: str, labels: dict[str, object]) -> str:
+    if not labels:
+        return name
+    rendered = ",".join(f"{key}={labels[key]}" for key in sorted(labels))
+    return f"{name}{{{rendered}}}"
+
+
+def increment(name: str, value: float = 1.0, **labels: object) -> None:
+    key = metric_key(name, labels)
+    with _lock:
+        _counters[key] += value
+
+
+def set_gauge(name: str, value: float, **labels: object) -> None:
+    key = metric_key(name, labels)
+    with _lock:
+        _gauges[key] = value
+
+
+def observe(name: str, value: float, **labels: object) -> None:
+    key = metric_key(name, labels)
+    with _lock:
+        summary = _summaries.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0})
+        summary["count"] += 1
+        summary["sum"] += value
+        summary["max"] = max(summary["max"], value)
+
+
+def counter_value(name: str, **labels: object) -> float:
+    with _lock:
+        return _counters.get(metric_key(name, labels), 0.0)
+
+
+def snapshot() -> dict[str, dict]:
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "summaries": {key: dict(value) for key, value in _summaries.items()},
+        }
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _summaries.clear()
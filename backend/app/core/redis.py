@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import threading
+
+import redis
+import redis.asyncio as redis_asyncio
+
+from app.core.config import settings
+
+_client: redis.Redis | None = None
+_client_lock = threading.Lock()
+
+
+def get_redis() -> redis.Redis:
+    # Short timeouts: Redis carries best-effort signals here, and callers degrade when it is down.
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = redis.Redis.from_url(settings.redis_url, socket_timeout=1.0, socket_connect_timeout=1.0)
+    return _client
+
+
+def new_async_redis() -> redis_asyncio.Redis:
+    # Async connections belong to one event loop, so long-lived consumers open their own.
+    return redis_asyncio.Redis.from_url(settings.redis_url, socket_connect_timeout=1.0)
+
+
+def reset_redis() -> None:
+    global _client
+    _client = None
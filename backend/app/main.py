@@ -1,9 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 import time
 import logging
 
+from app.api.routes.admin import router as admin_router
 from app.api.routes.auth import router as auth_router
 from app.api.routes.health import router as health_router
 from app.api.routes.ingestion import router as ingestion_router
@@ -31,6 +33,65 @@ class RequestLogMiddleware(BaseHTTPMiddleware):
         return response
 
 
+class _BodyTooLarge(Exception):
+    pass
+
+
+# Starlette spools the whole multipart body before a handler runs, so spool_upload's limit only
+# fires after an oversized upload was received. This rejects it at the ASGI layer instead: from
+# Content-Length up front, or as soon as a chunked body crosses the limit.
+class RequestBodyLimitMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limit = request_body_limit(scope["path"])
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await _reject_too_large(scope, receive, send, limit)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise _BodyTooLarge
+            return message
+
+        async def tracking_send(message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except _BodyTooLarge:
+            if response_started:
+                raise
+            await _reject_too_large(scope, receive, send, limit)
+
+
+def request_body_limit(path: str) -> int:
+    # Multipart framing adds a little to each file; multi-document routes carry several files.
+    files = settings.pipeline_max_documents if "/run-multi" in path else 1
+    return settings.upload_max_bytes * files + 64 * 1024
+
+
+async def _reject_too_large(scope, receive, send, limit: int) -> None:
+    response = JSONResponse({"detail": f"Request body exceeds {limit} bytes"}, status_code=413)
+    await response(scope, receive, send)
+
+
 def create_app() -> FastAPI:
     configure_logging()
     if settings.sentry_dsn:
@@ -49,12 +110,14 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(RequestBodyLimitMiddleware)
     app.add_middleware(RequestLogMiddleware)
     app.include_router(health_router)
     app.include_router(auth_router, prefix=settings.api_prefix)
     app.include_router(ingestion_router, prefix=settings.api_prefix)
     app.include_router(pipeline_router, prefix=settings.api_prefix)
     app.include_router(submissions_router, prefix=settings.api_prefix)
+    app.include_router(admin_router, prefix=settings.api_prefix)
 
     return app
 
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -31,8 +31,12 @@ class Submission(Base):
     job_id: Mapped[str | None] = mapped_column(String(128), nullable=True, index=True)
     job_status: Mapped[str] = mapped_column(String(64), default="processed")
     status: Mapped[str] = mapped_column(String(64), default="processed")
+    payload_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    pipeline_version: Mapped[str | None] = mapped_column(String(32), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
+    __table_args__ = (Index("ix_submissions_dedupe", "tenant_id", "payload_sha256", "pipeline_version"),)
+
 
 class ProfileVersion(Base):
     __tablename__ = "profile_versions"
@@ -49,6 +53,8 @@ class ProfileVersion(Base):
     export_pdf_key: Mapped[str | None] = mapped_column(String(512), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
+    __table_args__ = (UniqueConstraint("tenant_id", "submission_id", "version", name="uq_profile_versions_version"),)
+
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
@@ -72,3 +78,50 @@ class User(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     tenant: Mapped["Tenant"] = relationship(back_populates="users")
+
+
+class LlmResponseCache(Base):
+    __tablename__ = "llm_response_cache"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    cache_key: Mapped[str] = mapped_column(String(64), unique=True, index=True)
+    model: Mapped[str] = mapped_column(String(100))
+    response_json: Mapped[str] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    last_used_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True
+    )
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+
+
+class StageOutput(Base):
+    __tablename__ = "stage_outputs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    cache_key: Mapped[str] = mapped_column(String(64), unique=True, index=True)
+    stage: Mapped[str] = mapped_column(String(64))
+    stage_version: Mapped[str] = mapped_column(String(32))
+    output_json: Mapped[str] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class QuarantinedJob(Base):
+    __tablename__ = "quarantined_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    tenant_id: Mapped[int] = mapped_column(ForeignKey("tenants.id"), index=True)
+    submission_id: Mapped[str] = mapped_column(String(64), index=True)
+    job_id: Mapped[str] = mapped_column(String(128), index=True)
+    job_kind: Mapped[str] = mapped_column(String(32))
+    task_name: Mapped[str] = mapped_column(String(128))
+    source_object_key: Mapped[str | None] = mapped_column(String(512), nullable=True)
+    failure_class: Mapped[str] = mapped_column(String(32))
+    error_type: Mapped[str] = mapped_column(String(128))
+    error_message: Mapped[str] = mapped_column(Text)
+    attempts: Mapped[int] = mapped_column(Integer, default=1)
+    payload_json: Mapped[str] = mapped_column(Text)
+    status: Mapped[str] = mapped_column(String(32), default="quarantined")
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    replayed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (Index("ix_quarantined_jobs_tenant_status", "tenant_id", "status", "id"),)
@@ -9,6 +9,7 @@ from pydantic import BaseModel, Field
 class FieldCitation(BaseModel):
     source_document: str
     page: int | None = None
+    page_end: int | None = None
     snippet: str | None = None
 
 
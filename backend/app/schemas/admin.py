@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class QuarantinedJobItem(BaseModel):
+    id: int
+    job_id: str
+    submission_id: str
+    job_kind: str
+    task_name: str
+    source_object_key: str | None = None
+    failure_class: str
+    error_type: str
+    error_message: str
+    attempts: int
+    status: str
+    created_at: datetime
+    replayed_at: datetime | None = None
+
+
+class QuarantineReplayRequest(BaseModel):
+    ids: list[int] | None = None
+    failure_class: str | None = None
+    limit: int = Field(default=100, ge=1, le=500)
+
+
+class QuarantineReplayItem(BaseModel):
+    id: int
+    submission_id: str
+    replay_of: str
+    job_id: str
+
+
+class QuarantineReplayFailure(BaseModel):
+    id: int
+    submission_id: str
+    error: str
+
+
+class QuarantineReplayResponse(BaseModel):
+    replayed: list[QuarantineReplayItem]
+    failed: list[QuarantineReplayFailure] = []
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from datetime import datetime
+
 from pydantic import BaseModel
 
 from app.schemas.pipeline import PipelineResponse
@@ -14,5 +16,15 @@ class AsyncPipelineAccepted(BaseModel):
 class AsyncPipelineStatus(BaseModel):
     job_id: str
     status: str
+    submission_id: str | None = None
+    stage: str | None = None
+    lane: str | None = None
+    attempt: int | None = None
+    queued_at: datetime | None = None
+    dispatched_at: datetime | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    updated_at: datetime | None = None
+    result_url: str | None = None
     result: PipelineResponse | None = None
     error: str | None = None
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Any
+
 from pydantic import BaseModel, Field
 
 from app.models.risk import RiskProfile
@@ -24,3 +26,4 @@ class PipelineResponse(BaseModel):
     profile: RiskProfile
     completeness: list[CompletenessResult]
     questions: QuestionSet
+    debug: dict[str, Any] = Field(default_factory=dict)
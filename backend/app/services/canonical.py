@@ -26,3 +26,64 @@ def build_canonical_profile(submission_id: str, extraction: dict[str, Any]) -> R
     profile.contradictions = detect_contradictions(fields, profile)
 
     return profile
+
+
+def merge_extractions(extractions: list[tuple[str, dict[str, Any]]]) -> dict[str, Any]:
+    # Folds per-document extractions (keyed by filename) into one. Each scalar field takes the
+    # most confident document's value, earliest document on ties; every document that reported
+    # a value keeps its citation, winner first. LOBs are unioned and LOB fields filled in order.
+    fields: dict[str, Any] = {}
+    confidence: dict[str, float] = {}
+    citations: dict[str, list[dict[str, Any]]] = {}
+    field_sources: dict[str, str] = {}
+
+    names = []
+    for _, extraction in extractions:
+        names.extend(name for name in extraction["fields"] if name not in names)
+    for name in names:
+        if name in ("lines_of_business", "lob_fields"):
+            continue
+        reported = [
+            (extraction["confidence"].get(name, 0.0), index, filename, extraction)
+            for index, (filename, extraction) in enumerate(extractions)
+            if extraction["fields"].get(name) is not None
+        ]
+        reported.sort(key=lambda item: (-item[0], item[1]))
+        if not reported:
+            fields[name] = None
+            confidence[name] = 0.0
+            citations[name] = []
+            continue
+        best_confidence, _, best_filename, best = reported[0]
+        fields[name] = best["fields"][name]
+        confidence[name] = best_confidence
+        citations[name] = [cite for *_, extraction in reported for cite in extraction["citations"].get(name, [])]
+        field_sources[name] = best_filename
+
+    lines: set[str] = set()
+    lob_fields: dict[str, dict[str, Any]] = {}
+    lob_citations: list[dict[str, Any]] = []
+    lob_confidence = 0.0
+    for _, extraction in extractions:
+        document_lines = extraction["fields"].get("lines_of_business") or []
+        if document_lines:
+            lines.update(document_lines)
+            lob_citations.extend(extraction["citations"].get("lines_of_business", []))
+            lob_confidence = max(lob_confidence, extraction["confidence"].get("lines_of_business", 0.0))
+        for lob, values in (extraction["fields"].get("lob_fields") or {}).items():
+            merged = lob_fields.setdefault(lob, {})
+            for key, value in values.items():
+                if value not in (None, "", [], {}) and key not in merged:
+                    merged[key] = value
+
+    fields["lines_of_business"] = sorted(lines)
+    fields["lob_fields"] = lob_fields
+    confidence["lines_of_business"] = lob_confidence
+    citations["lines_of_business"] = lob_citations
+
+    documents = [{"filename": filename, **extraction.get("debug", {})} for filename, extraction in extractions]
+    debug: dict[str, Any] = {"mode": "merged", "documents": documents, "field_sources": field_sources}
+    degraded = [document["filename"] for document in documents if document.get("degraded")]
+    if degraded:
+        debug.update(degraded=True, degraded_reason="document_degraded", degraded_documents=degraded)
+    return {"fields": fields, "confidence": confidence, "citations": citations, "debug": debug}
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+
+from app.services.document_text import PAGE_BREAK
+
+_SECTION_BREAK = re.compile(r"\n[ \t]*\n")
+
+
+@dataclass(frozen=True)
+class TextChunk:
+    index: int
+    text: str
+    start: int
+    end: int
+    first_page: int | None
+    last_page: int | None
+
+
+@dataclass(frozen=True)
+class _Section:
+    start: int
+    end: int
+    page: int | None
+
+
+def split_text(text: str, max_chars: int, max_chunks: int | None = None) -> list[TextChunk]:
+    if not text.strip():
+        return []
+    chunks = _pack(text, max_chars)
+    while max_chunks and len(chunks) > max_chunks:
+        # Cover the whole document with at most max_chunks requests rather than dropping the tail.
+        max_chars = max(max_chars + 1, math.ceil(len(text) / max_chunks), int(max_chars * 1.25))
+        chunks = _pack(text, max_chars)
+    return chunks
+
+
+def _pack(text: str, max_chars: int) -> list[TextChunk]:
+    chunks: list[TextChunk] = []
+    current: list[_Section] = []
+    for section in _sections(text, max_chars):
+        if current and section.end - current[0].start > max_chars:
+            chunks.append(_chunk(text, len(chunks), current))
+            current = []
+        current.append(section)
+    if current:
+        chunks.append(_chunk(text, len(chunks), current))
+    return chunks
+
+
+def _sections(text: str, max_chars: int) -> list[_Section]:
+    paged = PAGE_BREAK in text
+    sections: list[_Section] = []
+    page_start = 0
+    for page_number, page in enumerate(text.split(PAGE_BREAK), start=1):
+        offset = 0
+        for part in _SECTION_BREAK.split(page):
+            start = page_start + page.index(part, offset)
+            offset = start - page_start + len(part)
+            if part.strip():
+                for piece_start, piece_end in _bounded(text, start, start + len(part), max_chars):
+                    sections.append(_Section(piece_start, piece_end, page_number if paged else None))
+        page_start += len(page) + len(PAGE_BREAK)
+    return sections
+
+
+def _bounded(text: str, start: int, end: int, max_chars: int) -> list[tuple[int, int]]:
+    # Oversized sections are cut at the last line break inside the budget, or hard-cut if none.
+    pieces: list[tuple[int, int]] = []
+    while end - start > max_chars:
+        cut = text.rfind("\n", start + 1, start + max_chars)
+        if cut <= start:
+            cut = start + max_chars
+        pieces.append((start, cut))
+        start = cut
+    pieces.append((start, end))
+    return pieces
+
+
+def _chunk(text: str, index: int, sections: list[_Section]) -> TextChunk:
+    start, end = sections[0].start, sections[-1].end
+    return TextChunk(
+        index=index,
+        text=text[start:end].replace(PAGE_BREAK, "\n\n").strip(),
+        start=start,
+        end=end,
+        first_page=sections[0].page,
+        last_page=sections[-1].page,
+    )
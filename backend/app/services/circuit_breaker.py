@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger("circuit_breaker")
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+_STATE_GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+# State lives in a small JSON document so every worker process sees the same breaker. Each
+# store applies a read-modify-write under a lock: a thread lock in memory, flock on a shared
+# file for one host, or an optimistic WATCH/MULTI transaction in Redis across hosts.
+class MemoryBreakerStore:
+    def __init__(self) -> None:
+        self._state: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def transact(self, fn: Callable[[dict[str, Any]], T]) -> T:
+        with self._lock:
+            return fn(self._state)
+
+
+class FileBreakerStore:
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def transact(self, fn: Callable[[dict[str, Any]], T]) -> T:
+        with open(self.path, "a+", encoding="utf-8") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                handle.seek(0)
+                raw = handle.read()
+                state = json.loads(raw) if raw else {}
+                result = fn(state)
+                handle.seek(0)
+                handle.truncate()
+                handle.write(json.dumps(state))
+                handle.flush()
+                os.fsync(handle.fileno())
+                return result
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class RedisBreakerStore:
+    def __init__(self, url: str, key: str) -> None:
+        import redis
+
+        self.key = key
+        self._client = redis.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+
+    def transact(self, fn: Callable[[dict[str, Any]], T]) -> T:
+        outcome: list[T] = []
+
+        def apply(pipe: Any) -> None:
+            raw = pipe.get(self.key)
+            state = json.loads(raw) if raw else {}
+            outcome[:] = [fn(state)]
+            pipe.multi()
+            pipe.set(self.key, json.dumps(state))
+
+        self._client.transaction(apply, self.key)
+        return outcome[0]
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        store: MemoryBreakerStore | FileBreakerStore | RedisBreakerStore,
+        window_seconds: float,
+        min_calls: int,
+        failure_rate: float,
+        slow_call_seconds: float,
+        slow_call_rate: float,
+        open_seconds: float,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.name = name
+        self.store = store
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._probe = threading.local()
+
+    def allow(self) -> bool:
+        def decide(state: dict[str, Any]) -> bool:
+            now = self._clock()
+            self._probe.claimed = False
+            current = state.get("state", CLOSED)
+            # Other processes may have moved the shared state; keep this process's gauge current.
+            metrics.set_gauge("llm_breaker_state", _STATE_GAUGE[current], breaker=self.name)
+            if current == CLOSED:
+                return True
+            if current == OPEN and now - state.get("opened_at", 0.0) < self.open_seconds:
+                return False
+            if current == HALF_OPEN and now - state.get("probe_started_at", 0.0) < self.open_seconds:
+                # One probe at a time; a probe that never reports back is replaced after open_seconds.
+                return False
+            self._transition(state, HALF_OPEN)
+            state["probe_started_at"] = now
+            self._probe.claimed = True
+            return True
+
+        allowed = self._guarded(decide, default=True)
+        if not allowed:
+            metrics.increment("llm_breaker_short_circuits", breaker=self.name)
+        return allowed
+
+    def release_probe(self) -> None:
+        # A probe claimed by allow() that never reached the LLM (cached response, or rules
+        # covered every field) has no outcome to record; give it back so the next call probes
+        # now instead of after open_seconds. A recorded probe already left HALF_OPEN.
+        if not getattr(self._probe, "claimed", False):
+            return
+        self._probe.claimed = False
+
+        def update(state: dict[str, Any]) -> None:
+            if state.get("state", CLOSED) == HALF_OPEN:
+                state.pop("probe_started_at", None)
+
+        self._guarded(update, default=None)
+
+    def record(self, success: bool, latency_seconds: float) -> None:
+        slow = latency_seconds >= self.slow_call_seconds
+
+        def update(state: dict[str, Any]) -> None:
+            now = self._clock()
+            current = state.get("state", CLOSED)
+            if current == HALF_OPEN:
+                if success and not slow:
+                    self._transition(state, CLOSED)
+                else:
+                    self._open(state, now)
+                return
+            if current == OPEN:
+                return
+
+            calls = [call for call in state.get("calls", []) if now - call[0] < self.window_seconds]
+            calls.append([now, success, slow])
+            state["calls"] = calls
+            if len(calls) < self.min_calls:
+                return
+            failures = sum(1 for call in calls if not call[1])
+            slow_calls = sum(1 for call in calls if call[2])
+            if failures / len(calls) >= self.failure_rate or slow_calls / len(calls) >= self.slow_call_rate:
+                self._open(state, now)
+
+        self._guarded(update, default=None)
+
+    @property
+    def state(self) -> str:
+        return self._guarded(lambda state: state.get("state", CLOSED), default=CLOSED)
+
+    def _open(self, state: dict[str, Any], now: float) -> None:
+        self._transition(state, OPEN)
+        state["opened_at"] = now
+
+    def _transition(self, state: dict[str, Any], target: str) -> None:
+        if state.get("state", CLOSED) != target:
+            metrics.increment("llm_breaker_transitions", breaker=self.name, to=target)
+            logger.warning("Circuit breaker %s -> %s", self.name, target)
+        state["state"] = target
+        state["calls"] = []
+        metrics.set_gauge("llm_breaker_state", _STATE_GAUGE[target], breaker=self.name)
+
+    def _guarded(self, fn: Callable[[dict[str, Any]], T], default: T) -> T:
+        # A broken state store must never take extraction down with it; behave as closed.
+        try:
+            return self.store.transact(fn)
+        except Exception:
+            logger.warning("Circuit breaker %s state store unavailable", self.name, exc_info=True)
+            return default
+
+
+_llm_breaker: CircuitBreaker | None = None
+_llm_breaker_lock = threading.Lock()
+
+
+def get_llm_breaker() -> CircuitBreaker:
+    global _llm_breaker
+    if _llm_breaker is not None:
+        return _llm_breaker
+    with _llm_breaker_lock:
+        if _llm_breaker is None:
+            if settings.llm_breaker_backend == "redis":
+                store = RedisBreakerStore(settings.redis_url, key="ghostwriter:breaker:llm")
+            elif settings.llm_breaker_backend == "file" and settings.llm_breaker_state_path:
+                store = FileBreakerStore(settings.llm_breaker_state_path)
+            else:
+                store = MemoryBreakerStore()
+            _llm_breaker = CircuitBreaker(
+                name="llm",
+                store=store,
+                window_seconds=settings.llm_breaker_window_seconds,
+                min_calls=settings.llm_breaker_min_calls,
+                failure_rate=settings.llm_breaker_failure_rate,
+                slow_call_seconds=settings.llm_breaker_slow_call_seconds,
+                slow_call_rate=settings.llm_breaker_slow_call_rate,
+                open_seconds=settings.llm_breaker_open_seconds,
+            )
+    return _llm_breaker
+
+
+def reset_llm_breaker() -> None:
+    global _llm_breaker
+    _llm_breaker = None
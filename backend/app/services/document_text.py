@@ -1,55 +1,176 @@
 from __future__ import annotations
 
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from email import policy
 from email.parser import BytesParser
+from hashlib import sha256
 from io import BytesIO
+from typing import Callable
 
 import fitz
 import pdfplumber
 
+from app.core.config import settings
+from app.services.text_cache import get_text_cache, text_cache_key
+
+logger = logging.getLogger("document_text")
+
+# Bump whenever a change alters the text produced for an unchanged payload.
+EXTRACTOR_VERSION = "2"
+PAGE_BREAK = "\f"
+
 
 class DocumentParseError(Exception):
     pass
 
 
-def extract_text(filename: str, content_type: str | None, payload: bytes) -> str:
-    lower = filename.lower()
+def extract_text(
+    filename: str,
+    content_type: str | None,
+    payload: bytes | memoryview,
+    payload_sha256: str | None = None,
+) -> str:
+    kind = document_kind(filename, content_type)
+    cache = get_text_cache()
+    if cache is None:
+        return _extract_uncached(kind, payload)
+
+    key = text_cache_key(payload_sha256 or sha256(payload).hexdigest(), kind, EXTRACTOR_VERSION)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
 
+    text = _extract_uncached(kind, payload)
+    cache.put(key, text)
+    return text
+
+
+def document_kind(filename: str, content_type: str | None) -> str:
+    lower = filename.lower()
     if lower.endswith(".pdf") or content_type == "application/pdf":
+        return "pdf"
+    if lower.endswith(".eml") or content_type == "message/rfc822":
+        return "email"
+    return "text"
+
+
+def _extract_uncached(kind: str, payload: bytes | memoryview) -> str:
+    if kind == "pdf":
         return _extract_pdf_text(payload)
 
-    if lower.endswith(".eml") or content_type == "message/rfc822":
+    if kind == "email":
         return _extract_email_text(payload)
 
     try:
-        return payload.decode("utf-8", errors="ignore")
+        return str(payload, "utf-8", errors="ignore")
     except Exception as exc:
         raise DocumentParseError("Unable to decode text payload") from exc
 
 
-def _extract_pdf_text(payload: bytes) -> str:
-    text_parts: list[str] = []
+def _extract_pdf_text(payload: bytes | memoryview) -> str:
+    pages = extract_pdf_pages(payload)
 
-    with fitz.open(stream=payload, filetype="pdf") as doc:
-        for page in doc:
-            page_text = page.get_text("text")
-            if page_text:
-                text_parts.append(page_text)
-
-    if not "".join(text_parts).strip():
-        with pdfplumber.open(BytesIO(payload)) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text() or ""
-                text_parts.append(page_text)
-
-    combined = "\n".join(part.strip() for part in text_parts if part and part.strip())
-    if not combined:
+    empty_pages = [index for index, page_text in enumerate(pages) if not page_text.strip()]
+    if empty_pages:
+        for index, page_text in zip(empty_pages, _extract_pages_with_pdfplumber(payload, empty_pages)):
+            pages[index] = page_text
+
+    # Pages are separated by form feeds (empty pages included) so later stages can chunk on
+    # page boundaries and cite page numbers.
+    combined = PAGE_BREAK.join((part or "").strip() for part in pages)
+    if not combined.replace(PAGE_BREAK, "").strip():
         raise DocumentParseError("No extractable text found in PDF")
     return combined
 
 
-def _extract_email_text(payload: bytes) -> str:
-    message = BytesParser(policy=policy.default).parsebytes(payload)
+def extract_pdf_pages(payload: bytes | memoryview) -> list[str]:
+    with fitz.open(stream=payload, filetype="pdf") as doc:
+        page_count = doc.page_count
+        if _pdf_worker_count() < 2 or page_count < settings.pdf_parallel_min_pages:
+            return [page.get_text("text") for page in doc]
+
+    return _run_sharded(_extract_fitz_pages, payload, list(range(page_count)), settings.pdf_min_pages_per_shard)
+
+
+def _extract_pages_with_pdfplumber(payload: bytes | memoryview, page_indices: list[int]) -> list[str]:
+    if _pdf_worker_count() < 2 or len(page_indices) < settings.pdf_fallback_parallel_min_pages:
+        return _extract_plumber_pages(payload, page_indices)
+    return _run_sharded(_extract_plumber_pages, payload, page_indices, 1)
+
+
+def _extract_fitz_pages(payload: bytes | memoryview, page_indices: list[int]) -> list[str]:
+    with fitz.open(stream=payload, filetype="pdf") as doc:
+        return [doc.load_page(index).get_text("text") for index in page_indices]
+
+
+def _extract_plumber_pages(payload: bytes | memoryview, page_indices: list[int]) -> list[str]:
+    # pdfplumber only lays out the pages it is asked for, so scanned pages are the only ones paying for it.
+    with pdfplumber.open(BytesIO(payload), pages=[index + 1 for index in page_indices]) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
+
+
+def _run_sharded(
+    extractor: Callable[[bytes | memoryview, list[int]], list[str]],
+    payload: bytes | memoryview,
+    page_indices: list[int],
+    min_shard_size: int,
+) -> list[str]:
+    executor = _get_pdf_executor()
+    if executor is None:
+        return extractor(payload, page_indices)
+
+    source = bytes(payload)
+    try:
+        futures = [executor.submit(extractor, source, shard) for shard in _shards(page_indices, min_shard_size)]
+        pages: list[str] = []
+        for future in futures:
+            pages.extend(future.result())
+        return pages
+    except (AssertionError, BrokenProcessPool, OSError):
+        # Daemonic workers (e.g. Celery prefork children) cannot own a process pool.
+        logger.warning("pdf_process_pool_unavailable falling back to serial extraction", exc_info=True)
+        _disable_pdf_executor()
+        return extractor(payload, page_indices)
+
+
+def _shards(page_indices: list[int], min_shard_size: int) -> list[list[int]]:
+    shard_size = max(min_shard_size, math.ceil(len(page_indices) / _pdf_worker_count()))
+    return [page_indices[start : start + shard_size] for start in range(0, len(page_indices), shard_size)]
+
+
+def _pdf_worker_count() -> int:
+    return settings.pdf_extract_workers or os.cpu_count() or 1
+
+
+_pdf_executor: Executor | None = None
+_pdf_executor_failed = False
+
+
+def _get_pdf_executor() -> Executor | None:
+    global _pdf_executor
+    if _pdf_executor is None and not _pdf_executor_failed:
+        _pdf_executor = ProcessPoolExecutor(
+            max_workers=_pdf_worker_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pdf_executor
+
+
+def _disable_pdf_executor() -> None:
+    global _pdf_executor, _pdf_executor_failed
+    if _pdf_executor is not None:
+        _pdf_executor.shutdown(wait=False, cancel_futures=True)
+    _pdf_executor = None
+    _pdf_executor_failed = True
+
+
+def _extract_email_text(payload: bytes | memoryview) -> str:
+    message = BytesParser(policy=policy.default).parsebytes(bytes(payload))
 
     subject = message.get("subject", "")
     sender = message.get("from", "")
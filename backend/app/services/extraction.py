@@ -1,12 +1,24 @@
 from __future__ import annotations
 
 import json
-import re
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from typing import Any
 
-from openai import OpenAI
-
+from app.core import metrics
 from app.core.config import settings
+from app.services.chunking import TextChunk, split_text
+from app.services.circuit_breaker import get_llm_breaker
+from app.services.keywords import KeywordMatch, KeywordMatcher
+from app.services.llm_cache import get_cached_llm_response, llm_cache_key, store_llm_response
+from app.services.llm_gateway import get_llm_gateway
+from app.services.pipeline_executor import ExecutorSaturatedError, get_speculative_executor
+from app.services.pruning import PruneResult, TextPruner, build_cue_vocabulary
+from app.services.rules import RULE_ENGINE
+
+logger = logging.getLogger("extraction")
 
 LOB_KEYWORDS = {
     "GL": ["general liability", "cgl", "premises liability"],
@@ -14,134 +26,341 @@ LOB_KEYWORDS = {
     "AUTO": ["commercial auto", "fleet", "driver schedule", "auto liability"],
 }
 
+LOB_MATCHER = KeywordMatcher(LOB_KEYWORDS)
+
+LLM_PROMPT_TEMPLATE = (
+    "You extract underwriting submission fields. Return strict JSON with keys: "
+    "insured_name (string|null), revenue (number|null), payroll (number|null), lines_of_business (array of GL/WC/AUTO), "
+    "lob_fields (object keyed by lob with any extracted values), "
+    "field_confidence (object mapping insured_name, revenue and payroll to a 0-1 confidence)."
+    " The text may be one part of a longer document; use null for fields this part does not state."
+    " Focus on these LOBs and fields: {lob_fields}"
+)
+
+LLM_FIELD_DESCRIPTIONS: dict[str, str] = {
+    "insured_name": "insured_name (string|null)",
+    "revenue": "revenue (number|null)",
+    "payroll": "payroll (number|null)",
+    "lines_of_business": "lines_of_business (array of GL/WC/AUTO)",
+}
+
+# Narrow prompt for the tiered mode, which only asks for the fields the rules could not settle.
+LLM_FIELDS_PROMPT_TEMPLATE = (
+    "You extract underwriting submission fields. Return strict JSON with only these keys: {fields}, "
+    "field_confidence (object mapping {field_names} to a 0-1 confidence)."
+    " The text may be one part of a longer document; use null for fields this part does not state."
+)
+
+# Calibrated ceiling per field for LLM answers; the model's own field_confidence can only lower it.
+LLM_FIELD_CONFIDENCE: dict[str, float] = {"insured_name": 0.9, "revenue": 0.86, "payroll": 0.86}
+
 LOB_SCHEMAS: dict[str, list[str]] = {
     "GL": ["insured_name", "revenue", "locations", "coverage_requested"],
     "WC": ["insured_name", "payroll", "locations", "class_codes"],
     "AUTO": ["insured_name", "locations", "vehicle_count", "driver_schedule"],
 }
 
+TEXT_PRUNER = TextPruner(build_cue_vocabulary(LOB_KEYWORDS, LOB_SCHEMAS))
+
 
 def extract_risk_facts(raw_text: str, filename: str) -> dict[str, Any]:
     inferred_lobs = infer_lobs(raw_text)
-    if settings.openai_api_key:
-        llm_result = _extract_with_llm(raw_text=raw_text, filename=filename, inferred_lobs=inferred_lobs)
-        if llm_result:
-            return llm_result
+    llm_result = _extract_preferred(raw_text=raw_text, filename=filename, inferred_lobs=inferred_lobs)
+    if llm_result:
+        return llm_result
+
+    return _extract_with_rules(raw_text=raw_text, filename=filename, inferred_lobs=inferred_lobs)
 
-    return _extract_with_rules(raw_text=raw_text, filename=filename)
+
+# Rules and the LLM path race under a deadline. If the LLM misses it, the rules result is
+# returned marked as degraded together with the still-running future, so callers can apply
+# the late result once it lands.
+def extract_risk_facts_speculative(
+    raw_text: str, filename: str, deadline_seconds: float
+) -> tuple[dict[str, Any], Future[dict[str, Any] | None] | None]:
+    if not settings.openai_api_key or deadline_seconds <= 0:
+        return extract_risk_facts(raw_text=raw_text, filename=filename), None
+
+    started = time.monotonic()
+    inferred_lobs = infer_lobs(raw_text)
+    try:
+        future = get_speculative_executor().submit(_extract_preferred, raw_text, filename, inferred_lobs)
+    except ExecutorSaturatedError:
+        rules_result = _extract_with_rules(raw_text=raw_text, filename=filename, inferred_lobs=inferred_lobs)
+        return _mark_degraded(rules_result, "llm_saturated", deadline_seconds), None
+
+    rules_result = _extract_with_rules(raw_text=raw_text, filename=filename, inferred_lobs=inferred_lobs)
+    try:
+        llm_result = future.result(timeout=max(0.0, deadline_seconds - (time.monotonic() - started)))
+    except FuturesTimeoutError:
+        metrics.increment("llm_deadline_missed")
+        return _mark_degraded(rules_result, "llm_deadline", deadline_seconds), future
+    return llm_result or rules_result, None
+
+
+def _mark_degraded(result: dict[str, Any], reason: str, deadline_seconds: float) -> dict[str, Any]:
+    result["debug"].update(degraded=True, degraded_reason=reason, llm_deadline_seconds=deadline_seconds)
+    return result
+
+
+def _extract_preferred(raw_text: str, filename: str, inferred_lobs: list[str]) -> dict[str, Any] | None:
+    if not settings.openai_api_key:
+        return None
+    breaker = get_llm_breaker() if settings.llm_breaker_enabled else None
+    if breaker is not None and not breaker.allow():
+        # The breaker is open: skip the LLM entirely instead of waiting out its failures.
+        return None
+    try:
+        if settings.llm_mode == "tiered":
+            return _extract_tiered(raw_text=raw_text, filename=filename, inferred_lobs=inferred_lobs)
+        return _extract_with_llm(raw_text=raw_text, filename=filename, inferred_lobs=inferred_lobs)
+    finally:
+        if breaker is not None:
+            breaker.release_probe()
 
 
 def infer_lobs(raw_text: str) -> list[str]:
-    lowered = raw_text.lower()
-    found: list[str] = []
-    for lob, terms in LOB_KEYWORDS.items():
-        if any(term in lowered for term in terms):
-            found.append(lob)
-    return sorted(set(found))
-
-
-def _extract_with_rules(raw_text: str, filename: str) -> dict[str, Any]:
-    lines = [line.strip() for line in raw_text.splitlines() if line.strip()]
-    text = " ".join(lines)
-
-    insured_match = next(
-        (
-            re.search(r"^(?:insured|named insured)\s*[:\-]\s*(.+)$", line, re.IGNORECASE)
-            for line in lines
-            if re.search(r"^(?:insured|named insured)\s*[:\-]\s*", line, re.IGNORECASE)
-        ),
-        None,
-    )
-    revenue_match = re.search(r"(?:revenue|annual revenue)\s*[:\-]?\s*\$?([0-9,]+(?:\.[0-9]{1,2})?)", text, re.IGNORECASE)
-    payroll_match = re.search(r"(?:payroll|annual payroll)\s*[:\-]?\s*\$?([0-9,]+(?:\.[0-9]{1,2})?)", text, re.IGNORECASE)
-
-    lobs = infer_lobs(text)
-
-    def money(match_value: str | None) -> float | None:
-        if not match_value:
-            return None
-        return float(match_value.replace(",", ""))
-
-    insured_name = insured_match.group(1).strip() if insured_match and insured_match.group(1) else None
-    revenue = money(revenue_match.group(1) if revenue_match else None)
-    payroll = money(payroll_match.group(1) if payroll_match else None)
+    return LOB_MATCHER.matched_labels(raw_text)
+
+
+def find_lob_matches(raw_text: str) -> dict[str, list[KeywordMatch]]:
+    return LOB_MATCHER.scan(raw_text)
+
+
+def _extract_with_rules(raw_text: str, filename: str, inferred_lobs: list[str] | None = None) -> dict[str, Any]:
+    text = "\n".join(line.strip() for line in raw_text.splitlines() if line.strip())
+    matches = RULE_ENGINE.first_matches(text)
+    lobs = inferred_lobs if inferred_lobs is not None else infer_lobs(raw_text)
+
+    fields: dict[str, Any] = {}
+    confidence: dict[str, float] = {}
+    citations: dict[str, list[dict[str, Any]]] = {}
+    for rule in RULE_ENGINE.rules:
+        match = matches.get(rule.field)
+        fields[rule.field] = match.value if match else None
+        confidence[rule.field] = match.confidence if match else 0.0
+        citations[rule.field] = [{"source_document": filename, "page": None, "snippet": match.snippet if match else None}]
+
+    fields["lines_of_business"] = lobs
+    confidence["lines_of_business"] = 0.7 if lobs else 0.0
+    citations["lines_of_business"] = [{"source_document": filename, "page": None, "snippet": ", ".join(lobs)}]
 
     return {
-        "fields": {
-            "insured_name": insured_name,
-            "revenue": revenue,
-            "payroll": payroll,
-            "lines_of_business": lobs,
-        },
-        "confidence": {
-            "insured_name": 0.82 if insured_name else 0.0,
-            "revenue": 0.78 if revenue is not None else 0.0,
-            "payroll": 0.78 if payroll is not None else 0.0,
-            "lines_of_business": 0.7 if lobs else 0.0,
-        },
-        "citations": {
-            "insured_name": [{"source_document": filename, "page": None, "snippet": insured_name}],
-            "revenue": [{"source_document": filename, "page": None, "snippet": revenue_match.group(0) if revenue_match else None}],
-            "payroll": [{"source_document": filename, "page": None, "snippet": payroll_match.group(0) if payroll_match else None}],
-            "lines_of_business": [{"source_document": filename, "page": None, "snippet": ", ".join(lobs)}],
+        "fields": fields,
+        "confidence": confidence,
+        "citations": citations,
+        "debug": {
+            "mode": "rules",
+            "lobs": lobs,
+            "rule_matches": [
+                {"field": match.field, "start": match.start, "end": match.end} for match in matches.values()
+            ],
         },
-        "debug": {"mode": "rules", "lobs": lobs},
     }
 
 
-def _extract_with_llm(raw_text: str, filename: str, inferred_lobs: list[str]) -> dict[str, Any] | None:
-    try:
-        client = OpenAI(api_key=settings.openai_api_key)
-        if not inferred_lobs:
-            inferred_lobs = ["GL"]
+def _extract_tiered(raw_text: str, filename: str, inferred_lobs: list[str]) -> dict[str, Any]:
+    rules_result = _extract_with_rules(raw_text=raw_text, filename=filename, inferred_lobs=inferred_lobs)
+    gaps = _fields_needing_llm(rules_result, inferred_lobs)
+    rules_result["debug"].update(mode="tiered", llm_fields=gaps)
+    if not gaps:
+        metrics.increment("llm_calls_avoided", len(split_text(raw_text, settings.llm_chunk_chars, settings.llm_max_chunks)))
+        return rules_result
+
+    llm_result = _extract_with_llm(raw_text=raw_text, filename=filename, inferred_lobs=inferred_lobs, fields=gaps)
+    if llm_result is None:
+        return rules_result
+
+    rules_result["debug"]["llm_chunks"] = llm_result["debug"]["chunks"]
+    for field in gaps:
+        if llm_result["confidence"].get(field, 0.0) > rules_result["confidence"].get(field, 0.0):
+            rules_result["fields"][field] = llm_result["fields"][field]
+            rules_result["confidence"][field] = llm_result["confidence"][field]
+            rules_result["citations"][field] = llm_result["citations"][field]
+    return rules_result
+
+
+# Core fields the rules must cover confidently before the LLM is skipped; revenue and payroll
+# only count when an inferred LOB's schema asks for them.
+def _fields_needing_llm(rules_result: dict[str, Any], inferred_lobs: list[str]) -> list[str]:
+    required = ["insured_name", "lines_of_business"]
+    for field in ("revenue", "payroll"):
+        if any(field in LOB_SCHEMAS.get(lob, []) for lob in inferred_lobs or ["GL"]):
+            required.append(field)
+    confidence = rules_result["confidence"]
+    return [field for field in required if confidence.get(field, 0.0) < settings.llm_confidence_threshold]
 
+
+def _extract_with_llm(
+    raw_text: str, filename: str, inferred_lobs: list[str], fields: list[str] | None = None
+) -> dict[str, Any] | None:
+    if not inferred_lobs:
+        inferred_lobs = ["GL"]
+
+    pruning = None
+    if settings.llm_prune_enabled:
+        pruning = TEXT_PRUNER.prune(raw_text, settings.llm_prune_context_lines, settings.llm_prune_token_budget)
+        raw_text = pruning.text
+
+    chunks = split_text(raw_text, settings.llm_chunk_chars, settings.llm_max_chunks)
+    if not chunks:
+        return None
+
+    if fields is None:
+        template = LLM_PROMPT_TEMPLATE
         lob_fields = {lob: LOB_SCHEMAS.get(lob, []) for lob in inferred_lobs}
-        prompt = (
-            "You extract underwriting submission fields. Return strict JSON with keys: "
-            "insured_name (string|null), revenue (number|null), payroll (number|null), lines_of_business (array of GL/WC/AUTO), "
-            "lob_fields (object keyed by lob with any extracted values)."
-            f" Focus on these LOBs and fields: {json.dumps(lob_fields)}"
+        prompt = template.format(lob_fields=json.dumps(lob_fields))
+    else:
+        template = prompt = LLM_FIELDS_PROMPT_TEMPLATE.format(
+            fields=", ".join(LLM_FIELD_DESCRIPTIONS[field] for field in fields),
+            field_names=", ".join(fields),
         )
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            temperature=0,
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": raw_text[:16000]},
-            ],
-        )
-        content = response.choices[0].message.content or "{}"
-        data = json.loads(content)
-
-        lines = data.get("lines_of_business") or inferred_lobs
-        normalized_lines = [line for line in lines if line in {"GL", "WC", "AUTO"}]
-
-        insured_name = data.get("insured_name")
-        revenue = data.get("revenue")
-        payroll = data.get("payroll")
-
-        return {
-            "fields": {
-                "insured_name": insured_name,
-                "revenue": float(revenue) if revenue is not None else None,
-                "payroll": float(payroll) if payroll is not None else None,
-                "lines_of_business": sorted(set(normalized_lines or inferred_lobs)),
-                "lob_fields": data.get("lob_fields") or {},
-            },
-            "confidence": {
-                "insured_name": 0.9 if insured_name else 0.0,
-                "revenue": 0.86 if revenue is not None else 0.0,
-                "payroll": 0.86 if payroll is not None else 0.0,
-                "lines_of_business": 0.84 if normalized_lines else 0.0,
-            },
-            "citations": {
-                "insured_name": [{"source_document": filename, "page": None, "snippet": None}],
-                "revenue": [{"source_document": filename, "page": None, "snippet": None}],
-                "payroll": [{"source_document": filename, "page": None, "snippet": None}],
-                "lines_of_business": [{"source_document": filename, "page": None, "snippet": None}],
-            },
-            "debug": {"mode": "llm", "lobs": inferred_lobs, "lob_fields": data.get("lob_fields") or {}},
-        }
+    workers = min(len(chunks), settings.llm_max_concurrency)
+    if workers < 2:
+        results = [_extract_chunk_with_llm(chunk, template, prompt, inferred_lobs) for chunk in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-chunk") as pool:
+            results = list(
+                pool.map(lambda chunk: _extract_chunk_with_llm(chunk, template, prompt, inferred_lobs), chunks)
+            )
+
+    candidates = [(chunk, data) for chunk, data in zip(chunks, results) if data is not None]
+    if not candidates:
+        return None
+    try:
+        result = reduce_llm_chunks(candidates, filename=filename, inferred_lobs=inferred_lobs, chunk_count=len(chunks))
+    except Exception:
+        # Chunk answers are model output; anything the reducer cannot read falls back to the rules.
+        logger.warning("LLM chunk answers could not be merged", exc_info=True)
+        return None
+    if pruning is not None:
+        result["debug"]["pruning"] = _pruning_report(pruning)
+    return result
+
+
+def _pruning_report(pruning: PruneResult) -> dict[str, Any]:
+    # Latency saved is an estimate from the configured prefill cost; the offline benchmark measures it.
+    saved_ms = round(pruning.removed_tokens / 1000 * settings.llm_prune_ms_per_1k_tokens, 1)
+    metrics.increment("llm_pruned_tokens", pruning.removed_tokens)
+    metrics.observe("llm_prune_estimated_saved_ms", saved_ms)
+    return {
+        "original_tokens": pruning.original_tokens,
+        "kept_tokens": pruning.kept_tokens,
+        "removed_tokens": pruning.removed_tokens,
+        "windows": pruning.windows,
+        "estimated_latency_saved_ms": saved_ms,
+    }
+
+
+def _extract_chunk_with_llm(
+    chunk: TextChunk, template: str, prompt: str, inferred_lobs: list[str]
+) -> dict[str, Any] | None:
+    try:
+        cache_key = llm_cache_key(chunk.text, template, settings.openai_model, inferred_lobs)
+        content = get_cached_llm_response(cache_key)
+        if content is None:
+            content = get_llm_gateway().complete_json(prompt, chunk.text, model=settings.openai_model)
+            data = json.loads(content)
+            store_llm_response(cache_key, settings.openai_model, content)
+        else:
+            data = json.loads(content)
+        return data if isinstance(data, dict) else None
     except Exception:
+        logger.warning("LLM extraction failed for chunk %s", chunk.index, exc_info=True)
+        return None
+
+
+# Deterministic merge of per-chunk answers: each scalar field takes the candidate with the
+# highest reported confidence (earliest chunk wins ties), capped at the calibrated LLM
+# confidence for that field; LOBs are unioned and lob_fields keep the first non-empty value.
+def reduce_llm_chunks(
+    candidates: list[tuple[TextChunk, dict[str, Any]]],
+    filename: str,
+    inferred_lobs: list[str],
+    chunk_count: int | None = None,
+) -> dict[str, Any]:
+    fields: dict[str, Any] = {}
+    confidence: dict[str, float] = {}
+    citations: dict[str, list[dict[str, Any]]] = {}
+    field_sources: dict[str, int] = {}
+    for field, base_confidence in LLM_FIELD_CONFIDENCE.items():
+        best: tuple[float, Any, TextChunk] | None = None
+        for chunk, data in candidates:
+            value = _llm_field_value(field, data.get(field))
+            if value is None:
+                continue
+            score = _reported_confidence(data, field, base_confidence)
+            if best is None or score > best[0]:
+                best = (score, value, chunk)
+        fields[field] = best[1] if best else None
+        confidence[field] = min(best[0], base_confidence) if best else 0.0
+        citations[field] = [
+            {
+                "source_document": filename,
+                "page": best[2].first_page if best else None,
+                "page_end": best[2].last_page if best else None,
+                "snippet": None,
+            }
+        ]
+        if best:
+            field_sources[field] = best[2].index
+
+    normalized_lines: set[str] = set()
+    merged_lob_fields: dict[str, dict[str, Any]] = {}
+    for _, data in candidates:
+        normalized_lines.update(_llm_lines_of_business(data.get("lines_of_business")))
+        chunk_lob_fields = data.get("lob_fields")
+        if not isinstance(chunk_lob_fields, dict):
+            continue
+        for lob, values in chunk_lob_fields.items():
+            if not isinstance(values, dict):
+                continue
+            merged = merged_lob_fields.setdefault(lob, {})
+            for key, value in values.items():
+                if value not in (None, "", [], {}) and key not in merged:
+                    merged[key] = value
+
+    fields["lines_of_business"] = sorted(normalized_lines or set(inferred_lobs))
+    fields["lob_fields"] = merged_lob_fields
+    confidence["lines_of_business"] = 0.84 if normalized_lines else 0.0
+    citations["lines_of_business"] = [{"source_document": filename, "page": None, "snippet": None}]
+
+    chunk_count = len(candidates) if chunk_count is None else chunk_count
+    return {
+        "fields": fields,
+        "confidence": confidence,
+        "citations": citations,
+        "debug": {
+            "mode": "llm",
+            "lobs": inferred_lobs,
+            "lob_fields": merged_lob_fields,
+            "chunks": chunk_count,
+            "failed_chunks": chunk_count - len(candidates),
+            "field_sources": field_sources,
+        },
+    }
+
+
+def _llm_field_value(field: str, value: Any) -> Any:
+    if value is None or isinstance(value, bool):
+        return None
+    if field == "insured_name":
+        return (value.strip() or None) if isinstance(value, str) else None
+    try:
+        return float(str(value).replace(",", "").lstrip("$"))
+    except ValueError:
         return None
+
+
+def _llm_lines_of_business(value: Any) -> set[str]:
+    if not isinstance(value, list):
+        return set()
+    return {line for line in value if isinstance(line, str) and line in {"GL", "WC", "AUTO"}}
+
+
+def _reported_confidence(data: dict[str, Any], field: str, default: float) -> float:
+    reported = data.get("field_confidence")
+    value = reported.get(field) if isinstance(reported, dict) else None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return default
+    return max(0.0, min(1.0, float(value)))
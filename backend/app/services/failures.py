@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import httpx
+import openai
+import redis
+from botocore.exceptions import ConnectionError as BotoConnectionError
+from botocore.exceptions import HTTPClientError
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+PERMANENT = "permanent"
+TRANSIENT = "transient"
+
+# Failures worth retrying: the broker, database, object store or LLM endpoint was unreachable,
+# timed out or shed load. Celery tasks list these in autoretry_for; anything else (a corrupt
+# document, a validation error, a bug) fails the same way on every attempt and is quarantined.
+TRANSIENT_ERRORS: tuple[type[BaseException], ...] = (
+    ConnectionError,
+    TimeoutError,
+    OperationalError,
+    InterfaceError,
+    redis.exceptions.ConnectionError,
+    redis.exceptions.TimeoutError,
+    httpx.TransportError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    BotoConnectionError,
+    HTTPClientError,
+)
+
+
+def classify_failure(exc: BaseException) -> str:
+    return TRANSIENT if isinstance(exc, TRANSIENT_ERRORS) else PERMANENT
@@ -7,6 +7,7 @@ from fastapi import UploadFile
 
 from app.schemas.ingestion import IngestionResponse
 from app.services.parser import parse_uploaded_document
+from app.services.uploads import spool_upload
 
 
 ALLOWED_CONTENT_TYPES = {
@@ -20,15 +21,15 @@ async def ingest_file(file: UploadFile) -> IngestionResponse:
     if file.content_type not in ALLOWED_CONTENT_TYPES:
         raise ValueError(f"Unsupported content type: {file.content_type}")
 
-    payload = await file.read()
-    parsed = parse_uploaded_document(filename=file.filename or "unknown", content=payload)
+    with await spool_upload(file) as upload:
+        parsed = parse_uploaded_document(filename=upload.filename, content=upload.view(), digest=upload.sha256)
 
     submission_id = f"sub_{uuid4().hex[:12]}"
     return IngestionResponse(
         submission_id=submission_id,
         filename=file.filename or "unknown",
         content_type=file.content_type or "application/octet-stream",
-        bytes_received=len(payload),
+        bytes_received=upload.size,
         processed_at=datetime.now(timezone.utc),
         structured_fields=parsed["structured_fields"],
         field_confidence=parsed["field_confidence"],
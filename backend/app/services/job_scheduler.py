@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from typing import Any, Callable, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import metric_key
+from app.core.redis import get_redis
+from app.services.shared_metrics import increment_shared
+
+logger = logging.getLogger("job_scheduler")
+
+T = TypeVar("T")
+
+PRIORITY_LANE = "priority"
+STANDARD_LANE = "standard"
+LANES = (PRIORITY_LANE, STANDARD_LANE)
+
+
+# Async jobs wait here, one FIFO per tenant and lane, instead of in the broker. Dispatch is
+# deficit round robin across tenants (a tenant's weight is its jobs per round), bounded by a
+# global and a per-tenant in-flight cap; the priority lane is drained before the standard one.
+# Scheduling state is a small JSON document and each operation is one read-modify-write, like
+# the circuit breaker's stores: a thread lock in memory, a WATCH/MULTI transaction in Redis.
+class _MemoryPendingQueues:
+    def __init__(self) -> None:
+        self._queues: dict[tuple[str, str], deque[dict]] = defaultdict(deque)
+
+    def push(self, lane: str, tenant: str, job: dict, front: bool = False) -> None:
+        if front:
+            self._queues[(lane, tenant)].appendleft(job)
+        else:
+            self._queues[(lane, tenant)].append(job)
+
+    def pop(self, lane: str, tenant: str) -> dict | None:
+        queue = self._queues.get((lane, tenant))
+        return queue.popleft() if queue else None
+
+
+class MemoryJobSchedulerStore:
+    def __init__(self) -> None:
+        self._state: dict[str, Any] = {}
+        self._queues = _MemoryPendingQueues()
+        self._lock = threading.Lock()
+
+    def transact(self, fn: Callable[[dict[str, Any], _MemoryPendingQueues], T]) -> T:
+        with self._lock:
+            return fn(self._state, self._queues)
+
+    def read(self) -> dict[str, Any]:
+        with self._lock:
+            return json.loads(json.dumps(self._state))
+
+
+class _RedisPendingQueues:
+    # Reads run immediately on the watched pipeline; writes are buffered until MULTI. Every
+    # operation also rewrites the watched state key, so concurrent ones retry instead of racing.
+    def __init__(self, pipe: Any) -> None:
+        self._pipe = pipe
+        self._popped: dict[str, int] = defaultdict(int)
+        self._pushed: dict[str, list[str]] = defaultdict(list)
+        self._pushed_front: dict[str, list[str]] = defaultdict(list)
+
+    def push(self, lane: str, tenant: str, job: dict, front: bool = False) -> None:
+        (self._pushed_front if front else self._pushed)[_queue_key(lane, tenant)].append(json.dumps(job))
+
+    def pop(self, lane: str, tenant: str) -> dict | None:
+        key = _queue_key(lane, tenant)
+        if self._pushed_front[key]:
+            return json.loads(self._pushed_front[key].pop())
+        raw = self._pipe.lindex(key, self._popped[key])
+        if raw is not None:
+            self._popped[key] += 1
+            return json.loads(raw)
+        if self._pushed[key]:
+            return json.loads(self._pushed[key].pop(0))
+        return None
+
+    def commit(self, pipe: Any) -> None:
+        for key, count in self._popped.items():
+            pipe.ltrim(key, count, -1)
+        for key, items in self._pushed_front.items():
+            if items:
+                pipe.lpush(key, *items)
+        for key, items in self._pushed.items():
+            if items:
+                pipe.rpush(key, *items)
+
+
+class RedisJobSchedulerStore:
+    state_key = "ghostwriter:scheduler:state"
+
+    def transact(self, fn: Callable[[dict[str, Any], _RedisPendingQueues], T]) -> T:
+        outcome: list[T] = []
+
+        def apply(pipe: Any) -> None:
+            raw = pipe.get(self.state_key)
+            state = json.loads(raw) if raw else {}
+            queues = _RedisPendingQueues(pipe)
+            outcome[:] = [fn(state, queues)]
+            pipe.multi()
+            pipe.set(self.state_key, json.dumps(state))
+            queues.commit(pipe)
+
+        get_redis().transaction(apply, self.state_key)
+        return outcome[0]
+
+    def read(self) -> dict[str, Any]:
+        raw = get_redis().get(self.state_key)
+        return json.loads(raw) if raw else {}
+
+
+def _queue_key(lane: str, tenant: str) -> str:
+    return f"ghostwriter:scheduler:{lane}:{tenant}"
+
+
+class JobScheduler:
+    def __init__(
+        self,
+        store: MemoryJobSchedulerStore | RedisJobSchedulerStore,
+        max_in_flight: int,
+        tenant_max_in_flight: int,
+        tenant_weights: dict[str, int],
+        in_flight_timeout_seconds: float,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.store = store
+        self.max_in_flight = max_in_flight
+        self.tenant_max_in_flight = tenant_max_in_flight
+        self.tenant_weights = tenant_weights
+        self.in_flight_timeout_seconds = in_flight_timeout_seconds
+        self._clock = clock
+
+    # submit and release return the jobs that may be sent to Celery now.
+    def submit(self, job: dict) -> list[dict]:
+        return self._transact_dispatch(lambda state, queues: self._enqueue(state, queues, job, front=False))
+
+    def release(self, job_id: str) -> list[dict]:
+        return self._transact_dispatch(lambda state, queues: state.setdefault("in_flight", {}).pop(job_id, None))
+
+    def dispatch(self) -> list[dict]:
+        # Periodic sweep: reclaims expired slots and sends what they free even when no job is
+        # submitted or finishes, e.g. after a worker crash on an otherwise idle tenant.
+        return self._transact_dispatch(lambda state, queues: None)
+
+    def gauges(self) -> dict[str, float]:
+        # Read from the shared state when metrics are served, so every process reports the same.
+        state = self.store.read()
+        gauges = {"job_scheduler_in_flight": float(len(state.get("in_flight", {})))}
+        for name, lane in state.get("lanes", {}).items():
+            for tenant, pending in lane["pending"].items():
+                gauges[metric_key("job_scheduler_pending", {"lane": name, "tenant": tenant})] = float(pending)
+        return gauges
+
+    def _transact_dispatch(self, prepare: Callable[[dict[str, Any], Any], object]) -> list[dict]:
+        expired: list[str] = []
+
+        def update(state: dict[str, Any], queues: Any) -> list[dict]:
+            # A Redis transaction re-runs this on conflict; only the attempt that commits counts.
+            expired.clear()
+            prepare(state, queues)
+            return self._dispatch(state, queues, expired)
+
+        dispatched = self.store.transact(update)
+        for tenant in expired:
+            increment_shared("job_scheduler_expired_slots", tenant=tenant)
+        return dispatched
+
+    def requeue(self, jobs: list[dict]) -> None:
+        # Jobs that could not be sent go back to the head of their queue with their slot freed.
+        def update(state: dict[str, Any], queues: Any) -> None:
+            for job in reversed(jobs):
+                state.setdefault("in_flight", {}).pop(job["job_id"], None)
+                self._enqueue(state, queues, job, front=True)
+
+        self.store.transact(update)
+
+    def _enqueue(self, state: dict[str, Any], queues: Any, job: dict, front: bool) -> None:
+        lane = _lane_state(state, job["lane"])
+        tenant = job["tenant"]
+        queues.push(job["lane"], tenant, job, front=front)
+        lane["pending"][tenant] = lane["pending"].get(tenant, 0) + 1
+        if tenant not in lane["ring"]:
+            lane["ring"].append(tenant)
+
+    def _dispatch(self, state: dict[str, Any], queues: Any, expired: list[str]) -> list[dict]:
+        now = self._clock()
+        in_flight: dict[str, dict] = state.setdefault("in_flight", {})
+        for job_id, entry in list(in_flight.items()):
+            # A worker that died without reporting back must not hold a tenant's slot forever.
+            if now - entry["at"] > self.in_flight_timeout_seconds:
+                del in_flight[job_id]
+                expired.append(entry["tenant"])
+        counts = Counter(entry["tenant"] for entry in in_flight.values())
+        dispatched: list[dict] = []
+        for name in LANES:
+            if name in state.get("lanes", {}):
+                self._drain_lane(name, state["lanes"][name], queues, in_flight, counts, dispatched, now)
+        return dispatched
+
+    def _drain_lane(
+        self,
+        name: str,
+        lane: dict[str, Any],
+        queues: Any,
+        in_flight: dict[str, dict],
+        counts: Counter,
+        dispatched: list[dict],
+        now: float,
+    ) -> None:
+        ring: list[str] = lane["ring"]
+        skipped = 0
+        while ring and len(in_flight) < self.max_in_flight and skipped < len(ring):
+            tenant = ring[0]
+            if counts[tenant] >= self.tenant_max_in_flight:
+                ring.append(ring.pop(0))
+                lane["served"] = None
+                skipped += 1
+                continue
+            if lane["served"] != tenant:
+                # "served" marks that the head tenant already got this round's quantum, so a
+                # dispatch that ran out of global slots mid-quantum resumes without a second one.
+                lane["deficit"][tenant] = lane["deficit"].get(tenant, 0) + self.tenant_weights.get(tenant, 1)
+                lane["served"] = tenant
+            while (
+                lane["deficit"][tenant] >= 1
+                and lane["pending"].get(tenant, 0) > 0
+                and counts[tenant] < self.tenant_max_in_flight
+                and len(in_flight) < self.max_in_flight
+            ):
+                job = queues.pop(name, tenant)
+                if job is None:
+                    lane["pending"][tenant] = 0
+                    break
+                lane["pending"][tenant] -= 1
+                lane["deficit"][tenant] -= 1
+                in_flight[job["job_id"]] = {"tenant": tenant, "at": now}
+                counts[tenant] += 1
+                dispatched.append(job)
+            skipped = 0
+            if lane["pending"].get(tenant, 0) <= 0:
+                ring.pop(0)
+                lane["pending"].pop(tenant, None)
+                lane["deficit"].pop(tenant, None)
+                lane["served"] = None
+            elif lane["deficit"][tenant] < 1 or counts[tenant] >= self.tenant_max_in_flight:
+                ring.append(ring.pop(0))
+                lane["served"] = None
+            else:
+                break
+
+
+def _lane_state(state: dict[str, Any], name: str) -> dict[str, Any]:
+    return state.setdefault("lanes", {}).setdefault(name, {"ring": [], "deficit": {}, "pending": {}, "served": None})
+
+
+_scheduler: JobScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_job_scheduler() -> JobScheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                if settings.job_scheduler_backend == "redis":
+                    store: MemoryJobSchedulerStore | RedisJobSchedulerStore = RedisJobSchedulerStore()
+                else:
+                    store = MemoryJobSchedulerStore()
+                _scheduler = JobScheduler(
+                    store=store,
+                    max_in_flight=settings.job_scheduler_max_in_flight,
+                    tenant_max_in_flight=settings.job_scheduler_tenant_max_in_flight,
+                    tenant_weights=settings.job_scheduler_tenant_weights,
+                    in_flight_timeout_seconds=settings.job_scheduler_in_flight_timeout_seconds,
+                )
+    return _scheduler
+
+
+def reset_job_scheduler() -> None:
+    global _scheduler
+    _scheduler = None
+
+
+def job_lane(priority: bool | None, payload_bytes: int) -> str:
+    # Priority is opt-in. Most submission PDFs are a few hundred KB, so sizing the lane by upload
+    # would put nearly everything in it; only a deployment that sets a size threshold does so.
+    if priority is None:
+        threshold = settings.job_scheduler_priority_max_bytes
+        priority = threshold > 0 and payload_bytes <= threshold
+    return PRIORITY_LANE if priority else STANDARD_LANE
+
+
+def submit_job(job: dict) -> list[dict]:
+    try:
+        return get_job_scheduler().submit(job)
+    except Exception:
+        # Without the scheduler a job goes straight to the broker, as before fair queuing.
+        increment_shared("job_scheduler_fallbacks")
+        logger.warning("Job scheduler unavailable; sending job %s directly", job["job_id"], exc_info=True)
+        return [job]
+
+
+def release_job(job_id: str) -> list[dict]:
+    try:
+        return get_job_scheduler().release(job_id)
+    except Exception:
+        # The slot is reclaimed after JOB_SCHEDULER_IN_FLIGHT_TIMEOUT_SECONDS.
+        increment_shared("job_scheduler_release_failures")
+        logger.warning("Job scheduler release failed for job %s", job_id, exc_info=True)
+        return []
+
+
+def dispatch_jobs() -> list[dict]:
+    try:
+        return get_job_scheduler().dispatch()
+    except Exception:
+        increment_shared("job_scheduler_sweep_failures")
+        logger.warning("Job scheduler sweep failed", exc_info=True)
+        return []
+
+
+def scheduler_gauges() -> dict[str, float]:
+    try:
+        return get_job_scheduler().gauges()
+    except Exception:
+        logger.warning("Job scheduler state could not be read for metrics", exc_info=True)
+        return {}
+
+
+def requeue_jobs(jobs: list[dict]) -> None:
+    try:
+        get_job_scheduler().requeue(jobs)
+    except Exception:
+        increment_shared("job_scheduler_requeue_failures")
+        logger.error(
+            "Job scheduler requeue failed; jobs %s stay queued but unscheduled",
+            [job["job_id"] for job in jobs],
+            exc_info=True,
+        )
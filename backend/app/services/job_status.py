@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger("job_status")
+
+TERMINAL_STATUSES = {"succeeded", "failed"}
+
+
+# A compact per-job record (status, stage, attempt, timestamps, result pointer) written by the
+# API and the worker and read by the status endpoint with a single key lookup. Redis keeps
+# one hash per job, so each writer only touches the fields it sets.
+class MemoryJobStatusStore:
+    def __init__(self) -> None:
+        self._records: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, job_id: str, fields: dict[str, Any]) -> None:
+        with self._lock:
+            self._records.setdefault(job_id, {}).update(fields)
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            record = self._records.get(job_id)
+            return dict(record) if record is not None else None
+
+
+class RedisJobStatusStore:
+    def __init__(self, ttl_seconds: int) -> None:
+        self.ttl_seconds = ttl_seconds
+
+    def update(self, job_id: str, fields: dict[str, Any]) -> None:
+        key = f"ghostwriter:job:{job_id}:status"
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.hset(key, mapping={name: json.dumps(value) for name, value in fields.items()})
+        pipe.expire(key, self.ttl_seconds)
+        pipe.execute()
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        raw = get_redis().hgetall(f"ghostwriter:job:{job_id}:status")
+        if not raw:
+            return None
+        return {name.decode("utf-8"): json.loads(value) for name, value in raw.items()}
+
+
+_store: MemoryJobStatusStore | RedisJobStatusStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_job_status_store() -> MemoryJobStatusStore | RedisJobStatusStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if settings.job_status_backend == "redis":
+                    _store = RedisJobStatusStore(ttl_seconds=settings.job_status_ttl_seconds)
+                else:
+                    _store = MemoryJobStatusStore()
+    return _store
+
+
+def reset_job_status_store() -> None:
+    global _store
+    _store = None
+
+
+def update_job_status(job_id: str | None, **fields: Any) -> None:
+    if not job_id:
+        return
+    fields["updated_at"] = datetime.now(timezone.utc).isoformat()
+    try:
+        get_job_status_store().update(job_id, fields)
+    except Exception:
+        # Readers fall back to the result backend and the database when the record is missing.
+        metrics.increment("job_status_write_failures")
+        logger.warning("Job status write failed for job %s", job_id, exc_info=True)
+
+
+def read_job_status(job_id: str) -> dict[str, Any] | None:
+    try:
+        return get_job_status_store().get(job_id)
+    except Exception:
+        metrics.increment("job_status_read_failures")
+        logger.warning("Job status read failed for job %s", job_id, exc_info=True)
+        return None
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Iterator
+
+import ahocorasick
+
+_WHITESPACE = re.compile(r"\s+")
+_NEEDS_COLLAPSE = re.compile(r"\s\s|[^\S ]")
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    label: str
+    term: str
+    start: int
+    end: int
+
+
+# Aho-Corasick automaton over a labelled vocabulary: one pass over the text regardless of
+# how many terms are registered, reporting overlapping matches with their offsets. Text is
+# lowercased and every whitespace run ("\r\n", an indented line break) is collapsed to one
+# space before scanning, so a term can straddle a line break in extracted text; offsets
+# always index the original text (see _fold_case and _collapse_whitespace).
+class KeywordMatcher:
+    def __init__(self, keywords: dict[str, list[str]]) -> None:
+        labels_by_term: dict[str, set[str]] = {}
+        for label, terms in keywords.items():
+            for term in terms:
+                normalized = " ".join(term.lower().split())
+                if normalized:
+                    labels_by_term.setdefault(normalized, set()).add(label)
+
+        self.labels = frozenset(label for labels in labels_by_term.values() for label in labels)
+        self._automaton = ahocorasick.Automaton()
+        for term, labels in labels_by_term.items():
+            self._automaton.add_word(term, (term, tuple(sorted(labels))))
+        if labels_by_term:
+            self._automaton.make_automaton()
+
+    def finditer(self, text: str) -> Iterator[KeywordMatch]:
+        if not self.labels:
+            return
+        prepared, offsets = _collapse_whitespace(_fold_case(text))
+        for end_index, (term, labels) in self._automaton.iter(prepared):
+            start = end_index - len(term) + 1
+            if offsets is not None:
+                start, end_index = offsets[start], offsets[end_index]
+            for label in labels:
+                yield KeywordMatch(label=label, term=term, start=start, end=end_index + 1)
+
+    def scan(self, text: str) -> dict[str, list[KeywordMatch]]:
+        found: dict[str, list[KeywordMatch]] = {}
+        for match in self.finditer(text):
+            found.setdefault(match.label, []).append(match)
+        return found
+
+    def matched_labels(self, text: str) -> list[str]:
+        found: set[str] = set()
+        for match in self.finditer(text):
+            found.add(match.label)
+            if len(found) == len(self.labels):
+                break
+        return sorted(found)
+
+
+def _fold_case(text: str) -> str:
+    # str.lower() can expand a character ("İ" becomes "i̇"), which would shift every offset
+    # after it. Lowercasing never shrinks text, so equal lengths mean the fold is aligned;
+    # otherwise characters that expand are kept as they are.
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(folded if len(folded := char.lower()) == 1 else char for char in text)
+
+
+def _collapse_whitespace(text: str) -> tuple[str, list[int] | None]:
+    # Returns the collapsed text and, when anything changed, the original index of each of
+    # its characters. Text with only single spaces is scanned as is.
+    if not _NEEDS_COLLAPSE.search(text):
+        return text, None
+    pieces: list[str] = []
+    offsets: list[int] = []
+    position = 0
+    for run in _WHITESPACE.finditer(text):
+        pieces.append(text[position : run.start()])
+        offsets.extend(range(position, run.start()))
+        pieces.append(" ")
+        offsets.append(run.start())
+        position = run.end()
+    pieces.append(text[position:])
+    offsets.extend(range(position, len(text)))
+    return "".join(pieces), offsets
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import logging
+from hashlib import sha256
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.repository import get_llm_cache_entry, put_llm_cache_entry
+
+logger = logging.getLogger("llm_cache")
+
+
+def llm_cache_key(input_text: str, prompt_template: str, model: str, lob_focus: list[str]) -> str:
+    normalized_text = " ".join(input_text.split())
+    parts = [
+        sha256(normalized_text.encode("utf-8")).hexdigest(),
+        sha256(prompt_template.encode("utf-8")).hexdigest(),
+        model,
+        ",".join(sorted(set(lob_focus))),
+    ]
+    return sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def get_cached_llm_response(cache_key: str) -> str | None:
+    if not settings.llm_cache_enabled:
+        return None
+    try:
+        with SessionLocal() as db:
+            cached = get_llm_cache_entry(db, cache_key)
+    except SQLAlchemyError:
+        logger.warning("llm_cache_read_failed", exc_info=True)
+        cached = None
+    metrics.increment("llm_cache_hits" if cached is not None else "llm_cache_misses")
+    return cached
+
+
+def store_llm_response(cache_key: str, model: str, response_json: str) -> None:
+    if not settings.llm_cache_enabled:
+        return
+    try:
+        with SessionLocal() as db:
+            put_llm_cache_entry(
+                db,
+                cache_key=cache_key,
+                model=model,
+                response_json=response_json,
+                ttl_seconds=settings.llm_cache_ttl_seconds,
+                max_entries=settings.llm_cache_max_entries,
+            )
+    except SQLAlchemyError:
+        logger.warning("llm_cache_write_failed", exc_info=True)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import weakref
+from typing import Callable
+
+from openai import AsyncOpenAI, OpenAI
+
+from app.core import metrics
+from app.core.config import settings
+from app.services.circuit_breaker import get_llm_breaker
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class TokenRateLimiter:
+    def __init__(self, tokens_per_minute: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.capacity = float(tokens_per_minute)
+        self.rate_per_second = tokens_per_minute / 60.0
+        self._clock = clock
+        self._available = self.capacity
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        # Reservations may drive the bucket negative; the caller waits until it refills to zero,
+        # which keeps callers roughly FIFO without a background refill thread.
+        with self._lock:
+            now = self._clock()
+            self._available = min(self.capacity, self._available + (now - self._updated_at) * self.rate_per_second)
+            self._updated_at = now
+            self._available -= min(float(tokens), self.capacity)
+            if self._available >= 0:
+                return 0.0
+            return -self._available / self.rate_per_second
+
+    def acquire(self, tokens: int) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            metrics.observe("llm_rate_limit_wait_seconds", wait)
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            metrics.observe("llm_rate_limit_wait_seconds", wait)
+            await asyncio.sleep(wait)
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str | None,
+        timeout_seconds: float,
+        max_retries: int,
+        max_concurrency: int,
+        tokens_per_minute: int,
+    ) -> None:
+        self._client_kwargs = {
+            "api_key": api_key,
+            "base_url": base_url,
+            "timeout": timeout_seconds,
+            "max_retries": max_retries,
+        }
+        self.client = OpenAI(**self._client_kwargs)
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._limiter = TokenRateLimiter(tokens_per_minute) if tokens_per_minute > 0 else None
+        # AsyncOpenAI connection pools and asyncio semaphores are bound to the loop that created them.
+        self._async_state: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple[AsyncOpenAI, asyncio.Semaphore]]
+        self._async_state = weakref.WeakKeyDictionary()
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+    def complete_json(self, system: str, user: str, model: str | None = None) -> str:
+        if self._limiter is not None:
+            self._limiter.acquire(estimate_tokens(system) + estimate_tokens(user))
+        with self._slots:
+            started = self._begin()
+            succeeded = False
+            try:
+                response = self.client.chat.completions.create(**self._request(system, user, model))
+                succeeded = True
+            finally:
+                self._end(started, succeeded)
+        return response.choices[0].message.content or "{}"
+
+    async def acomplete_json(self, system: str, user: str, model: str | None = None) -> str:
+        client, slots = self._async_client()
+        if self._limiter is not None:
+            await self._limiter.acquire_async(estimate_tokens(system) + estimate_tokens(user))
+        async with slots:
+            started = self._begin()
+            succeeded = False
+            try:
+                response = await client.chat.completions.create(**self._request(system, user, model))
+                succeeded = True
+            finally:
+                self._end(started, succeeded)
+        return response.choices[0].message.content or "{}"
+
+    def _async_client(self) -> tuple[AsyncOpenAI, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        state = self._async_state.get(loop)
+        if state is None:
+            state = (AsyncOpenAI(**self._client_kwargs), asyncio.Semaphore(self.max_concurrency))
+            self._async_state[loop] = state
+        return state
+
+    def _request(self, system: str, user: str, model: str | None) -> dict:
+        return {
+            "model": model or settings.openai_model,
+            "temperature": 0,
+            "response_format": {"type": "json_object"},
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ],
+        }
+
+    def _begin(self) -> float:
+        with self._in_flight_lock:
+            self._in_flight += 1
+            metrics.set_gauge("llm_in_flight", self._in_flight)
+        metrics.increment("llm_requests")
+        return time.perf_counter()
+
+    def _end(self, started: float, succeeded: bool) -> None:
+        elapsed = time.perf_counter() - started
+        metrics.observe("llm_latency_seconds", elapsed)
+        if not succeeded:
+            metrics.increment("llm_request_failures")
+        if settings.llm_breaker_enabled:
+            get_llm_breaker().record(succeeded, elapsed)
+        with self._in_flight_lock:
+            self._in_flight -= 1
+            metrics.set_gauge("llm_in_flight", self._in_flight)
+
+
+_gateway: LLMGateway | None = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    global _gateway
+    if _gateway is not None:
+        return _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway(
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_base_url or None,
+                timeout_seconds=settings.openai_timeout_seconds,
+                max_retries=settings.openai_max_retries,
+                max_concurrency=settings.llm_max_concurrency,
+                tokens_per_minute=settings.llm_tokens_per_minute,
+            )
+    return _gateway
+
+
+def reset_llm_gateway() -> None:
+    global _gateway
+    _gateway = None
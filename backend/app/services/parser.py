@@ -4,9 +4,9 @@ from hashlib import sha256
 from typing import Any
 
 
-def parse_uploaded_document(filename: str, content: bytes) -> dict[str, Any]:
+def parse_uploaded_document(filename: str, content: bytes | memoryview, digest: str | None = None) -> dict[str, Any]:
     # Deterministic stub until AI extraction worker is connected.
-    digest = sha256(content).hexdigest()
+    digest = digest or sha256(content).hexdigest()
     extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else "unknown"
 
     return {
@@ -1,21 +1,45 @@
 from __future__ import annotations
 
+import json
+import logging
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
 from hashlib import sha256
+from typing import Any, Callable
 from uuid import uuid4
 
 from sqlalchemy.orm import Session
 
-from app.schemas.pipeline import PipelineResponse
-from app.services.canonical import build_canonical_profile
-from app.services.document_text import extract_text
-from app.services.extraction import extract_risk_facts
+from app.core import metrics
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.entities import Submission
+from app.models.risk import RiskProfile
+from app.schemas.pipeline import CompletenessResult, PipelineResponse, QuestionSet
+from app.services.canonical import build_canonical_profile, merge_extractions
+from app.services.document_text import document_kind, extract_text
+from app.services.export import pipeline_from_stored_json
+from app.services.extraction import extract_risk_facts_speculative
 from app.services.missingness import score_missingness
 from app.services.questions import generate_question_set
-from app.services.repository import store_pipeline_result
+from app.services.repository import (
+    find_deduplicated_version,
+    get_latest_profile_version,
+    store_pipeline_result,
+    store_profile_upgrade,
+)
+from app.services.stage_graph import Stage, StageGraph, StageTiming
+from app.services.stage_memo import load_stage_outputs, stage_cache_keys, store_stage_outputs
 from app.services.storage import get_storage, safe_filename
+from app.services.versioning import pipeline_version, stage_versions
 
+logger = logging.getLogger("pipeline_engine")
 
-def compute_payload_sha256(payload: bytes) -> str:
+MULTI_DOCUMENT_CONTENT_TYPE = "multipart/mixed"
+
+
+def compute_payload_sha256(payload: bytes | memoryview) -> str:
     return sha256(payload).hexdigest()
 
 
@@ -24,30 +48,395 @@ def run_pipeline_bytes(
     tenant_external_id: str,
     filename: str,
     content_type: str,
-    payload: bytes,
+    payload: bytes | memoryview,
     persist: bool = True,
     submission_id: str | None = None,
     source_object_key: str | None = None,
+    payload_sha256: str | None = None,
+    llm_deadline_seconds: float | None = None,
+    upgrade_late_extraction: bool = False,
+    dedupe: bool = False,
+    on_stage: Callable[[StageTiming], None] | None = None,
 ) -> PipelineResponse:
-    raw_text = extract_text(filename=filename, content_type=content_type, payload=payload)
-    extraction = extract_risk_facts(raw_text=raw_text, filename=filename)
-    resolved_submission_id = submission_id or f"sub_{uuid4().hex[:12]}"
-    profile = build_canonical_profile(submission_id=resolved_submission_id, extraction=extraction)
-    completeness = score_missingness(profile)
-    questions = generate_question_set(profile.insured_name, completeness)
-    result = PipelineResponse(profile=profile, completeness=completeness, questions=questions)
+    payload_sha256 = payload_sha256 or compute_payload_sha256(payload)
+    version = pipeline_version()
+    if dedupe:
+        stored = find_deduplicated_version(db, tenant_external_id, payload_sha256, version)
+        if stored is not None:
+            metrics.increment("pipeline_dedupe_hits")
+            deduplicated = pipeline_from_stored_json(stored.profile_json, stored.completeness_json, stored.questions_json)
+            deduplicated.debug = {"deduplicated_from": stored.submission_id, "profile_version": stored.version}
+            return deduplicated
+        metrics.increment("pipeline_dedupe_misses")
+
+    return _run_stages(
+        db,
+        tenant_external_id=tenant_external_id,
+        submission_id=submission_id or f"sub_{uuid4().hex[:12]}",
+        filename=filename,
+        content_type=content_type,
+        load_payload=lambda: payload,
+        payload_sha256=payload_sha256,
+        version=version,
+        persist=persist,
+        source_object_key=source_object_key,
+        llm_deadline_seconds=llm_deadline_seconds,
+        upgrade_late_extraction=upgrade_late_extraction,
+        on_stage=on_stage,
+    )
 
+
+def run_pipeline_text(
+    db: Session,
+    tenant_external_id: str,
+    submission_id: str,
+    filename: str,
+    content_type: str,
+    text: str,
+    source_object_key: str,
+    payload_sha256: str,
+    llm_deadline_seconds: float | None = None,
+    upgrade_late_extraction: bool = False,
+    on_stage: Callable[[StageTiming], None] | None = None,
+) -> PipelineResponse:
+    # Second half of the split Celery pipeline: the text was already extracted on the CPU queue,
+    # so this seeds extract_text with it and the stored source is never read back.
+    return _run_stages(
+        db,
+        tenant_external_id=tenant_external_id,
+        submission_id=submission_id,
+        filename=filename,
+        content_type=content_type,
+        load_payload=lambda: get_storage().get_bytes(source_object_key),
+        payload_sha256=payload_sha256,
+        version=pipeline_version(),
+        persist=True,
+        source_object_key=source_object_key,
+        llm_deadline_seconds=llm_deadline_seconds,
+        upgrade_late_extraction=upgrade_late_extraction,
+        on_stage=on_stage,
+        extracted_text=text,
+    )
+
+
+def rerun_submission(db: Session, tenant_external_id: str, submission: Submission) -> PipelineResponse:
+    # Re-processes a stored submission after a rules or code change. Stages whose inputs and
+    # version are unchanged come from the stage memo, so typically only scoring and question
+    # generation run again; the source is read back from storage only if text extraction must.
+    source_key = submission.source_object_key
+    if source_key is None:
+        raise ValueError(f"Submission {submission.submission_id} has no stored source")
+    storage = get_storage()
+    latest = get_latest_profile_version(db, tenant_external_id, submission.submission_id)
+    return _run_stages(
+        db,
+        tenant_external_id=tenant_external_id,
+        submission_id=submission.submission_id,
+        filename=submission.filename,
+        content_type=submission.content_type,
+        load_payload=lambda: storage.get_bytes(source_key),
+        payload_sha256=submission.payload_sha256 or compute_payload_sha256(storage.get_bytes(source_key)),
+        version=pipeline_version(),
+        persist=True,
+        source_object_key=source_key,
+        # An explicit re-run waits for the LLM instead of settling for a degraded answer.
+        llm_deadline_seconds=0.0,
+        profile_version=(latest.version if latest else 0) + 1,
+        event_type="pipeline_rerun",
+        memoize_downstream=True,
+    )
+
+
+def _run_stages(
+    db: Session,
+    tenant_external_id: str,
+    submission_id: str,
+    filename: str,
+    content_type: str,
+    load_payload: Callable[[], bytes | memoryview],
+    payload_sha256: str,
+    version: str,
+    persist: bool,
+    source_object_key: str | None,
+    llm_deadline_seconds: float | None,
+    upgrade_late_extraction: bool = False,
+    profile_version: int = 1,
+    event_type: str = "pipeline_run",
+    on_stage: Callable[[StageTiming], None] | None = None,
+    extracted_text: str | None = None,
+    memoize_downstream: bool = False,
+) -> PipelineResponse:
+    deadline_seconds = llm_deadline_seconds if llm_deadline_seconds is not None else settings.llm_deadline_seconds
+
+    def extract_text_stage() -> str:
+        if extracted_text is not None:
+            return extracted_text
+        return extract_text(
+            filename=filename, content_type=content_type, payload=load_payload(), payload_sha256=payload_sha256
+        )
+
+    def extract_facts_stage(extract_text: str) -> tuple[dict, Future | None]:
+        return extract_risk_facts_speculative(raw_text=extract_text, filename=filename, deadline_seconds=deadline_seconds)
+
+    def build_profile_stage(extract_facts: tuple[dict, Future | None]) -> RiskProfile:
+        return build_canonical_profile(submission_id=submission_id, extraction=extract_facts[0])
+
+    def score_stage(build_profile: RiskProfile) -> list[CompletenessResult]:
+        return score_missingness(build_profile)
+
+    def questions_stage(build_profile: RiskProfile, score_missingness: list[CompletenessResult]) -> QuestionSet:
+        return generate_question_set(build_profile.insured_name, score_missingness)
+
+    def store_source_stage() -> str:
+        if source_object_key is not None:
+            # Callers that pass source_object_key have already stored the upload (claim-check path).
+            return source_object_key
+        key = f"submissions/{tenant_external_id}/{submission_id}/{safe_filename(filename)}"
+        get_storage().put_bytes(key=key, content=load_payload(), content_type=content_type)
+        return key
+
+    stages = [
+        Stage("extract_text", extract_text_stage),
+        Stage("extract_facts", extract_facts_stage, ("extract_text",)),
+        Stage("build_profile", build_profile_stage, ("extract_facts",)),
+        Stage("score_missingness", score_stage, ("build_profile",)),
+        Stage("generate_questions", questions_stage, ("build_profile", "score_missingness")),
+    ]
     if persist:
-        storage = get_storage()
-        key = source_object_key or f"submissions/{tenant_external_id}/{resolved_submission_id}/{safe_filename(filename)}"
-        storage.put_bytes(key=key, content=payload, content_type=content_type)
+        # The source upload does not depend on extraction, so it overlaps with it.
+        stages.append(Stage("store_source", store_source_stage))
+
+    versions = stage_versions()
+    keys = stage_cache_keys(
+        stages,
+        versions,
+        {
+            "extract_text": (payload_sha256, document_kind(filename, content_type)),
+            "extract_facts": (filename,),
+            "build_profile": (submission_id,),
+        },
+    )
+    # Stages after extract_facts are keyed on the submission, so only re-runs of it can hit them;
+    # a first run memoizes the content-keyed extraction alone instead of rows nothing reads.
+    memo_stages = _STAGE_ENCODERS if memoize_downstream else _CONTENT_KEYED_STAGES
+    graph = StageGraph(stages)
+    memoized = load_stage_outputs(keys, {name: _STAGE_DECODERS[name] for name in memo_stages})
+    targets = [stage.name for stage in stages if stage.name not in ("extract_text", "extract_facts")]
+    run = graph.run(seeds=graph.plan(targets, memoized), on_stage=on_stage)
+    ran = {timing.stage: run.outputs[timing.stage] for timing in run.timings if not timing.seeded}
+    store_stage_outputs(stages, keys, versions, ran, {name: _STAGE_ENCODERS[name] for name in memo_stages})
+
+    outputs = run.outputs
+    late_extraction = outputs["extract_facts"][1] if outputs["extract_facts"] is not None else None
+    result = PipelineResponse(
+        profile=outputs["build_profile"],
+        completeness=outputs["score_missingness"],
+        questions=outputs["generate_questions"],
+    )
+    result.profile.version = profile_version
+
+    if persist:
+        persist_started, persist_cpu_started = time.perf_counter(), time.thread_time()
         store_pipeline_result(
             db,
             tenant_external_id=tenant_external_id,
             filename=filename,
             content_type=content_type,
             result=result,
-            source_object_key=key,
+            source_object_key=outputs["store_source"],
+            stage_timings=run.timing_report(),
+            payload_sha256=payload_sha256,
+            pipeline_version=version,
+            event_type=event_type,
+        )
+        if late_extraction is not None and upgrade_late_extraction:
+            # Registered after the degraded version is stored so the upgrade always lands on top of it.
+            late_extraction.add_done_callback(
+                lambda future: _store_late_extraction(future, tenant_external_id, submission_id)
+            )
+        # Persisting writes the audit entry that carries the timings, so it is timed outside the graph.
+        run.record(
+            StageTiming(
+                stage="persist",
+                started_ms=round((persist_started - run.started_at) * 1000, 3),
+                wall_ms=round((time.perf_counter() - persist_started) * 1000, 3),
+                cpu_ms=round((time.thread_time() - persist_cpu_started) * 1000, 3),
+            )
         )
 
+    result.debug = {"stage_timings": run.timing_report(), "stages_wall_ms": run.wall_ms}
     return result
+
+
+def _encode_extraction(output: tuple[dict, Future | None]) -> str | None:
+    extraction = output[0]
+    debug = extraction.get("debug", {})
+    # A degraded or partial answer, or a rules fallback while an LLM is configured, stands in
+    # for a better result a later run may get; never pin it.
+    if debug.get("degraded") or debug.get("failed_chunks"):
+        return None
+    if settings.openai_api_key and debug.get("mode") == "rules":
+        return None
+    return json.dumps(extraction)
+
+
+_STAGE_ENCODERS: dict[str, Callable[[Any], str | None]] = {
+    "extract_facts": _encode_extraction,
+    "build_profile": lambda profile: profile.model_dump_json(),
+    "score_missingness": lambda items: json.dumps([item.model_dump() for item in items]),
+    "generate_questions": lambda question_set: question_set.model_dump_json(),
+}
+
+_CONTENT_KEYED_STAGES = ("extract_facts",)
+
+_STAGE_DECODERS: dict[str, Callable[[str], Any]] = {
+    "extract_facts": lambda raw: (json.loads(raw), None),
+    "build_profile": RiskProfile.model_validate_json,
+    "score_missingness": lambda raw: [CompletenessResult.model_validate(item) for item in json.loads(raw)],
+    "generate_questions": QuestionSet.model_validate_json,
+}
+
+
+@dataclass(frozen=True)
+class DocumentInput:
+    filename: str
+    content_type: str
+    payload: bytes | memoryview
+    payload_sha256: str
+
+
+def extract_document(
+    filename: str,
+    content_type: str,
+    payload: bytes | memoryview,
+    payload_sha256: str,
+    llm_deadline_seconds: float | None = None,
+    text: str | None = None,
+) -> dict:
+    # One document's share of a multi-document run. A late LLM result is not applied here: the
+    # merged profile is built once from whatever every document produced in time. Async jobs pass
+    # the text parsed on the CPU queue.
+    deadline_seconds = llm_deadline_seconds if llm_deadline_seconds is not None else settings.llm_deadline_seconds
+    if text is None:
+        text = extract_text(filename=filename, content_type=content_type, payload=payload, payload_sha256=payload_sha256)
+    extraction, _ = extract_risk_facts_speculative(raw_text=text, filename=filename, deadline_seconds=deadline_seconds)
+    return extraction
+
+
+def run_pipeline_documents(
+    db: Session,
+    tenant_external_id: str,
+    documents: list[DocumentInput],
+    persist: bool = True,
+    submission_id: str | None = None,
+    llm_deadline_seconds: float | None = None,
+) -> PipelineResponse:
+    # Every document is extracted concurrently on the stage pool; the extractions are merged into
+    # one profile, which is then scored and drafted once.
+    resolved_submission_id = submission_id or f"sub_{uuid4().hex[:12]}"
+
+    def extract_stage(document: DocumentInput) -> Callable[[], dict]:
+        return lambda: extract_document(
+            document.filename, document.content_type, document.payload, document.payload_sha256, llm_deadline_seconds
+        )
+
+    def store_source_stage(index: int, document: DocumentInput) -> Callable[[], str]:
+        def store() -> str:
+            key = f"submissions/{tenant_external_id}/{resolved_submission_id}/{index}-{safe_filename(document.filename)}"
+            get_storage().put_bytes(key=key, content=document.payload, content_type=document.content_type)
+            return key
+
+        return store
+
+    extract_names = [f"extract_document:{index}" for index in range(len(documents))]
+    stages = [Stage(name, extract_stage(document)) for name, document in zip(extract_names, documents)]
+    if persist:
+        stages.extend(
+            Stage(f"store_source:{index}", store_source_stage(index, document)) for index, document in enumerate(documents)
+        )
+    stages.append(
+        Stage(
+            "merge_extractions",
+            lambda **extracted: merge_extractions(
+                [(document.filename, extracted[name]) for name, document in zip(extract_names, documents)]
+            ),
+            tuple(extract_names),
+        )
+    )
+    run = StageGraph(stages).run()
+
+    source_keys = [run.outputs.get(f"store_source:{index}") for index in range(len(documents))]
+    result = _finish_merged(
+        db,
+        tenant_external_id=tenant_external_id,
+        submission_id=resolved_submission_id,
+        extraction=run.outputs["merge_extractions"],
+        documents=[
+            {"filename": document.filename, "source_object_key": key, "payload_sha256": document.payload_sha256}
+            for document, key in zip(documents, source_keys)
+        ],
+        persist=persist,
+        stage_timings=run.timing_report(),
+    )
+    result.debug = {"stage_timings": run.timing_report(), "stages_wall_ms": run.wall_ms}
+    return result
+
+
+def finish_merged_pipeline(
+    db: Session,
+    tenant_external_id: str,
+    submission_id: str,
+    extractions: list[dict],
+    documents: list[dict],
+) -> PipelineResponse:
+    # Fan-in for the Celery chord: the per-document extractions arrive in document order.
+    merged = merge_extractions([(document["filename"], extraction) for document, extraction in zip(documents, extractions)])
+    return _finish_merged(db, tenant_external_id, submission_id, merged, documents, persist=True)
+
+
+def _finish_merged(
+    db: Session,
+    tenant_external_id: str,
+    submission_id: str,
+    extraction: dict,
+    documents: list[dict],
+    persist: bool,
+    stage_timings: list[dict] | None = None,
+) -> PipelineResponse:
+    result = build_pipeline_result(submission_id, extraction)
+    result.profile.metadata["documents"] = documents
+    if persist:
+        store_pipeline_result(
+            db,
+            tenant_external_id=tenant_external_id,
+            filename=multi_document_filename([document["filename"] for document in documents]),
+            content_type=MULTI_DOCUMENT_CONTENT_TYPE,
+            result=result,
+            stage_timings=stage_timings,
+        )
+    return result
+
+
+def multi_document_filename(filenames: list[str]) -> str:
+    joined = ", ".join(filenames)
+    return joined if len(joined) <= 255 else f"{joined[:252]}..."
+
+
+def build_pipeline_result(submission_id: str, extraction: dict) -> PipelineResponse:
+    profile = build_canonical_profile(submission_id=submission_id, extraction=extraction)
+    completeness = score_missingness(profile)
+    questions = generate_question_set(profile.insured_name, completeness)
+    return PipelineResponse(profile=profile, completeness=completeness, questions=questions)
+
+
+def _store_late_extraction(future: Future, tenant_external_id: str, submission_id: str) -> None:
+    try:
+        extraction = future.result()
+        if extraction is None:
+            return
+        extraction["debug"]["late_upgrade"] = True
+        with SessionLocal() as db:
+            store_profile_upgrade(db, tenant_external_id, build_pipeline_result(submission_id, extraction))
+        metrics.increment("llm_late_upgrades")
+    except Exception:
+        logger.exception("Late LLM upgrade failed for submission %s", submission_id)
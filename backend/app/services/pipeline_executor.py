@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from app.core import metrics
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class ExecutorSaturatedError(Exception):
+    pass
+
+
+class BoundedExecutor:
+    def __init__(self, name: str, max_workers: int, max_queued: int) -> None:
+        self.name = name
+        self.capacity = max_workers + max_queued
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> Future[T]:
+        if not self._slots.acquire(blocking=False):
+            metrics.increment("executor_rejected", executor=self.name)
+            raise ExecutorSaturatedError(f"{self.name} executor is saturated")
+
+        self._track(1)
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def _release(self) -> None:
+        self._track(-1)
+        self._slots.release()
+
+    def _track(self, delta: int) -> None:
+        with self._lock:
+            self._in_flight += delta
+            metrics.set_gauge("executor_in_flight", self._in_flight, executor=self.name)
+
+
+_pipeline_executor: BoundedExecutor | None = None
+
+
+def get_pipeline_executor() -> BoundedExecutor:
+    global _pipeline_executor
+    if _pipeline_executor is None:
+        _pipeline_executor = BoundedExecutor(
+            name="pipeline",
+            max_workers=settings.pipeline_executor_workers,
+            max_queued=settings.pipeline_executor_max_queued,
+        )
+    return _pipeline_executor
+
+
+_speculative_executor: BoundedExecutor | None = None
+
+
+def get_speculative_executor() -> BoundedExecutor:
+    global _speculative_executor
+    if _speculative_executor is None:
+        _speculative_executor = BoundedExecutor(
+            name="llm-speculative",
+            max_workers=settings.llm_speculative_workers,
+            max_queued=settings.llm_speculative_max_queued,
+        )
+    return _speculative_executor
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from contextlib import aclosing
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.redis import get_redis, new_async_redis
+from app.services.stage_graph import StageTiming
+
+logger = logging.getLogger("progress")
+
+STAGE_EVENTS = {
+    "extract_text": "text_extracted",
+    "extract_facts": "fields_extracted",
+    "build_profile": "profile_built",
+    "score_missingness": "scored",
+    "generate_questions": "questions_generated",
+    "store_source": "source_stored",
+    "persist": "persisted",
+}
+TERMINAL_EVENTS = {"succeeded", "failed"}
+_BACKLOG_EVENTS = 100
+
+
+# Each job has a numbered event log plus a live channel. Listeners subscribe first, then replay
+# the log, so events published before a client connected are not lost; sequence numbers drop
+# the duplicates the overlap produces.
+class MemoryProgressBus:
+    def __init__(self) -> None:
+        self._events: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        self._seq: dict[str, int] = defaultdict(int)
+        self._listeners: dict[str, list[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def publish(self, job_id: str, event: dict[str, Any]) -> None:
+        with self._lock:
+            # The backlog is trimmed, so its length stops growing; seq counts every event published.
+            self._seq[job_id] += 1
+            event = {**event, "seq": self._seq[job_id]}
+            log = self._events[job_id]
+            log.append(event)
+            del log[:-_BACKLOG_EVENTS]
+            listeners = list(self._listeners[job_id])
+        for loop, queue in listeners:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    async def listen(self, job_id: str, heartbeat_seconds: float) -> AsyncIterator[dict[str, Any] | None]:
+        listener = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            backlog = list(self._events[job_id])
+            self._listeners[job_id].append(listener)
+        try:
+            for event in backlog:
+                yield event
+            while True:
+                try:
+                    yield await asyncio.wait_for(listener[1].get(), heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                self._listeners[job_id].remove(listener)
+
+
+class RedisProgressBus:
+    def __init__(self, ttl_seconds: int) -> None:
+        self.ttl_seconds = ttl_seconds
+
+    def publish(self, job_id: str, event: dict[str, Any]) -> None:
+        client = get_redis()
+        seq = client.incr(f"ghostwriter:job:{job_id}:seq")
+        payload = json.dumps({**event, "seq": seq})
+        pipe = client.pipeline(transaction=False)
+        pipe.rpush(f"ghostwriter:job:{job_id}:log", payload)
+        pipe.ltrim(f"ghostwriter:job:{job_id}:log", -_BACKLOG_EVENTS, -1)
+        pipe.expire(f"ghostwriter:job:{job_id}:log", self.ttl_seconds)
+        pipe.expire(f"ghostwriter:job:{job_id}:seq", self.ttl_seconds)
+        pipe.publish(f"ghostwriter:job:{job_id}:events", payload)
+        pipe.execute()
+
+    async def listen(self, job_id: str, heartbeat_seconds: float) -> AsyncIterator[dict[str, Any] | None]:
+        client = new_async_redis()
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(f"ghostwriter:job:{job_id}:events")
+            for raw in await client.lrange(f"ghostwriter:job:{job_id}:log", 0, -1):
+                yield json.loads(raw)
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=heartbeat_seconds)
+                yield json.loads(message["data"]) if message is not None else None
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_bus: MemoryProgressBus | RedisProgressBus | None = None
+_bus_lock = threading.Lock()
+
+
+def get_progress_bus() -> MemoryProgressBus | RedisProgressBus:
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                if settings.progress_backend == "redis":
+                    _bus = RedisProgressBus(ttl_seconds=settings.progress_event_ttl_seconds)
+                else:
+                    _bus = MemoryProgressBus()
+    return _bus
+
+
+def reset_progress_bus() -> None:
+    global _bus
+    _bus = None
+
+
+def publish_progress(job_id: str | None, event: str, **data: Any) -> None:
+    if not job_id:
+        return
+    payload = {"event": event, "job_id": job_id, "at": datetime.now(timezone.utc).isoformat(), **data}
+    try:
+        get_progress_bus().publish(job_id, payload)
+    except Exception:
+        # Progress is advisory: a Redis outage must never fail the job that is reporting it.
+        metrics.increment("progress_publish_failures")
+        logger.warning("Progress publish failed for job %s", job_id, exc_info=True)
+
+
+def stage_progress(job_id: str | None) -> Callable[[StageTiming], None]:
+    def report(timing: StageTiming) -> None:
+        publish_progress(
+            job_id,
+            STAGE_EVENTS.get(timing.stage, timing.stage),
+            stage=timing.stage,
+            wall_ms=timing.wall_ms,
+            seeded=timing.seeded,
+        )
+
+    return report
+
+
+async def job_event_stream(
+    job_id: str, terminal_status: Callable[[], Awaitable[str | None]]
+) -> AsyncIterator[str]:
+    # Server-Sent Events for one job. Heartbeats double as a cheap fallback check: if the job
+    # finished while its events were lost (Redis restart, expired log), the stored status ends
+    # the stream instead of leaving the client hanging.
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.progress_stream_timeout_seconds
+    seen: set[int] = set()
+    metrics.increment("progress_streams_opened")
+    try:
+        async with aclosing(get_progress_bus().listen(job_id, settings.progress_heartbeat_seconds)) as events:
+            async for event in events:
+                if event is None:
+                    status = await terminal_status()
+                    if status is not None:
+                        yield format_sse({"event": status, "job_id": job_id})
+                        return
+                    if loop.time() >= deadline:
+                        yield format_sse({"event": "timeout", "job_id": job_id})
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                if event.get("seq") in seen:
+                    continue
+                seen.add(event.get("seq"))
+                yield format_sse(event)
+                if event["event"] in TERMINAL_EVENTS:
+                    return
+    except Exception:
+        logger.warning("Progress stream unavailable for job %s", job_id, exc_info=True)
+        yield format_sse({"event": "unavailable", "job_id": job_id})
+
+
+def format_sse(event: dict[str, Any]) -> str:
+    lines = []
+    if event.get("seq") is not None:
+        lines.append(f"id: {event['seq']}")
+    lines.append(f"event: {event['event']}")
+    lines.append(f"data: {json.dumps(event)}")
+    return "\n".join(lines) + "\n\n"
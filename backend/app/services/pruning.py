@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from dataclasses import dataclass
+
+from app.services.document_text import PAGE_BREAK
+from app.services.keywords import KeywordMatcher
+from app.services.llm_gateway import estimate_tokens
+
+_BOUNDARY = re.compile(f"[\n{re.escape(PAGE_BREAK)}]")
+
+# Cue words per field; LOB keywords and LOB schema field names are added by build_cue_vocabulary.
+FIELD_CUES: dict[str, list[str]] = {
+    "insured_name": ["insured", "named insured", "applicant", "business name", "company name", "dba"],
+    "revenue": ["revenue", "gross sales", "annual sales", "receipts", "turnover"],
+    "payroll": ["payroll", "remuneration", "wages", "employees"],
+    "locations": ["location", "locations", "premises", "address"],
+    "coverage_requested": ["coverage", "limits", "limit of liability", "deductible"],
+    "class_codes": ["class code", "naics", "sic"],
+    "vehicle_count": ["vehicle", "vehicles", "vin", "power units"],
+    "driver_schedule": ["driver", "drivers", "mvr"],
+}
+
+
+@dataclass(frozen=True)
+class PruneResult:
+    text: str
+    original_tokens: int
+    kept_tokens: int
+    windows: int
+
+    @property
+    def removed_tokens(self) -> int:
+        return self.original_tokens - self.kept_tokens
+
+
+@dataclass(frozen=True)
+class _Window:
+    start: int
+    end: int
+    hits: int
+
+
+def build_cue_vocabulary(lob_keywords: dict[str, list[str]], lob_schemas: dict[str, list[str]]) -> dict[str, list[str]]:
+    vocabulary: dict[str, list[str]] = {label: list(terms) for label, terms in FIELD_CUES.items()}
+    for lob, terms in lob_keywords.items():
+        vocabulary.setdefault(f"lob:{lob}", []).extend(terms)
+    for fields in lob_schemas.values():
+        for field in fields:
+            vocabulary.setdefault(field, []).append(field.replace("_", " "))
+    return vocabulary
+
+
+# Keeps line-aligned windows around cue hits (plus the document head, where insured names
+# usually sit) and drops everything else. Windows are ranked by hit count when they exceed
+# the token budget, then emitted in document order with skipped page breaks preserved so
+# page numbers still line up for chunking and citations.
+class TextPruner:
+    def __init__(self, vocabulary: dict[str, list[str]]) -> None:
+        self._matcher = KeywordMatcher(vocabulary)
+
+    def prune(self, text: str, context_lines: int, token_budget: int) -> PruneResult:
+        original_tokens = estimate_tokens(text)
+        windows = self._windows(text, context_lines)
+        if not any(window.hits for window in windows):
+            return PruneResult(text=text, original_tokens=original_tokens, kept_tokens=original_tokens, windows=0)
+
+        selected: list[_Window] = []
+        used = 0
+        for window in sorted(windows, key=lambda window: (-window.hits, window.start)):
+            cost = estimate_tokens(text[window.start : window.end])
+            if selected and used + cost > token_budget:
+                continue
+            selected.append(window)
+            used += cost
+        selected.sort(key=lambda window: window.start)
+
+        parts: list[str] = []
+        cursor = 0
+        for window in selected:
+            skipped_pages = text.count(PAGE_BREAK, cursor, window.start)
+            if parts or skipped_pages:
+                parts.append("\n\n" + PAGE_BREAK * skipped_pages)
+            parts.append(text[window.start : window.end].strip("\n"))
+            cursor = window.end
+        parts.append(PAGE_BREAK * text.count(PAGE_BREAK, cursor))
+        pruned = "".join(parts)
+        return PruneResult(
+            text=pruned,
+            original_tokens=original_tokens,
+            kept_tokens=min(original_tokens, estimate_tokens(pruned)),
+            windows=len(selected),
+        )
+
+    def _windows(self, text: str, context_lines: int) -> list[_Window]:
+        lines = _LineIndex(text)
+        spans = [(0, lines.end(0, context_lines), 0)]
+        for hit in self._matcher.finditer(text):
+            # Short cues such as "vin" or "sic" must not fire inside longer words.
+            if _is_word_char(text, hit.start - 1) or _is_word_char(text, hit.end):
+                continue
+            spans.append((lines.start(hit.start, context_lines), lines.end(hit.end, context_lines), 1))
+
+        merged: list[_Window] = []
+        for start, end, hits in sorted(spans):
+            if merged and start <= merged[-1].end + 1:
+                last = merged[-1]
+                merged[-1] = _Window(last.start, max(last.end, end), last.hits + hits)
+            else:
+                merged.append(_Window(start, end, hits))
+        return merged
+
+
+# Offsets of every line boundary, found in one pass so each hit costs a bisect rather than a
+# scan of the text. Boundaries include page breaks, so a window never reaches across a page.
+class _LineIndex:
+    def __init__(self, text: str) -> None:
+        self._length = len(text)
+        self._offsets: list[int] = []
+        self._page_breaks: set[int] = set()
+        for match in _BOUNDARY.finditer(text):
+            self._offsets.append(match.start())
+            if match.group() == PAGE_BREAK:
+                self._page_breaks.add(match.start())
+
+    def start(self, index: int, extra_lines: int) -> int:
+        position = bisect_left(self._offsets, index) - 1
+        for _ in range(extra_lines + 1):
+            if position < 0:
+                return 0
+            boundary = self._offsets[position]
+            if boundary in self._page_breaks:
+                return boundary + 1
+            index = boundary
+            position -= 1
+        return index + 1
+
+    def end(self, index: int, extra_lines: int) -> int:
+        position = bisect_left(self._offsets, index)
+        for _ in range(extra_lines + 1):
+            if position >= len(self._offsets):
+                return self._length
+            index = self._offsets[position]
+            if index in self._page_breaks:
+                return index
+            index += 1
+            position += 1
+        return index - 1
+
+
+def _is_word_char(text: str, index: int) -> bool:
+    return 0 <= index < len(text) and text[index].isalnum()
@@ -1,14 +1,26 @@
 from __future__ import annotations
 
 import json
-from datetime import datetime, timezone
-
-from sqlalchemy import select
-from sqlalchemy.orm import Session
-
-from app.models.entities import AuditLog, ProfileVersion, Submission, Tenant
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+
+from app.models.entities import (
+    AuditLog,
+    LlmResponseCache,
+    ProfileVersion,
+    QuarantinedJob,
+    StageOutput,
+    Submission,
+    Tenant,
+)
 from app.schemas.pipeline import PipelineResponse
 
+PROFILE_VERSION_ATTEMPTS = 3
+
 
 def get_or_create_tenant(db: Session, tenant_external_id: str) -> Tenant:
     tenant = db.scalar(select(Tenant).where(Tenant.external_id == tenant_external_id))
@@ -22,6 +34,10 @@ def get_or_create_tenant(db: Session, tenant_external_id: str) -> Tenant:
     return tenant
 
 
+def get_tenant(db: Session, tenant_external_id: str) -> Tenant | None:
+    return db.scalar(select(Tenant).where(Tenant.external_id == tenant_external_id))
+
+
 def append_audit_log(db: Session, tenant_id: int, submission_id: str, event_type: str, details: dict) -> None:
     log = AuditLog(
         tenant_id=tenant_id,
@@ -42,6 +58,7 @@ def create_queued_submission(
     source_object_key: str | None,
     idempotency_key: str,
     job_id: str,
+    lane: str = "standard",
 ) -> Submission:
     tenant = get_or_create_tenant(db, tenant_external_id)
     existing = db.scalar(select(Submission).where(Submission.idempotency_key == idempotency_key))
@@ -68,7 +85,7 @@ def create_queued_submission(
         tenant_id=tenant.id,
         submission_id=submission_id,
         event_type="job_queued",
-        details={"job_id": job_id, "filename": filename},
+        details={"job_id": job_id, "filename": filename, "lane": lane},
     )
     return submission
 
@@ -77,6 +94,13 @@ def get_submission_by_idempotency(db: Session, idempotency_key: str) -> Submissi
     return db.scalar(select(Submission).where(Submission.idempotency_key == idempotency_key))
 
 
+def get_submission(db: Session, tenant_external_id: str, submission_id: str) -> Submission | None:
+    tenant = get_or_create_tenant(db, tenant_external_id)
+    return db.scalar(
+        select(Submission).where(Submission.submission_id == submission_id, Submission.tenant_id == tenant.id)
+    )
+
+
 def get_submission_by_job(db: Session, job_id: str) -> Submission | None:
     return db.scalar(select(Submission).where(Submission.job_id == job_id))
 
@@ -104,47 +128,139 @@ def store_pipeline_result(
     result: PipelineResponse,
     source_object_key: str | None = None,
     job_status: str = "processed",
+    stage_timings: list[dict] | None = None,
+    payload_sha256: str | None = None,
+    pipeline_version: str | None = None,
+    event_type: str = "pipeline_run",
 ) -> None:
     tenant = get_or_create_tenant(db, tenant_external_id)
 
-    submission = db.scalar(select(Submission).where(Submission.submission_id == result.profile.submission_id))
-    if submission:
-        submission.filename = filename
-        submission.content_type = content_type
-        submission.source_object_key = source_object_key
-        submission.status = "processed"
-        submission.job_status = job_status
-        db.add(submission)
-    else:
-        submission = Submission(
+    def add_rows() -> None:
+        submission = db.scalar(select(Submission).where(Submission.submission_id == result.profile.submission_id))
+        if submission:
+            submission.filename = filename
+            submission.content_type = content_type
+            submission.source_object_key = source_object_key
+            submission.status = "processed"
+            submission.job_status = job_status
+            submission.payload_sha256 = payload_sha256
+            submission.pipeline_version = pipeline_version
+            db.add(submission)
+        else:
+            submission = Submission(
+                submission_id=result.profile.submission_id,
+                tenant_id=tenant.id,
+                filename=filename,
+                content_type=content_type,
+                source_object_key=source_object_key,
+                status="processed",
+                job_status=job_status,
+                payload_sha256=payload_sha256,
+                pipeline_version=pipeline_version,
+            )
+            db.add(submission)
+
+        version = ProfileVersion(
             submission_id=result.profile.submission_id,
             tenant_id=tenant.id,
-            filename=filename,
-            content_type=content_type,
-            source_object_key=source_object_key,
-            status="processed",
-            job_status=job_status,
+            version=result.profile.version,
+            profile_json=result.profile.model_dump_json(),
+            completeness_json=json.dumps([item.model_dump() for item in result.completeness]),
+            questions_json=result.questions.model_dump_json(),
         )
-        db.add(submission)
+        db.add(version)
 
-    version = ProfileVersion(
-        submission_id=result.profile.submission_id,
+    _commit_profile_version(db, tenant.id, result, add_rows)
+
+    append_audit_log(
+        db,
         tenant_id=tenant.id,
-        version=result.profile.version,
-        profile_json=result.profile.model_dump_json(),
-        completeness_json=json.dumps([item.model_dump() for item in result.completeness]),
-        questions_json=result.questions.model_dump_json(),
+        submission_id=result.profile.submission_id,
+        event_type=event_type,
+        details={
+            "filename": filename,
+            "content_type": content_type,
+            "version": result.profile.version,
+            "stage_timings": stage_timings or [],
+        },
     )
-    db.add(version)
-    db.commit()
+
+
+def store_profile_upgrade(db: Session, tenant_external_id: str, result: PipelineResponse) -> ProfileVersion:
+    tenant = get_or_create_tenant(db, tenant_external_id)
+    result.profile.version = _next_profile_version(db, tenant.id, result.profile.submission_id)
+    versions: list[ProfileVersion] = []
+
+    def add_rows() -> None:
+        versions.append(
+            ProfileVersion(
+                submission_id=result.profile.submission_id,
+                tenant_id=tenant.id,
+                version=result.profile.version,
+                profile_json=result.profile.model_dump_json(),
+                completeness_json=json.dumps([item.model_dump() for item in result.completeness]),
+                questions_json=result.questions.model_dump_json(),
+            )
+        )
+        db.add(versions[-1])
+
+    _commit_profile_version(db, tenant.id, result, add_rows)
+    version = versions[-1]
 
     append_audit_log(
         db,
         tenant_id=tenant.id,
         submission_id=result.profile.submission_id,
-        event_type="pipeline_run",
-        details={"filename": filename, "content_type": content_type},
+        event_type="profile_upgraded",
+        details={"version": result.profile.version, "reason": "late_llm_extraction"},
+    )
+    return version
+
+
+def _next_profile_version(db: Session, tenant_id: int, submission_id: str) -> int:
+    latest = db.scalar(
+        select(func.max(ProfileVersion.version)).where(
+            ProfileVersion.tenant_id == tenant_id, ProfileVersion.submission_id == submission_id
+        )
+    )
+    return (latest or 0) + 1
+
+
+def _commit_profile_version(
+    db: Session, tenant_id: int, result: PipelineResponse, add_rows: Callable[[], None]
+) -> None:
+    # (tenant_id, submission_id, version) is unique: when a concurrent writer took the version
+    # number first, the transaction is rolled back and staged again under the next free one.
+    for attempt in range(PROFILE_VERSION_ATTEMPTS):
+        add_rows()
+        try:
+            db.commit()
+            return
+        except IntegrityError:
+            db.rollback()
+            if attempt == PROFILE_VERSION_ATTEMPTS - 1:
+                raise
+            result.profile.version = _next_profile_version(db, tenant_id, result.profile.submission_id)
+
+
+def find_deduplicated_version(
+    db: Session, tenant_external_id: str, payload_sha256: str, pipeline_version: str
+) -> ProfileVersion | None:
+    tenant = get_or_create_tenant(db, tenant_external_id)
+    submission_id = db.scalar(
+        select(Submission.submission_id)
+        .where(
+            Submission.tenant_id == tenant.id,
+            Submission.payload_sha256 == payload_sha256,
+            Submission.pipeline_version == pipeline_version,
+            Submission.status == "processed",
+        )
+        .order_by(Submission.created_at.desc())
+        .limit(1)
     )
+    if submission_id is None:
+        return None
+    return get_latest_profile_version(db, tenant_external_id, submission_id)
 
 
 def list_submissions(db: Session, tenant_external_id: str) -> list[Submission]:
@@ -167,6 +283,51 @@ def get_latest_profile_version(db: Session, tenant_external_id: str, submission_
     )
 
 
+def max_profile_version_id(db: Session) -> int:
+    return db.scalar(select(func.max(ProfileVersion.id))) or 0
+
+
+def list_latest_profile_versions(
+    db: Session,
+    after_tenant_id: int,
+    after_id: int,
+    max_id: int,
+    limit: int,
+    tenant_id: int | None = None,
+) -> list[ProfileVersion]:
+    # Keyset page over the latest version of each submission, ordered by (tenant_id, id). Rows
+    # above max_id were written after the scan started and are left alone.
+    newer = aliased(ProfileVersion)
+    has_newer = (
+        select(newer.id)
+        .where(
+            newer.tenant_id == ProfileVersion.tenant_id,
+            newer.submission_id == ProfileVersion.submission_id,
+            newer.version > ProfileVersion.version,
+        )
+        .exists()
+    )
+    query = select(ProfileVersion).where(
+        or_(
+            ProfileVersion.tenant_id > after_tenant_id,
+            and_(ProfileVersion.tenant_id == after_tenant_id, ProfileVersion.id > after_id),
+        ),
+        ProfileVersion.id <= max_id,
+        ~has_newer,
+    )
+    if tenant_id is not None:
+        query = query.where(ProfileVersion.tenant_id == tenant_id)
+    return list(db.scalars(query.order_by(ProfileVersion.tenant_id, ProfileVersion.id).limit(limit)))
+
+
+def insert_profile_versions(db: Session, versions: list[dict], audit_logs: list[dict]) -> None:
+    if versions:
+        db.execute(insert(ProfileVersion), versions)
+    if audit_logs:
+        db.execute(insert(AuditLog), audit_logs)
+    db.commit()
+
+
 def list_audit_logs(db: Session, tenant_external_id: str, submission_id: str) -> list[AuditLog]:
     tenant = get_or_create_tenant(db, tenant_external_id)
     rows = db.scalars(
@@ -193,6 +354,176 @@ def set_export_key(
     db.commit()
 
 
+def get_llm_cache_entry(db: Session, cache_key: str) -> str | None:
+    now = datetime.now(timezone.utc)
+    entry = db.scalar(
+        select(LlmResponseCache).where(LlmResponseCache.cache_key == cache_key, LlmResponseCache.expires_at > now)
+    )
+    if not entry:
+        return None
+    entry.last_used_at = now
+    db.add(entry)
+    db.commit()
+    return entry.response_json
+
+
+def put_llm_cache_entry(
+    db: Session,
+    cache_key: str,
+    model: str,
+    response_json: str,
+    ttl_seconds: int,
+    max_entries: int,
+) -> None:
+    now = datetime.now(timezone.utc)
+    db.execute(delete(LlmResponseCache).where(LlmResponseCache.cache_key == cache_key))
+    db.add(
+        LlmResponseCache(
+            cache_key=cache_key,
+            model=model,
+            response_json=response_json,
+            created_at=now,
+            last_used_at=now,
+            expires_at=now + timedelta(seconds=ttl_seconds),
+        )
+    )
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another worker cached the same response first.
+        db.rollback()
+        return
+
+    db.execute(delete(LlmResponseCache).where(LlmResponseCache.expires_at <= now))
+    overflow = (db.scalar(select(func.count(LlmResponseCache.id))) or 0) - max_entries
+    if overflow > 0:
+        stale_ids = select(LlmResponseCache.id).order_by(LlmResponseCache.last_used_at.asc()).limit(overflow)
+        db.execute(delete(LlmResponseCache).where(LlmResponseCache.id.in_(stale_ids.scalar_subquery())))
+    db.commit()
+
+
+def get_stage_outputs(db: Session, cache_keys: list[str], max_age_seconds: int | None = None) -> dict[str, str]:
+    if not cache_keys:
+        return {}
+    query = select(StageOutput.cache_key, StageOutput.output_json).where(StageOutput.cache_key.in_(cache_keys))
+    if max_age_seconds is not None:
+        query = query.where(StageOutput.created_at > datetime.now(timezone.utc) - timedelta(seconds=max_age_seconds))
+    return {cache_key: output_json for cache_key, output_json in db.execute(query)}
+
+
+def put_stage_outputs(
+    db: Session, entries: list[tuple[str, str, str, str]], max_age_seconds: int, max_entries: int
+) -> None:
+    # entries are (cache_key, stage, stage_version, output_json). An expired row under the same
+    # key is replaced, so the entry's age restarts.
+    now = datetime.now(timezone.utc)
+    expired_before = now - timedelta(seconds=max_age_seconds)
+    db.execute(delete(StageOutput).where(StageOutput.created_at <= expired_before))
+    existing = set(get_stage_outputs(db, [entry[0] for entry in entries]))
+    for cache_key, stage, stage_version, output_json in entries:
+        if cache_key not in existing:
+            db.add(
+                StageOutput(
+                    cache_key=cache_key, stage=stage, stage_version=stage_version, output_json=output_json, created_at=now
+                )
+            )
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent run stored the same outputs first.
+        db.rollback()
+        return
+
+    overflow = (db.scalar(select(func.count(StageOutput.id))) or 0) - max_entries
+    if overflow > 0:
+        stale_ids = select(StageOutput.id).order_by(StageOutput.created_at.asc()).limit(overflow)
+        db.execute(delete(StageOutput).where(StageOutput.id.in_(stale_ids.scalar_subquery())))
+        db.commit()
+
+
+def quarantine_job(
+    db: Session,
+    tenant_id: int,
+    submission_id: str,
+    job_id: str,
+    job_kind: str,
+    task_name: str,
+    source_object_key: str | None,
+    failure_class: str,
+    exc: BaseException,
+    attempts: int,
+    payload: dict,
+) -> QuarantinedJob:
+    row = QuarantinedJob(
+        tenant_id=tenant_id,
+        submission_id=submission_id,
+        job_id=job_id,
+        job_kind=job_kind,
+        task_name=task_name,
+        source_object_key=source_object_key,
+        failure_class=failure_class,
+        error_type=type(exc).__name__,
+        error_message=str(exc),
+        attempts=attempts,
+        payload_json=json.dumps(payload),
+    )
+    db.add(row)
+    db.commit()
+    db.refresh(row)
+    return row
+
+
+def list_quarantined_jobs(
+    db: Session,
+    tenant_external_id: str,
+    status: str | None = "quarantined",
+    failure_class: str | None = None,
+    ids: list[int] | None = None,
+    limit: int = 100,
+    after_id: int = 0,
+) -> list[QuarantinedJob]:
+    tenant = get_tenant(db, tenant_external_id)
+    if tenant is None:
+        return []
+    query = select(QuarantinedJob).where(QuarantinedJob.tenant_id == tenant.id, QuarantinedJob.id > after_id)
+    if status is not None:
+        query = query.where(QuarantinedJob.status == status)
+    if failure_class is not None:
+        query = query.where(QuarantinedJob.failure_class == failure_class)
+    if ids is not None:
+        query = query.where(QuarantinedJob.id.in_(ids))
+    return list(db.scalars(query.order_by(QuarantinedJob.id.asc()).limit(limit)))
+
+
+def requeue_quarantined_job(db: Session, row: QuarantinedJob, job_id: str) -> bool:
+    # Claims the row, points the submission at the new job and writes the audit event in one
+    # transaction. False means a concurrent replay claimed the row first.
+    claimed = db.execute(
+        update(QuarantinedJob)
+        .where(QuarantinedJob.id == row.id, QuarantinedJob.status == "quarantined")
+        .values(status="replayed", replayed_at=datetime.now(timezone.utc))
+    )
+    if claimed.rowcount != 1:
+        db.rollback()
+        return False
+    submission = db.scalar(select(Submission).where(Submission.submission_id == row.submission_id))
+    if submission:
+        submission.job_id = job_id
+        submission.job_status = "queued"
+        submission.status = "queued"
+    db.add(
+        AuditLog(
+            tenant_id=row.tenant_id,
+            submission_id=row.submission_id,
+            event_type="job_replayed",
+            details=json.dumps({"job_id": job_id, "replay_of": row.job_id, "quarantine_id": row.id}),
+        )
+    )
+    db.commit()
+    db.refresh(row)
+    return True
+
+
 def generate_idempotency_key(tenant_external_id: str, filename: str, file_sha256: str) -> str:
     return f"{tenant_external_id}:{filename}:{file_sha256[:24]}"
 
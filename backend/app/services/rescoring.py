@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.entities import ProfileVersion
+from app.models.risk import RiskProfile
+from app.schemas.pipeline import CompletenessResult, QuestionSet
+from app.services.contradictions import detect_contradictions
+from app.services.missingness import score_missingness
+from app.services.questions import generate_question_set
+from app.services.repository import (
+    get_tenant,
+    insert_profile_versions,
+    list_latest_profile_versions,
+    max_profile_version_id,
+)
+
+
+@dataclass
+class RescoreCheckpoint:
+    after_tenant_id: int = 0
+    after_id: int = 0
+    max_id: int | None = None
+    scanned: int = 0
+    written: int = 0
+
+    @classmethod
+    def load(cls, path: str | None) -> RescoreCheckpoint:
+        if not path or not Path(path).exists():
+            return cls()
+        return cls(**json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def save(self, path: str | None) -> None:
+        if not path:
+            return
+        # Write-then-rename so an interrupted run never leaves a torn checkpoint behind.
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp = f"{path}.tmp"
+        Path(tmp).write_text(json.dumps(asdict(self)), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+@dataclass
+class RescoreReport:
+    scanned: int
+    written: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.scanned / self.seconds if self.seconds > 0 else 0.0
+
+
+def rescore_profile(profile: RiskProfile) -> tuple[RiskProfile, list[CompletenessResult], QuestionSet]:
+    # Only the stages downstream of extraction run again; the stored profile is the input.
+    fields = {
+        "insured_name": profile.insured_name,
+        "revenue": profile.revenue,
+        "payroll": profile.payroll,
+        "lines_of_business": profile.lines_of_business,
+        "lob_fields": profile.metadata.get("lob_fields", {}),
+    }
+    profile.contradictions = detect_contradictions(fields, profile)
+    completeness = score_missingness(profile)
+    return profile, completeness, generate_question_set(profile.insured_name, completeness)
+
+
+def rescore_portfolio(
+    batch_size: int = 500,
+    checkpoint_path: str | None = None,
+    tenant_external_id: str | None = None,
+    on_batch: Callable[[RescoreCheckpoint, RescoreReport], None] | None = None,
+    session_factory: Callable[[], Session] = SessionLocal,
+) -> RescoreReport:
+    # Pages through the latest ProfileVersion of every submission and writes a new version
+    # wherever contradictions, completeness or questions changed. Progress is checkpointed
+    # after each committed batch; a resumed run skips rows that already have a newer version.
+    checkpoint = RescoreCheckpoint.load(checkpoint_path)
+    started = time.perf_counter()
+    scanned = written = 0
+    with session_factory() as db:
+        tenant_id = None
+        if tenant_external_id is not None:
+            tenant = get_tenant(db, tenant_external_id)
+            if tenant is None:
+                return RescoreReport(scanned=0, written=0, seconds=0.0)
+            tenant_id = tenant.id
+        if checkpoint.max_id is None:
+            checkpoint.max_id = max_profile_version_id(db)
+
+    while True:
+        with session_factory() as db:
+            rows = list_latest_profile_versions(
+                db,
+                after_tenant_id=checkpoint.after_tenant_id,
+                after_id=checkpoint.after_id,
+                max_id=checkpoint.max_id,
+                limit=batch_size,
+                tenant_id=tenant_id,
+            )
+            if not rows:
+                break
+            last_position = rows[-1].tenant_id, rows[-1].id
+            versions, audit_logs = _rescore_batch(rows)
+            try:
+                insert_profile_versions(db, versions, audit_logs)
+            except IntegrityError:
+                # A concurrent writer stored a newer version of a submission in this page; that
+                # version is scored with the current rules already, and re-reading the page skips it.
+                db.rollback()
+                continue
+
+        scanned += len(rows)
+        written += len(versions)
+        checkpoint.after_tenant_id, checkpoint.after_id = last_position
+        checkpoint.scanned += len(rows)
+        checkpoint.written += len(versions)
+        checkpoint.save(checkpoint_path)
+        if on_batch is not None:
+            on_batch(checkpoint, RescoreReport(scanned, written, time.perf_counter() - started))
+
+    if checkpoint_path and Path(checkpoint_path).exists():
+        Path(checkpoint_path).unlink()
+    return RescoreReport(scanned=scanned, written=written, seconds=time.perf_counter() - started)
+
+
+def _rescore_batch(rows: list[ProfileVersion]) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    now = datetime.now(timezone.utc)
+    versions: list[dict[str, Any]] = []
+    audit_logs: list[dict[str, Any]] = []
+    for row in rows:
+        profile = RiskProfile.model_validate_json(row.profile_json)
+        previous_contradictions = list(profile.contradictions)
+        profile, completeness, questions = rescore_profile(profile)
+        completeness_json = json.dumps([item.model_dump() for item in completeness])
+        questions_json = questions.model_dump_json()
+        if (
+            profile.contradictions == previous_contradictions
+            and completeness_json == row.completeness_json
+            and questions_json == row.questions_json
+        ):
+            continue
+
+        profile.version = row.version + 1
+        profile.updated_at = now
+        versions.append(
+            {
+                "submission_id": row.submission_id,
+                "tenant_id": row.tenant_id,
+                "version": profile.version,
+                "profile_json": profile.model_dump_json(),
+                "completeness_json": completeness_json,
+                "questions_json": questions_json,
+                "created_at": now,
+            }
+        )
+        audit_logs.append(
+            {
+                "tenant_id": row.tenant_id,
+                "submission_id": row.submission_id,
+                "event_type": "profile_rescored",
+                "details": json.dumps({"version": profile.version, "previous_version": row.version}),
+                "created_at": now,
+            }
+        )
+    return versions, audit_logs
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from app.services.keywords import KeywordMatcher
+
+
+@dataclass(frozen=True)
+class FieldRule:
+    field: str
+    labels: tuple[str, ...]
+    value_pattern: str
+    normalizer: Callable[[str], Any]
+    confidence: float
+    line_start: bool = False
+
+
+@dataclass(frozen=True)
+class FieldMatch:
+    field: str
+    value: Any
+    snippet: str
+    start: int
+    end: int
+    confidence: float
+
+
+# Every rule is keyed on literal cue labels. One Aho-Corasick pass finds all label hits for
+# all rules, then only the owning rule's value pattern is tried, anchored at the end of the
+# hit, so the cost tracks text length and hit count rather than the number of rules.
+class RuleEngine:
+    def __init__(self, rules: tuple[FieldRule, ...]) -> None:
+        self.rules = rules
+        self._value_patterns = [re.compile(rule.value_pattern, re.IGNORECASE | re.MULTILINE) for rule in rules]
+        self._labels = KeywordMatcher({str(index): list(rule.labels) for index, rule in enumerate(rules)})
+
+    def scan(self, text: str) -> list[FieldMatch]:
+        matches: list[FieldMatch] = []
+        for hit in self._labels.finditer(text):
+            index = int(hit.label)
+            rule = self.rules[index]
+            if rule.line_start and hit.start > 0 and text[hit.start - 1] != "\n":
+                continue
+            value_match = self._value_patterns[index].match(text, hit.end)
+            if value_match is None:
+                continue
+            raw_value = value_match.group("value")
+            value = rule.normalizer(raw_value) if raw_value else None
+            if value is None:
+                continue
+            matches.append(
+                FieldMatch(
+                    field=rule.field,
+                    value=value,
+                    snippet=" ".join(text[hit.start : value_match.end()].split()),
+                    start=hit.start,
+                    end=value_match.end(),
+                    confidence=rule.confidence,
+                )
+            )
+        matches.sort(key=lambda match: match.start)
+        # "annual revenue" also contains the "revenue" label; keep the widest match for each value.
+        seen: set[tuple[str, int]] = set()
+        deduped: list[FieldMatch] = []
+        for match in matches:
+            if (match.field, match.end) not in seen:
+                seen.add((match.field, match.end))
+                deduped.append(match)
+        return deduped
+
+    def first_matches(self, text: str) -> dict[str, FieldMatch]:
+        first: dict[str, FieldMatch] = {}
+        for match in self.scan(text):
+            first.setdefault(match.field, match)
+        return first
+
+
+def _text_value(raw: str) -> str | None:
+    return raw.strip() or None
+
+
+def _money_value(raw: str) -> float | None:
+    cleaned = raw.replace(",", "")
+    return float(cleaned) if cleaned else None
+
+
+_MONEY = r"\s*[:\-]?\s*\$?(?P<value>[0-9,]+(?:\.[0-9]{1,2})?)"
+
+FIELD_RULES: tuple[FieldRule, ...] = (
+    FieldRule(
+        field="insured_name",
+        labels=("insured", "named insured"),
+        value_pattern=r"[ \t]*[:\-][ \t]*(?P<value>.+)$",
+        normalizer=_text_value,
+        confidence=0.82,
+        line_start=True,
+    ),
+    FieldRule(
+        field="revenue",
+        labels=("revenue", "annual revenue"),
+        value_pattern=_MONEY,
+        normalizer=_money_value,
+        confidence=0.78,
+    ),
+    FieldRule(
+        field="payroll",
+        labels=("payroll", "annual payroll"),
+        value_pattern=_MONEY,
+        normalizer=_money_value,
+        confidence=0.78,
+    ),
+)
+
+RULE_ENGINE = RuleEngine(FIELD_RULES)
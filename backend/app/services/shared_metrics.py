@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger("shared_metrics")
+
+_COUNTERS_KEY = "ghostwriter:metrics:counters"
+_SUMMARIES_KEY = "ghostwriter:metrics:summaries"
+
+# One summary is three hash fields (count, sum, max); the script keeps them consistent.
+_OBSERVE_SCRIPT = """
+redis.call('HINCRBY', KEYS[1], ARGV[1] .. '|count', 1)
+redis.call('HINCRBYFLOAT', KEYS[1], ARGV[1] .. '|sum', ARGV[2])
+local current = redis.call('HGET', KEYS[1], ARGV[1] .. '|max')
+if not current or tonumber(ARGV[2]) > tonumber(current) then
+  redis.call('HSET', KEYS[1], ARGV[1] .. '|max', ARGV[2])
+end
+"""
+
+
+# Metrics that the API and every worker process write for the same jobs (queue waits, scheduler
+# slots, failures) only add up in shared storage; the registry in app.core.metrics is per
+# process, so GET /metrics on the API would never see what workers record. Redis keeps them in
+# two hashes that the metrics endpoint merges in; memory falls back to the in-process registry
+# for single-process setups and tests.
+class MemorySharedMetrics:
+    def increment(self, name: str, value: float, labels: dict[str, object]) -> None:
+        metrics.increment(name, value, **labels)
+
+    def observe(self, name: str, value: float, labels: dict[str, object]) -> None:
+        metrics.observe(name, value, **labels)
+
+    def snapshot(self) -> dict[str, dict]:
+        # Already part of the in-process snapshot.
+        return {"counters": {}, "summaries": {}}
+
+
+class RedisSharedMetrics:
+    def increment(self, name: str, value: float, labels: dict[str, object]) -> None:
+        get_redis().hincrbyfloat(_COUNTERS_KEY, metrics.metric_key(name, labels), value)
+
+    def observe(self, name: str, value: float, labels: dict[str, object]) -> None:
+        observe = get_redis().register_script(_OBSERVE_SCRIPT)
+        observe(keys=[_SUMMARIES_KEY], args=[metrics.metric_key(name, labels), value])
+
+    def snapshot(self) -> dict[str, dict]:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.hgetall(_COUNTERS_KEY)
+        pipe.hgetall(_SUMMARIES_KEY)
+        counters, summary_fields = pipe.execute()
+        summaries: dict[str, dict[str, float]] = {}
+        for field, value in summary_fields.items():
+            key, _, stat = field.decode("utf-8").rpartition("|")
+            summaries.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0})[stat] = float(value)
+        return {
+            "counters": {key.decode("utf-8"): float(value) for key, value in counters.items()},
+            "summaries": summaries,
+        }
+
+
+_store: MemorySharedMetrics | RedisSharedMetrics | None = None
+_store_lock = threading.Lock()
+
+
+def get_shared_metrics() -> MemorySharedMetrics | RedisSharedMetrics:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if settings.metrics_backend == "redis":
+                    _store = RedisSharedMetrics()
+                else:
+                    _store = MemorySharedMetrics()
+    return _store
+
+
+def reset_shared_metrics() -> None:
+    global _store
+    _store = None
+
+
+def increment_shared(name: str, value: float = 1.0, **labels: object) -> None:
+    try:
+        get_shared_metrics().increment(name, value, labels)
+    except Exception:
+        # Metrics are best effort; a Redis outage must not fail the job being counted.
+        metrics.increment("shared_metrics_write_failures")
+        logger.warning("Shared metric %s could not be recorded", name, exc_info=True)
+
+
+def observe_shared(name: str, value: float, **labels: object) -> None:
+    try:
+        get_shared_metrics().observe(name, value, labels)
+    except Exception:
+        metrics.increment("shared_metrics_write_failures")
+        logger.warning("Shared metric %s could not be recorded", name, exc_info=True)
+
+
+def shared_snapshot() -> dict[str, Any]:
+    try:
+        return get_shared_metrics().snapshot()
+    except Exception:
+        metrics.increment("shared_metrics_read_failures")
+        logger.warning("Shared metrics could not be read", exc_info=True)
+        return {"counters": {}, "summaries": {}}
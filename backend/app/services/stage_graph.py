@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from app.core import metrics
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    fn: Callable[..., Any]
+    depends_on: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class StageTiming:
+    stage: str
+    started_ms: float
+    wall_ms: float
+    cpu_ms: float
+    seeded: bool = False
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "stage": self.stage,
+            "started_ms": self.started_ms,
+            "wall_ms": self.wall_ms,
+            "cpu_ms": self.cpu_ms,
+            "seeded": self.seeded,
+        }
+
+
+@dataclass
+class StageRun:
+    outputs: dict[str, Any] = field(default_factory=dict)
+    timings: list[StageTiming] = field(default_factory=list)
+    started_at: float = 0.0
+    wall_ms: float = 0.0
+    on_stage: Callable[[StageTiming], None] | None = None
+
+    def record(self, timing: StageTiming) -> None:
+        self.timings.append(timing)
+        if self.on_stage is not None:
+            self.on_stage(timing)
+
+    def timing_report(self) -> list[dict[str, Any]]:
+        return [timing.as_dict() for timing in self.timings]
+
+
+# Stages declare the stages they depend on and receive those outputs as keyword arguments.
+# A stage starts as soon as its dependencies finish: when several are ready they run on the
+# shared stage pool, a lone ready stage runs inline in the calling thread. Seeded outputs
+# stand in for stages that do not need to run again.
+class StageGraph:
+    def __init__(self, stages: list[Stage]) -> None:
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Duplicate stage names")
+        for stage in stages:
+            missing = [name for name in stage.depends_on if name not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {stage.name} depends on unknown stages {missing}")
+        self._check_acyclic()
+
+    def run(
+        self, seeds: dict[str, Any] | None = None, on_stage: Callable[[StageTiming], None] | None = None
+    ) -> StageRun:
+        # on_stage is called in the calling thread as each stage completes (seeded ones first).
+        started = time.perf_counter()
+        run = StageRun(started_at=started, on_stage=on_stage)
+        done: set[str] = set()
+        for name, output in (seeds or {}).items():
+            if name in self.stages:
+                run.outputs[name] = output
+                run.record(StageTiming(name, 0.0, 0.0, 0.0, seeded=True))
+                done.add(name)
+
+        running: dict[Future, str] = {}
+        pending = [name for name in self.stages if name not in done]
+        try:
+            while pending or running:
+                ready = [name for name in pending if all(dep in done for dep in self.stages[name].depends_on)]
+                for name in ready:
+                    pending.remove(name)
+                if len(ready) == 1 and not running:
+                    name = ready[0]
+                    output, timing = self._run_stage(name, run.outputs, started)
+                    self._finish(run, done, name, output, timing)
+                    continue
+                for name in ready:
+                    running[get_stage_executor().submit(self._run_stage, name, run.outputs, started)] = name
+                if not running:
+                    raise RuntimeError(f"Stages {pending} can never run")
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    output, timing = future.result()
+                    self._finish(run, done, name, output, timing)
+        except BaseException:
+            # Let stages already in flight settle before surfacing the first failure.
+            for future in running:
+                future.cancel()
+            wait(running)
+            raise
+
+        run.wall_ms = _ms(time.perf_counter() - started)
+        return run
+
+    def plan(self, targets: list[str], available: dict[str, Any]) -> dict[str, Any]:
+        # Seeds for a run that only has to produce `targets`: stages with an available output are
+        # seeded with it, and stages nothing left to run depends on are seeded with None.
+        required: set[str] = set()
+
+        def require(name: str) -> None:
+            if name in required or name in available:
+                return
+            required.add(name)
+            for dep in self.stages[name].depends_on:
+                require(dep)
+
+        for name in targets:
+            require(name)
+        return {name: available.get(name) for name in self.stages if name not in required}
+
+    def _run_stage(self, name: str, outputs: dict[str, Any], graph_started: float) -> tuple[Any, StageTiming]:
+        stage = self.stages[name]
+        kwargs = {dep: outputs[dep] for dep in stage.depends_on}
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        output = stage.fn(**kwargs)
+        timing = StageTiming(
+            stage=name,
+            started_ms=_ms(wall_started - graph_started),
+            wall_ms=_ms(time.perf_counter() - wall_started),
+            cpu_ms=_ms(time.thread_time() - cpu_started),
+        )
+        return output, timing
+
+    def _finish(self, run: StageRun, done: set[str], name: str, output: Any, timing: StageTiming) -> None:
+        run.outputs[name] = output
+        run.record(timing)
+        done.add(name)
+        metrics.observe("pipeline_stage_wall_ms", timing.wall_ms, stage=name)
+        metrics.observe("pipeline_stage_cpu_ms", timing.cpu_ms, stage=name)
+
+    def _check_acyclic(self) -> None:
+        visiting: set[str] = set()
+        visited: set[str] = set()
+
+        def visit(name: str) -> None:
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage graph has a cycle through {name}")
+            visiting.add(name)
+            for dep in self.stages[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+_stage_executor: ThreadPoolExecutor | None = None
+_stage_executor_lock = threading.Lock()
+
+
+def get_stage_executor() -> ThreadPoolExecutor:
+    global _stage_executor
+    if _stage_executor is None:
+        with _stage_executor_lock:
+            if _stage_executor is None:
+                _stage_executor = ThreadPoolExecutor(
+                    max_workers=settings.pipeline_stage_workers, thread_name_prefix="pipeline-stage"
+                )
+    return _stage_executor
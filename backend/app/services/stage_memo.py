@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import logging
+from hashlib import sha256
+from typing import Any, Callable
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.repository import get_stage_outputs, put_stage_outputs
+from app.services.stage_graph import Stage
+
+logger = logging.getLogger("stage_memo")
+
+
+# Encodes a stage output as JSON, or returns None when that output must not be reused.
+Encoder = Callable[[Any], str | None]
+Decoder = Callable[[str], Any]
+
+
+def stage_cache_keys(
+    stages: list[Stage], versions: dict[str, str], inputs: dict[str, tuple[str, ...]]
+) -> dict[str, str]:
+    # A stage's key covers its own version, its direct inputs and the keys of the stages it
+    # depends on, so any upstream change invalidates everything downstream of it.
+    by_name = {stage.name: stage for stage in stages}
+    keys: dict[str, str] = {}
+
+    def key(name: str) -> str:
+        if name not in keys:
+            parts = [name, versions[name]]
+            parts.extend(key(dep) for dep in by_name[name].depends_on)
+            parts.extend(inputs.get(name, ()))
+            keys[name] = sha256("|".join(parts).encode("utf-8")).hexdigest()
+        return keys[name]
+
+    for name in versions:
+        if name in by_name:
+            key(name)
+    return keys
+
+
+def load_stage_outputs(keys: dict[str, str], decoders: dict[str, Decoder]) -> dict[str, Any]:
+    if not settings.stage_memo_enabled:
+        return {}
+    wanted = {keys[name]: name for name in decoders if name in keys}
+    try:
+        with SessionLocal() as db:
+            stored = get_stage_outputs(db, list(wanted), max_age_seconds=settings.stage_memo_ttl_seconds)
+    except SQLAlchemyError:
+        logger.warning("stage_memo_read_failed", exc_info=True)
+        stored = {}
+
+    outputs: dict[str, Any] = {}
+    for cache_key, name in wanted.items():
+        raw = stored.get(cache_key)
+        if raw is not None:
+            try:
+                outputs[name] = decoders[name](raw)
+            except ValueError:
+                # Written under an older schema; recompute it.
+                logger.warning("stage_memo_decode_failed stage=%s", name)
+        metrics.increment("stage_memo_hits" if name in outputs else "stage_memo_misses", stage=name)
+    return outputs
+
+
+def store_stage_outputs(
+    stages: list[Stage],
+    keys: dict[str, str],
+    versions: dict[str, str],
+    outputs: dict[str, Any],
+    encoders: dict[str, Encoder],
+) -> None:
+    # outputs holds the stages that actually ran, in dependency order. An output its encoder
+    # refuses taints every stage downstream of it, which must then not be reused either.
+    if not settings.stage_memo_enabled:
+        return
+    depends_on = {stage.name: stage.depends_on for stage in stages}
+    tainted: set[str] = set()
+    entries = []
+    for name, output in outputs.items():
+        if any(dep in tainted for dep in depends_on.get(name, ())):
+            tainted.add(name)
+            continue
+        if name not in encoders or name not in keys:
+            continue
+        encoded = encoders[name](output)
+        if encoded is None:
+            tainted.add(name)
+            continue
+        entries.append((keys[name], name, versions[name], encoded))
+    if not entries:
+        return
+    try:
+        with SessionLocal() as db:
+            put_stage_outputs(db, entries, settings.stage_memo_ttl_seconds, settings.stage_memo_max_entries)
+    except SQLAlchemyError:
+        logger.warning("stage_memo_write_failed", exc_info=True)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import mmap
 from pathlib import Path
 from urllib.parse import quote
 
@@ -10,7 +11,10 @@ from app.core.config import settings
 
 
 class StorageClient:
-    def put_bytes(self, key: str, content: bytes, content_type: str) -> str:
+    def put_bytes(self, key: str, content: bytes | memoryview, content_type: str) -> str:
+        raise NotImplementedError
+
+    def get_bytes(self, key: str) -> bytes:
         raise NotImplementedError
 
     def public_url(self, key: str) -> str:
@@ -22,12 +26,15 @@ class LocalStorageClient(StorageClient):
         self.root = Path(root)
         self.root.mkdir(parents=True, exist_ok=True)
 
-    def put_bytes(self, key: str, content: bytes, content_type: str) -> str:
+    def put_bytes(self, key: str, content: bytes | memoryview, content_type: str) -> str:
         destination = self.root / key
         destination.parent.mkdir(parents=True, exist_ok=True)
         destination.write_bytes(content)
         return key
 
+    def get_bytes(self, key: str) -> bytes:
+        return (self.root / key).read_bytes()
+
     def public_url(self, key: str) -> str:
         if settings.storage_public_base_url:
             return f"{settings.storage_public_base_url.rstrip('/')}/{quote(key)}"
@@ -39,10 +46,14 @@ class S3StorageClient(StorageClient):
         self.client = client
         self.bucket = bucket
 
-    def put_bytes(self, key: str, content: bytes, content_type: str) -> str:
-        self.client.put_object(Bucket=self.bucket, Key=key, Body=content, ContentType=content_type)
+    def put_bytes(self, key: str, content: bytes | memoryview, content_type: str) -> str:
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=_request_body(content), ContentType=content_type)
         return key
 
+    def get_bytes(self, key: str) -> bytes:
+        response = self.client.get_object(Bucket=self.bucket, Key=key)
+        return response["Body"].read()
+
     def public_url(self, key: str) -> str:
         if settings.storage_public_base_url:
             return f"{settings.storage_public_base_url.rstrip('/')}/{quote(key)}"
@@ -53,6 +64,16 @@ class S3StorageClient(StorageClient):
         return f"https://{self.bucket}.s3.{region}.amazonaws.com/{quote(key)}"
 
 
+def _request_body(content: bytes | memoryview):
+    if not isinstance(content, memoryview):
+        return content
+    # botocore rejects raw memoryviews; hand it the mapped file instead of copying a spooled upload.
+    if isinstance(content.obj, mmap.mmap):
+        content.obj.seek(0)
+        return content.obj
+    return content.tobytes()
+
+
 def safe_filename(filename: str) -> str:
     allowed = "._-"
     cleaned = "".join(ch if ch.isalnum() or ch in allowed else "_" for ch in filename)
@@ -1,17 +1,63 @@
 from __future__ import annotations
 
 import base64
+import json
+import logging
+import re
+import time
+from typing import Callable
+from uuid import uuid4
 
+from celery import chain, chord
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
 from app.db.session import SessionLocal
-from app.services.pipeline_engine import run_pipeline_bytes
-from app.services.repository import append_audit_log, get_or_create_tenant, mark_submission_job_status
-from app.worker import celery_app
+from app.models.entities import QuarantinedJob
+from app.schemas.pipeline import PipelineResponse
+from app.services.document_text import extract_text
+from app.services.failures import PERMANENT, TRANSIENT_ERRORS, classify_failure
+from app.services.job_scheduler import (
+    PRIORITY_LANE,
+    STANDARD_LANE,
+    dispatch_jobs,
+    release_job,
+    requeue_jobs,
+    submit_job,
+)
+from app.services.job_status import now_iso, update_job_status
+from app.services.pipeline_engine import (
+    compute_payload_sha256,
+    extract_document,
+    finish_merged_pipeline,
+    run_pipeline_bytes,
+    run_pipeline_text,
+)
+from app.services.progress import publish_progress, stage_progress
+from app.services.repository import (
+    append_audit_log,
+    get_or_create_tenant,
+    mark_submission_job_status,
+    quarantine_job,
+    requeue_quarantined_job,
+)
+from app.services.shared_metrics import increment_shared, observe_shared
+from app.services.stage_graph import StageTiming
+from app.services.storage import get_storage
+from app.worker import PRIORITY_IO_QUEUE, PRIORITY_QUEUE, celery_app
+
+logger = logging.getLogger("tasks")
+
+PIPELINE_JOB = "pipeline"
+MULTI_DOCUMENT_JOB = "multi_document"
 
 
+# Runs the whole pipeline in one task. New jobs go through enqueue_pipeline_job; this stays
+# registered on the default queue for messages enqueued before the CPU/I-O split.
 @celery_app.task(
     name="pipeline.process_submission",
     bind=True,
-    autoretry_for=(Exception,),
+    autoretry_for=TRANSIENT_ERRORS,
     retry_backoff=2,
     retry_backoff_max=30,
     retry_jitter=True,
@@ -23,21 +69,27 @@ def process_submission_task(
     submission_id: str,
     filename: str,
     content_type: str,
-    payload_b64: str,
     source_object_key: str,
+    payload_sha256: str | None = None,
+    payload_b64: str | None = None,
 ) -> dict:
-    payload = base64.b64decode(payload_b64.encode("utf-8"))
-    with SessionLocal() as db:
-        tenant = get_or_create_tenant(db, tenant_external_id)
-        mark_submission_job_status(db, submission_id=submission_id, status="running")
-        append_audit_log(
-            db,
-            tenant_id=tenant.id,
-            submission_id=submission_id,
-            event_type="job_running",
-            details={"job_id": self.request.id, "attempt": int(self.request.retries) + 1},
-        )
-        try:
+    try:
+        with SessionLocal() as db:
+            tenant = get_or_create_tenant(db, tenant_external_id)
+            mark_submission_job_status(db, submission_id=submission_id, status="running")
+            append_audit_log(
+                db,
+                tenant_id=tenant.id,
+                submission_id=submission_id,
+                event_type="job_running",
+                details={"job_id": self.request.id, "attempt": int(self.request.retries) + 1},
+            )
+            _report_running(self)
+            if payload_b64 is not None:
+                # Messages enqueued before the claim-check switch still carry the payload inline.
+                payload = base64.b64decode(payload_b64.encode("utf-8"))
+            else:
+                payload = get_storage().get_bytes(source_object_key)
             result = run_pipeline_bytes(
                 db=db,
                 tenant_external_id=tenant_external_id,
@@ -47,6 +99,10 @@ def process_submission_task(
                 persist=True,
                 submission_id=submission_id,
                 source_object_key=source_object_key,
+                payload_sha256=payload_sha256 or compute_payload_sha256(payload),
+                llm_deadline_seconds=settings.llm_async_deadline_seconds,
+                upgrade_late_extraction=settings.llm_late_result_upgrade,
+                on_stage=_stage_reporter(self.request.id),
             )
             mark_submission_job_status(db, submission_id=submission_id, status="processed")
             append_audit_log(
@@ -56,14 +112,547 @@ def process_submission_task(
                 event_type="job_succeeded",
                 details={"job_id": self.request.id},
             )
-            return result.model_dump(mode="json")
-        except Exception as exc:
+    except Exception as exc:
+        replay = {
+            "submission_id": submission_id,
+            "filename": filename,
+            "content_type": content_type,
+            "source_object_key": source_object_key,
+            "payload_sha256": payload_sha256,
+        }
+        _record_job_failure(self, exc, self.request.id, tenant_external_id, PIPELINE_JOB, replay)
+        raise
+    _report_succeeded(self, result)
+    return _result_reference(result)
+
+
+@celery_app.task(
+    name="pipeline.parse_submission",
+    bind=True,
+    autoretry_for=TRANSIENT_ERRORS,
+    retry_backoff=2,
+    retry_backoff_max=30,
+    retry_jitter=True,
+    max_retries=4,
+)
+def parse_submission_task(
+    self,
+    job_id: str,
+    tenant_external_id: str,
+    submission_id: str,
+    filename: str,
+    content_type: str,
+    source_object_key: str,
+    payload_sha256: str,
+    lane: str = STANDARD_LANE,
+    queued_at: float | None = None,
+) -> dict:
+    if queued_at is not None and not self.request.retries:
+        observe_shared("job_queue_wait_seconds", time.time() - queued_at, tenant=tenant_external_id, lane=lane)
+    try:
+        with SessionLocal() as db:
+            tenant = get_or_create_tenant(db, tenant_external_id)
+            mark_submission_job_status(db, submission_id=submission_id, status="running")
+            append_audit_log(
+                db,
+                tenant_id=tenant.id,
+                submission_id=submission_id,
+                event_type="job_running",
+                details={"job_id": job_id, "attempt": int(self.request.retries) + 1, "stage": "extract_text"},
+            )
+        _report_running(self, stage="extract_text", job_id=job_id)
+        text_object_key = _store_extracted_text(
+            tenant_external_id, submission_id, filename, content_type, source_object_key, payload_sha256
+        )
+    except Exception as exc:
+        replay = {
+            "submission_id": submission_id,
+            "filename": filename,
+            "content_type": content_type,
+            "source_object_key": source_object_key,
+            "payload_sha256": payload_sha256,
+        }
+        _record_job_failure(self, exc, job_id, tenant_external_id, PIPELINE_JOB, replay)
+        raise
+    return {"text_object_key": text_object_key}
+
+
+@celery_app.task(
+    name="pipeline.extract_submission",
+    bind=True,
+    autoretry_for=TRANSIENT_ERRORS,
+    retry_backoff=2,
+    retry_backoff_max=30,
+    retry_jitter=True,
+    max_retries=4,
+)
+def extract_submission_task(
+    self,
+    parsed: dict,
+    tenant_external_id: str,
+    submission_id: str,
+    filename: str,
+    content_type: str,
+    source_object_key: str,
+    payload_sha256: str,
+) -> dict:
+    attempt = int(self.request.retries) + 1
+    update_job_status(self.request.id, status="running", stage="extract_facts", attempt=attempt)
+    try:
+        text = get_storage().get_bytes(parsed["text_object_key"]).decode("utf-8")
+        with SessionLocal() as db:
+            result = run_pipeline_text(
+                db=db,
+                tenant_external_id=tenant_external_id,
+                submission_id=submission_id,
+                filename=filename,
+                content_type=content_type,
+                text=text,
+                source_object_key=source_object_key,
+                payload_sha256=payload_sha256,
+                llm_deadline_seconds=settings.llm_async_deadline_seconds,
+                upgrade_late_extraction=settings.llm_late_result_upgrade,
+                on_stage=_stage_reporter(self.request.id),
+            )
+            tenant = get_or_create_tenant(db, tenant_external_id)
+            mark_submission_job_status(db, submission_id=submission_id, status="processed")
+            append_audit_log(
+                db,
+                tenant_id=tenant.id,
+                submission_id=submission_id,
+                event_type="job_succeeded",
+                details={"job_id": self.request.id},
+            )
+    except Exception as exc:
+        replay = {
+            "submission_id": submission_id,
+            "filename": filename,
+            "content_type": content_type,
+            "source_object_key": source_object_key,
+            "payload_sha256": payload_sha256,
+        }
+        _record_job_failure(self, exc, self.request.id, tenant_external_id, PIPELINE_JOB, replay)
+        raise
+    _report_succeeded(self, result)
+    return _result_reference(result)
+
+
+@celery_app.task(
+    name="pipeline.parse_document",
+    autoretry_for=TRANSIENT_ERRORS,
+    retry_backoff=2,
+    retry_backoff_max=30,
+    retry_jitter=True,
+    max_retries=4,
+)
+def parse_document_task(
+    tenant_external_id: str,
+    submission_id: str,
+    filename: str,
+    content_type: str,
+    source_object_key: str,
+    payload_sha256: str,
+) -> dict:
+    text_object_key = _store_extracted_text(
+        tenant_external_id, submission_id, filename, content_type, source_object_key, payload_sha256
+    )
+    return {"text_object_key": text_object_key}
+
+
+@celery_app.task(
+    name="pipeline.extract_document",
+    autoretry_for=TRANSIENT_ERRORS,
+    retry_backoff=2,
+    retry_backoff_max=30,
+    retry_jitter=True,
+    max_retries=4,
+)
+def extract_document_task(
+    parsed: dict | None = None,
+    *,
+    filename: str,
+    content_type: str,
+    source_object_key: str,
+    payload_sha256: str,
+    job_id: str | None = None,
+) -> dict:
+    if parsed is not None:
+        text = get_storage().get_bytes(parsed["text_object_key"]).decode("utf-8")
+        payload = b""
+    else:
+        # Messages enqueued before the CPU/I-O split parse the document here.
+        text = None
+        payload = get_storage().get_bytes(source_object_key)
+    extraction = extract_document(
+        filename=filename,
+        content_type=content_type,
+        payload=payload,
+        payload_sha256=payload_sha256,
+        llm_deadline_seconds=settings.llm_async_deadline_seconds,
+        text=text,
+    )
+    publish_progress(job_id, "document_extracted", filename=filename)
+    return extraction
+
+
+@celery_app.task(
+    name="pipeline.merge_documents",
+    bind=True,
+    autoretry_for=TRANSIENT_ERRORS,
+    retry_backoff=2,
+    retry_backoff_max=30,
+    retry_jitter=True,
+    max_retries=4,
+)
+def merge_documents_task(
+    self,
+    extractions: list[dict],
+    tenant_external_id: str,
+    submission_id: str,
+    documents: list[dict],
+) -> dict:
+    _report_running(self, stage="merge_extractions")
+    publish_progress(self.request.id, "fields_extracted", documents=len(documents))
+    try:
+        with SessionLocal() as db:
+            tenant = get_or_create_tenant(db, tenant_external_id)
+            result = finish_merged_pipeline(
+                db,
+                tenant_external_id=tenant_external_id,
+                submission_id=submission_id,
+                extractions=extractions,
+                documents=documents,
+            )
+            mark_submission_job_status(db, submission_id=submission_id, status="processed")
+            append_audit_log(
+                db,
+                tenant_id=tenant.id,
+                submission_id=submission_id,
+                event_type="job_succeeded",
+                details={"job_id": self.request.id, "documents": len(documents)},
+            )
+    except Exception as exc:
+        replay = {"submission_id": submission_id, "documents": documents}
+        _record_job_failure(self, exc, self.request.id, tenant_external_id, MULTI_DOCUMENT_JOB, replay)
+        raise
+    publish_progress(self.request.id, "persisted")
+    _report_succeeded(self, result)
+    return _result_reference(result)
+
+
+# Error callback of the multi-document chord. A document that fails for good fails the chord, so
+# merge_documents never runs; this quarantines the job in its place. Celery calls it inline in
+# the worker that stored the last header result, with the chord callback's request.
+@celery_app.task(name="pipeline.fail_multi_document")
+def fail_multi_document_task(
+    request, exc: Exception, traceback, tenant_external_id: str, submission_id: str, documents: list[dict]
+) -> None:
+    cause = _chord_failure_cause(exc)
+    # Header tasks retry transient errors, so a transient cause has used up its retries.
+    attempts = 1 if classify_failure(cause) == PERMANENT else extract_document_task.max_retries + 1
+    _fail_job(
+        cause,
+        request.id,
+        tenant_external_id,
+        MULTI_DOCUMENT_JOB,
+        {"submission_id": submission_id, "documents": documents},
+        task_name=extract_document_task.name,
+        attempt=attempts,
+        final=True,
+    )
+
+
+def _chord_failure_cause(exc: Exception) -> Exception:
+    # The result backend reports "Dependency <task id> raised ..."; the failed part's own
+    # exception is still in the backend and classifies the failure better than ChordError.
+    match = re.match(r"Dependency (\S+) raised", str(exc))
+    if match is None:
+        return exc
+    try:
+        cause = celery_app.AsyncResult(match.group(1)).result
+    except Exception:
+        logger.warning("Could not load the failed chord part %s", match.group(1), exc_info=True)
+        return exc
+    return cause if isinstance(cause, Exception) else exc
+
+
+@celery_app.task(name="pipeline.dispatch_scheduled")
+def dispatch_scheduled_task() -> int:
+    # Run by celery beat every JOB_SCHEDULER_SWEEP_SECONDS.
+    jobs = dispatch_jobs()
+    _send_scheduled(jobs)
+    return len(jobs)
+
+
+def schedule_job(kind: str, job_id: str, tenant_external_id: str, lane: str, **kwargs) -> None:
+    # Jobs wait in the per-tenant fair scheduler and reach Celery as slots free up.
+    job = {
+        "kind": kind,
+        "job_id": job_id,
+        "tenant": tenant_external_id,
+        "lane": lane,
+        "queued_at": time.time(),
+        "kwargs": {"tenant_external_id": tenant_external_id, **kwargs},
+    }
+    _send_scheduled(submit_job(job))
+
+
+def _send_scheduled(jobs: list[dict]) -> None:
+    for index, job in enumerate(jobs):
+        try:
+            if job["kind"] == MULTI_DOCUMENT_JOB:
+                enqueue_multi_document_job(job["job_id"], lane=job["lane"], **job["kwargs"])
+            else:
+                enqueue_pipeline_job(job["job_id"], lane=job["lane"], queued_at=job["queued_at"], **job["kwargs"])
+        except Exception:
+            # Most likely the broker is down; put the unsent jobs back rather than lose them.
+            increment_shared("job_scheduler_dispatch_failures")
+            logger.warning("Sending job %s to Celery failed; requeueing", job["job_id"], exc_info=True)
+            requeue_jobs(jobs[index:])
+            return
+        observe_shared(
+            "job_scheduler_wait_seconds", time.time() - job["queued_at"], tenant=job["tenant"], lane=job["lane"]
+        )
+        update_job_status(job["job_id"], dispatched_at=now_iso())
+
+
+def enqueue_pipeline_job(
+    job_id: str,
+    tenant_external_id: str,
+    submission_id: str,
+    filename: str,
+    content_type: str,
+    source_object_key: str,
+    payload_sha256: str,
+    lane: str = STANDARD_LANE,
+    queued_at: float | None = None,
+) -> str:
+    # Text extraction runs on the prefork CPU queue and hands off to the threaded I/O queue for
+    # the LLM round trip and persistence, so a slot waiting on OpenAI never holds up parsing.
+    # The last task runs under job_id so the job status endpoint tracks the whole chain.
+    submission = {
+        "tenant_external_id": tenant_external_id,
+        "submission_id": submission_id,
+        "filename": filename,
+        "content_type": content_type,
+        "source_object_key": source_object_key,
+        "payload_sha256": payload_sha256,
+    }
+    parse = parse_submission_task.s(job_id=job_id, lane=lane, queued_at=queued_at, **submission)
+    extract = extract_submission_task.s(**submission).set(task_id=job_id)
+    if lane == PRIORITY_LANE:
+        parse, extract = parse.set(queue=PRIORITY_QUEUE), extract.set(queue=PRIORITY_IO_QUEUE)
+    return chain(parse, extract).apply_async().id
+
+
+def enqueue_multi_document_job(
+    job_id: str,
+    tenant_external_id: str,
+    submission_id: str,
+    documents: list[dict],
+    lane: str = STANDARD_LANE,
+) -> str:
+    # Fan out one parse -> extract chain per stored document, split across the CPU and I/O
+    # queues like single-document jobs, and fan in on merge_documents_task, which runs under
+    # job_id so the usual job status endpoint tracks the whole chord.
+    header = []
+    for document in documents:
+        fields = {key: document[key] for key in ("filename", "content_type", "source_object_key", "payload_sha256")}
+        parse = parse_document_task.s(tenant_external_id=tenant_external_id, submission_id=submission_id, **fields)
+        extract = extract_document_task.s(job_id=job_id, **fields)
+        if lane == PRIORITY_LANE:
+            parse, extract = parse.set(queue=PRIORITY_QUEUE), extract.set(queue=PRIORITY_IO_QUEUE)
+        header.append(chain(parse, extract))
+    context = {"tenant_external_id": tenant_external_id, "submission_id": submission_id, "documents": documents}
+    callback = merge_documents_task.s(**context).set(task_id=job_id)
+    if lane == PRIORITY_LANE:
+        callback = callback.set(queue=PRIORITY_IO_QUEUE)
+    callback.link_error(fail_multi_document_task.s(**context))
+    return chord(header)(callback).id
+
+
+def _report_running(task, stage: str | None = None, job_id: str | None = None) -> None:
+    job_id = job_id or task.request.id
+    attempt = int(task.request.retries) + 1
+    update_job_status(job_id, status="running", stage=stage, attempt=attempt, started_at=now_iso())
+    publish_progress(job_id, "running", attempt=attempt)
+
+
+def _stage_reporter(job_id: str | None) -> Callable[[StageTiming], None]:
+    publish = stage_progress(job_id)
+
+    def report(timing: StageTiming) -> None:
+        update_job_status(job_id, stage=timing.stage)
+        publish(timing)
+
+    return report
+
+
+def _result_reference(result: PipelineResponse) -> dict:
+    # Tasks return a pointer to the stored ProfileVersion rather than the full response, so the
+    # Celery result backend holds a few bytes per job; readers load the version from the database.
+    return {"submission_id": result.profile.submission_id, "version": result.profile.version}
+
+
+def _report_succeeded(task, result: PipelineResponse) -> None:
+    submission_id = result.profile.submission_id
+    update_job_status(
+        task.request.id,
+        status="succeeded",
+        stage=None,
+        finished_at=now_iso(),
+        result=_result_reference(result),
+    )
+    publish_progress(task.request.id, "succeeded", submission_id=submission_id)
+    _send_scheduled(release_job(task.request.id))
+
+
+def _report_failure(exc: Exception, job_id: str, attempt: int, final: bool) -> None:
+    # autoretry_for re-queues transient failures after this; a permanent failure or the last
+    # attempt is terminal.
+    if not final:
+        update_job_status(job_id, status="retrying", error=str(exc))
+        publish_progress(job_id, "retrying", attempt=attempt, error=str(exc))
+    else:
+        update_job_status(
+            job_id, status="failed", error=str(exc), failure_class=classify_failure(exc), finished_at=now_iso()
+        )
+        publish_progress(job_id, "failed", error=str(exc))
+        _send_scheduled(release_job(job_id))
+
+
+def _is_final_failure(task, exc: Exception) -> bool:
+    return classify_failure(exc) == PERMANENT or task.request.retries >= task.max_retries
+
+
+def _record_job_failure(
+    task, exc: Exception, job_id: str, tenant_external_id: str, job_kind: str, replay: dict
+) -> None:
+    _fail_job(
+        exc,
+        job_id,
+        tenant_external_id,
+        job_kind,
+        replay,
+        task_name=task.name,
+        attempt=int(task.request.retries) + 1,
+        final=_is_final_failure(task, exc),
+    )
+
+
+def _fail_job(
+    exc: Exception,
+    job_id: str,
+    tenant_external_id: str,
+    job_kind: str,
+    replay: dict,
+    task_name: str,
+    attempt: int,
+    final: bool,
+) -> None:
+    increment_shared("job_failures", failure_class=classify_failure(exc))
+    try:
+        _write_job_failure(exc, job_id, tenant_external_id, job_kind, replay, task_name, attempt, final)
+    except Exception:
+        # The database may be what failed; the status record and scheduler slot must still move on.
+        increment_shared("job_failure_record_errors")
+        logger.error("Could not record the failure of job %s", job_id, exc_info=True)
+    _report_failure(exc, job_id, attempt, final)
+
+
+def _write_job_failure(
+    exc: Exception,
+    job_id: str,
+    tenant_external_id: str,
+    job_kind: str,
+    replay: dict,
+    task_name: str,
+    attempt: int,
+    final: bool,
+) -> None:
+    failure_class = classify_failure(exc)
+    submission_id = replay["submission_id"]
+    with SessionLocal() as db:
+        tenant = get_or_create_tenant(db, tenant_external_id)
+        details = {"job_id": job_id, "error": str(exc), "failure_class": failure_class, "attempt": attempt}
+        if not final:
+            append_audit_log(
+                db, tenant_id=tenant.id, submission_id=submission_id, event_type="job_retrying", details=details
+            )
+        else:
+            # The job will not succeed by itself; keep what is needed to replay it once fixed.
+            quarantined = quarantine_job(
+                db,
+                tenant_id=tenant.id,
+                submission_id=submission_id,
+                job_id=job_id,
+                job_kind=job_kind,
+                task_name=task_name,
+                source_object_key=replay.get("source_object_key"),
+                failure_class=failure_class,
+                exc=exc,
+                attempts=attempt,
+                payload=replay,
+            )
+            increment_shared("jobs_quarantined", failure_class=failure_class)
             mark_submission_job_status(db, submission_id=submission_id, status="failed")
             append_audit_log(
                 db,
                 tenant_id=tenant.id,
                 submission_id=submission_id,
                 event_type="job_failed",
-                details={"job_id": self.request.id, "error": str(exc)},
+                details={**details, "quarantine_id": quarantined.id},
             )
-            raise
+
+
+def _store_extracted_text(
+    tenant_external_id: str,
+    submission_id: str,
+    filename: str,
+    content_type: str,
+    source_object_key: str,
+    payload_sha256: str,
+) -> str:
+    payload = get_storage().get_bytes(source_object_key)
+    text = extract_text(filename=filename, content_type=content_type, payload=payload, payload_sha256=payload_sha256)
+    # The text goes to storage rather than into the chain message, like the upload itself.
+    text_object_key = f"extracted/{tenant_external_id}/{submission_id}/{payload_sha256}.txt"
+    get_storage().put_bytes(text_object_key, text.encode("utf-8"), "text/plain; charset=utf-8")
+    return text_object_key
+
+
+def replay_quarantined_jobs(
+    db: Session, tenant_external_id: str, rows: list[QuarantinedJob]
+) -> tuple[list[tuple[QuarantinedJob, str]], list[tuple[QuarantinedJob, str]]]:
+    # Each replay runs as a new job on the standard lane; the submission points at the new job.
+    # A row is marked replayed in the same transaction, before its job is scheduled, so a retried
+    # request never runs it twice; a row that cannot be replayed is reported and stays quarantined.
+    replayed: list[tuple[QuarantinedJob, str]] = []
+    failed: list[tuple[QuarantinedJob, str]] = []
+    for row in rows:
+        try:
+            replay = json.loads(row.payload_json)
+            if row.job_kind == PIPELINE_JOB and not replay.get("payload_sha256"):
+                replay["payload_sha256"] = compute_payload_sha256(get_storage().get_bytes(replay["source_object_key"]))
+            job_id = f"job_{uuid4().hex[:20]}"
+            if not requeue_quarantined_job(db, row, job_id):
+                continue
+        except Exception as exc:
+            db.rollback()
+            increment_shared("quarantine_replay_failures")
+            logger.warning("Could not replay quarantined job %s", row.id, exc_info=True)
+            failed.append((row, str(exc)))
+            continue
+        update_job_status(
+            job_id,
+            status="queued",
+            tenant=tenant_external_id,
+            submission_id=row.submission_id,
+            lane=STANDARD_LANE,
+            attempt=0,
+            queued_at=now_iso(),
+        )
+        publish_progress(job_id, "queued", submission_id=row.submission_id)
+        schedule_job(row.job_kind, job_id, tenant_external_id=tenant_external_id, lane=STANDARD_LANE, **replay)
+        replayed.append((row, job_id))
+    return replayed, failed
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger("text_cache")
+
+
+class ExtractedTextCache:
+    def __init__(self, max_memory_bytes: int, disk_root: str | None = None, max_disk_bytes: int = 0) -> None:
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_root = Path(disk_root) if disk_root else None
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: OrderedDict[str, tuple[str, int]] = OrderedDict()
+        self._memory_bytes = 0
+        # Bytes on disk as seen by this process; None until the first write scans the directory.
+        self._disk_bytes: int | None = None
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            metrics.increment("text_cache_hits", tier="memory")
+            return entry[0]
+
+        text = self._read_disk(key)
+        if text is not None:
+            metrics.increment("text_cache_hits", tier="disk")
+            self._remember(key, text)
+            return text
+
+        metrics.increment("text_cache_misses")
+        return None
+
+    def put(self, key: str, text: str) -> None:
+        self._remember(key, text)
+        self._write_disk(key, text)
+
+    def _remember(self, key: str, text: str) -> None:
+        size = len(text.encode("utf-8"))
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= previous[1]
+            self._entries[key] = (text, size)
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._memory_bytes -= evicted_size
+                metrics.increment("text_cache_evictions")
+            metrics.set_gauge("text_cache_memory_bytes", self._memory_bytes)
+
+    def _disk_path(self, key: str) -> Path | None:
+        if self.disk_root is None:
+            return None
+        *namespace, digest = key.split("/")
+        return self.disk_root.joinpath(*namespace, digest[:2], f"{digest}.txt")
+
+    def _read_disk(self, key: str) -> str | None:
+        path = self._disk_path(key)
+        if path is None:
+            return None
+        try:
+            text = path.read_text(encoding="utf-8")
+            # Reads refresh the mtime so disk eviction drops the least recently used files.
+            os.utime(path)
+            return text
+        except FileNotFoundError:
+            return None
+        except OSError:
+            logger.warning("text_cache_read_failed key=%s", key, exc_info=True)
+            return None
+
+    def _write_disk(self, key: str, text: str) -> None:
+        path = self._disk_path(key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            partial = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            partial.write_text(text, encoding="utf-8")
+            os.replace(partial, path)
+        except OSError:
+            logger.warning("text_cache_write_failed key=%s", key, exc_info=True)
+            return
+        if self.max_disk_bytes > 0:
+            self._account_disk(len(text.encode("utf-8")))
+
+    def _account_disk(self, size: int) -> None:
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+            else:
+                self._disk_bytes += size
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+            metrics.set_gauge("text_cache_disk_bytes", self._disk_bytes)
+
+    def _scan_disk(self) -> list[tuple[float, int, Path]]:
+        files: list[tuple[float, int, Path]] = []
+        for path in self.disk_root.rglob("*.txt"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _evict_disk(self) -> None:
+        # Other workers share the directory, so eviction rescans it rather than trusting the
+        # running total, then drops the oldest files until the tier is back under 90% of its cap.
+        files = sorted(self._scan_disk())
+        total = sum(size for _, size, _ in files)
+        target = self.max_disk_bytes * 0.9
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError:
+                logger.warning("text_cache_evict_failed path=%s", path, exc_info=True)
+                continue
+            total -= size
+            metrics.increment("text_cache_evictions", tier="disk")
+        self._disk_bytes = total
+
+
+def text_cache_key(payload_sha256: str, document_kind: str, extractor_version: str) -> str:
+    return f"{extractor_version}/{document_kind}/{payload_sha256}"
+
+
+_text_cache: ExtractedTextCache | None = None
+
+
+def get_text_cache() -> ExtractedTextCache | None:
+    global _text_cache
+    if not settings.text_cache_enabled:
+        return None
+    if _text_cache is None:
+        _text_cache = ExtractedTextCache(
+            max_memory_bytes=settings.text_cache_memory_max_bytes,
+            disk_root=settings.text_cache_dir or None,
+            max_disk_bytes=settings.text_cache_disk_max_bytes,
+        )
+    return _text_cache
+
+
+def reset_text_cache() -> None:
+    global _text_cache
+    _text_cache = None
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import mmap
+import tempfile
+from hashlib import sha256
+from io import BytesIO
+from typing import BinaryIO
+
+from fastapi import UploadFile
+
+from app.core import metrics
+from app.core.config import settings
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+class SpooledUpload:
+    def __init__(self, filename: str, content_type: str, buffer: BinaryIO, size: int, sha256_hex: str) -> None:
+        self.filename = filename
+        self.content_type = content_type
+        self.size = size
+        self.sha256 = sha256_hex
+        self._buffer = buffer
+        self._mapping: mmap.mmap | None = None
+        self._view: memoryview | None = None
+
+    @property
+    def on_disk(self) -> bool:
+        return not isinstance(self._buffer, BytesIO)
+
+    def view(self) -> memoryview:
+        if self._view is not None:
+            return self._view
+        if isinstance(self._buffer, BytesIO):
+            self._view = self._buffer.getbuffer()
+        elif self.size == 0:
+            self._view = memoryview(b"")
+        else:
+            self._buffer.flush()
+            self._mapping = mmap.mmap(self._buffer.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mapping)
+        return self._view
+
+    def close(self) -> None:
+        try:
+            if self._view is not None:
+                self._view.release()
+                self._view = None
+            if self._mapping is not None:
+                self._mapping.close()
+                self._mapping = None
+            self._buffer.close()
+        except BufferError:
+            # A caller still holds a slice of the view; the mapping is released when it is collected.
+            pass
+
+    def __enter__(self) -> SpooledUpload:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+async def spool_upload(file: UploadFile, max_bytes: int | None = None) -> SpooledUpload:
+    limit = settings.upload_max_bytes if max_bytes is None else max_bytes
+    if file.size is not None and file.size > limit:
+        raise UploadTooLargeError(f"Upload exceeds {limit} bytes")
+
+    digest = sha256()
+    buffer: BinaryIO = BytesIO()
+    size = 0
+    try:
+        while chunk := await file.read(settings.upload_chunk_bytes):
+            size += len(chunk)
+            if size > limit:
+                raise UploadTooLargeError(f"Upload exceeds {limit} bytes")
+            digest.update(chunk)
+            if isinstance(buffer, BytesIO) and size > settings.upload_spool_memory_bytes:
+                spilled = tempfile.TemporaryFile()
+                spilled.write(buffer.getbuffer())
+                buffer.close()
+                buffer = spilled
+            buffer.write(chunk)
+    except BaseException:
+        buffer.close()
+        raise
+
+    upload = SpooledUpload(
+        filename=file.filename or "unknown",
+        content_type=file.content_type or "application/octet-stream",
+        buffer=buffer,
+        size=size,
+        sha256_hex=digest.hexdigest(),
+    )
+    metrics.observe("upload_bytes", size)
+    if upload.on_disk:
+        metrics.increment("upload_spooled_to_disk")
+    return upload
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+from hashlib import sha256
+
+from app.core.config import settings
+from app.services.document_text import EXTRACTOR_VERSION
+from app.services.extraction import (
+    LLM_FIELD_CONFIDENCE,
+    LLM_FIELDS_PROMPT_TEMPLATE,
+    LLM_PROMPT_TEMPLATE,
+    LOB_KEYWORDS,
+    LOB_SCHEMAS,
+)
+from app.services.missingness import REQUIRED_FIELDS_BY_LOB
+from app.services.rules import FIELD_RULES
+
+# Bump when something outside the stage fingerprints below changes what a stored result
+# would look like for the same payload.
+PIPELINE_LOGIC_VERSION = "1"
+
+# Bump a stage's entry when a code change alters what it returns for the same inputs (question
+# wording, contradiction checks, profile merging); refactors and comments leave it alone.
+STAGE_LOGIC_VERSIONS: dict[str, str] = {
+    "extract_facts": "1",
+    "build_profile": "1",
+    "score_missingness": "1",
+    "generate_questions": "1",
+}
+
+
+def pipeline_version() -> str:
+    # Fingerprint of everything that shapes a stored PipelineResponse for a given payload, so
+    # results computed under older rules, extractor or model settings stop matching.
+    fingerprint = {"logic": PIPELINE_LOGIC_VERSION, "stages": stage_versions()}
+    return _digest(fingerprint)
+
+
+def stage_versions() -> dict[str, str]:
+    # Each stage is versioned by its logic version plus the data it reads: extractor version,
+    # rule and vocabulary definitions and LLM settings for extraction, REQUIRED_FIELDS_BY_LOB for
+    # missingness. Changing one invalidates exactly the stages that depend on it.
+    return {
+        "extract_text": EXTRACTOR_VERSION,
+        "extract_facts": _digest(
+            {
+                "logic": STAGE_LOGIC_VERSIONS["extract_facts"],
+                "extractor": EXTRACTOR_VERSION,
+                "rules": [
+                    [rule.field, list(rule.labels), rule.value_pattern, rule.confidence, rule.line_start]
+                    for rule in FIELD_RULES
+                ],
+                "lob_keywords": LOB_KEYWORDS,
+                "lob_schemas": LOB_SCHEMAS,
+                "llm": _llm_fingerprint(),
+            }
+        ),
+        "build_profile": _digest({"logic": STAGE_LOGIC_VERSIONS["build_profile"]}),
+        "score_missingness": _digest(
+            {"logic": STAGE_LOGIC_VERSIONS["score_missingness"], "required_fields": REQUIRED_FIELDS_BY_LOB}
+        ),
+        "generate_questions": _digest({"logic": STAGE_LOGIC_VERSIONS["generate_questions"]}),
+    }
+
+
+def _llm_fingerprint() -> dict | None:
+    if not settings.openai_api_key:
+        return None
+    return {
+        "model": settings.openai_model,
+        "mode": settings.llm_mode,
+        "prompts": [LLM_PROMPT_TEMPLATE, LLM_FIELDS_PROMPT_TEMPLATE],
+        "confidence": LLM_FIELD_CONFIDENCE,
+        "chunk_chars": settings.llm_chunk_chars,
+        "prune": settings.llm_prune_enabled,
+    }
+
+
+def _digest(value: object) -> str:
+    return sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()[:32]
@@ -2,15 +2,44 @@ from celery import Celery
 
 from app.core.config import settings
 
+# Prefork workers consume CPU_QUEUE (text extraction) and the default queue; a threaded worker
+# with high concurrency consumes IO_QUEUE, where tasks mostly wait on OpenAI and the database.
+# Every step of a priority-lane job runs on PRIORITY_QUEUE (CPU) or PRIORITY_IO_QUEUE, which
+# dedicated workers consume. The Redis transport polls a worker's queues round robin, so the
+# order in -Q is not a priority; reserved capacity is what keeps these jobs ahead of bulk work.
+CPU_QUEUE = "ghostwriter.cpu"
+IO_QUEUE = "ghostwriter.io"
+PRIORITY_QUEUE = "ghostwriter.priority"
+PRIORITY_IO_QUEUE = "ghostwriter.priority.io"
+
 celery_app = Celery("ghostwriter", broker=settings.redis_url, backend=settings.redis_url)
 celery_app.conf.update(
     task_serializer="json",
     accept_content=["json"],
     result_serializer="json",
+    # Clients read the compact job status record and /jobs/{id}/result; full results in the
+    # backend only need to outlive chord fan-in and legacy polling.
+    result_expires=settings.celery_result_expires_seconds,
     imports=("app.services.tasks",),
     task_acks_late=True,
     worker_prefetch_multiplier=1,
     task_default_queue="ghostwriter",
     task_default_exchange="ghostwriter",
     task_default_routing_key="ghostwriter.default",
+    task_routes={
+        "pipeline.parse_submission": {"queue": CPU_QUEUE},
+        "pipeline.parse_document": {"queue": CPU_QUEUE},
+        "pipeline.extract_submission": {"queue": IO_QUEUE},
+        "pipeline.extract_document": {"queue": IO_QUEUE},
+        "pipeline.merge_documents": {"queue": IO_QUEUE},
+        "pipeline.dispatch_scheduled": {"queue": IO_QUEUE},
+    },
+    # The beat service sweeps the job scheduler so slots of crashed workers are reclaimed
+    # without waiting for other traffic.
+    beat_schedule={
+        "dispatch-scheduled-jobs": {
+            "task": "pipeline.dispatch_scheduled",
+            "schedule": settings.job_scheduler_sweep_seconds,
+        },
+    },
 )
@@ -0,0 +1,115 @@
+"""Jobs per second with one mixed Celery queue versus the CPU/I-O queue split.
+
+Runs in-process workers on Celery's memory transport, so no Redis is needed. Parsing is real
+PDF text extraction; the OpenAI round trip is simulated with a sleep. Every worker slot is a
+solo-pool worker thread, so parsing shares one GIL in both layouts; on a node the CPU queue runs
+prefork and parsing scales with cores as well. Run from ``backend/``::
+
+    python -m benchmarks.celery_queues --jobs 64 --slots 4 --io-concurrency 32 --llm-ms 400
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from contextlib import ExitStack
+
+from celery import Celery, chain
+from celery.contrib.testing.worker import start_worker
+
+from app.core.config import settings
+from app.services import document_text
+from benchmarks.pdf_extraction import build_synthetic_pdf
+
+CPU_QUEUE = "bench.cpu"
+IO_QUEUE = "bench.io"
+MIXED_QUEUE = "bench.mixed"
+
+app = Celery("bench", broker="memory://", backend="cache+memory://")
+app.conf.update(
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    worker_hijack_root_logger=False,
+    # The memory transport polls; the default one-second interval would dominate the timings.
+    broker_transport_options={"polling_interval": 0.005},
+)
+_state: dict = {}
+
+
+@app.task(name="bench.parse")
+def parse_task() -> int:
+    return len(document_text.extract_pdf_pages(_state["pdf"]))
+
+
+@app.task(name="bench.extract")
+def extract_task(pages: int) -> int:
+    time.sleep(_state["llm_seconds"])
+    return pages
+
+
+@app.task(name="bench.pipeline")
+def pipeline_task() -> int:
+    return extract_task(parse_task())
+
+
+def _drain(results: list, jobs: int, started: float) -> float:
+    for result in results:
+        result.get(timeout=600, interval=0.005)
+    return jobs / (time.perf_counter() - started)
+
+
+def _workers(stack: ExitStack, queue: str, count: int) -> None:
+    # The threads pool stalls on the memory transport whenever its prefetch window is full, so
+    # each slot gets a solo-pool worker of its own.
+    for _ in range(count):
+        stack.enter_context(start_worker(app, pool="solo", queues=[queue], perform_ping_check=False))
+
+
+def run_mixed(jobs: int, slots: int) -> float:
+    with ExitStack() as stack:
+        _workers(stack, MIXED_QUEUE, slots)
+        started = time.perf_counter()
+        results = [pipeline_task.apply_async(queue=MIXED_QUEUE) for _ in range(jobs)]
+        return _drain(results, jobs, started)
+
+
+def run_split(jobs: int, slots: int, io_concurrency: int) -> float:
+    with ExitStack() as stack:
+        _workers(stack, CPU_QUEUE, slots)
+        _workers(stack, IO_QUEUE, io_concurrency)
+        started = time.perf_counter()
+        results = [
+            chain(parse_task.s().set(queue=CPU_QUEUE), extract_task.s().set(queue=IO_QUEUE)).apply_async()
+            for _ in range(jobs)
+        ]
+        return _drain(results, jobs, started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=64)
+    parser.add_argument("--pages", type=int, default=12)
+    parser.add_argument("--slots", type=int, default=4, help="worker slots of the mixed and CPU pools")
+    parser.add_argument("--io-concurrency", type=int, default=32)
+    parser.add_argument("--llm-ms", type=float, default=400.0)
+    args = parser.parse_args()
+
+    # Page sharding would fan out to a process pool of its own; keep each parse on its slot.
+    settings.pdf_extract_workers = 1
+    _state["pdf"] = build_synthetic_pdf(args.pages)
+    _state["llm_seconds"] = args.llm_ms / 1000
+
+    started = time.perf_counter()
+    document_text.extract_pdf_pages(_state["pdf"])
+    parse_ms = (time.perf_counter() - started) * 1000
+    print(f"parse {parse_ms:.1f} ms/job, simulated LLM {args.llm_ms:.0f} ms/job, {args.jobs} jobs")
+
+    mixed = run_mixed(args.jobs, args.slots)
+    print(f"mixed queue  slots={args.slots:<3}                    {mixed:7.2f} jobs/s")
+    split = run_split(args.jobs, args.slots, args.io_concurrency)
+    print(f"split queues cpu={args.slots:<3} io={args.io_concurrency:<3}              {split:7.2f} jobs/s")
+    print(f"speedup {split / mixed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Chunked LLM extraction latency vs document length against a simulated model endpoint.
+
+The stub charges a fixed round trip plus a per-character cost, so a single request
+over the whole document would grow linearly with length. Run from ``backend/``::
+
+    python -m benchmarks.llm_chunking --base-latency 0.4 --ms-per-kchar 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from app.core.config import settings
+from app.services import extraction
+
+
+class SimulatedGateway:
+    def __init__(self, base_latency: float, seconds_per_char: float) -> None:
+        self.base_latency = base_latency
+        self.seconds_per_char = seconds_per_char
+
+    def complete_json(self, system: str, user: str, model: str | None = None) -> str:
+        time.sleep(self.base_latency + len(user) * self.seconds_per_char)
+        return json.dumps({"insured_name": None, "revenue": None, "payroll": None, "lines_of_business": ["GL"]})
+
+
+def synthetic_packet(pages: int) -> str:
+    page = "General liability schedule\n\n" + "Location 14, class 91585, premium basis payroll.\n" * 60
+    return "\f".join(f"Page {index}\n{page}" for index in range(pages))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-latency", type=float, default=0.4)
+    parser.add_argument("--ms-per-kchar", type=float, default=40.0)
+    parser.add_argument("--concurrency", type=int, default=settings.llm_max_concurrency)
+    args = parser.parse_args()
+
+    gateway = SimulatedGateway(args.base_latency, args.ms_per_kchar / 1000 / 1000)
+    extraction.get_llm_gateway = lambda: gateway
+    settings.llm_cache_enabled = False
+    settings.llm_max_concurrency = args.concurrency
+
+    for pages in (2, 8, 24, 64, 128):
+        text = synthetic_packet(pages)
+        single_request = args.base_latency + len(text) * gateway.seconds_per_char
+        start = time.perf_counter()
+        result = extraction._extract_with_llm(text, "packet.pdf", ["GL"])
+        elapsed = time.perf_counter() - start
+        print(
+            f"pages={pages:<4} chars={len(text):>8,}  chunks={result['debug']['chunks']:<2} "
+            f"chunked={elapsed:6.2f}s  one request over full text={single_request:6.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
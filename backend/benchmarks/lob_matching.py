@@ -0,0 +1,89 @@
+"""LOB inference on ~1 MB texts: per-keyword substring scans vs the compiled matcher.
+
+Run from ``backend/``::
+
+    python -m benchmarks.lob_matching --size-mb 1
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import time
+
+from app.services.extraction import LOB_KEYWORDS
+from app.services.keywords import KeywordMatcher
+
+
+def legacy_infer_lobs(raw_text: str, keywords: dict[str, list[str]]) -> list[str]:
+    lowered = raw_text.lower()
+    found: list[str] = []
+    for lob, terms in keywords.items():
+        if any(term in lowered for term in terms):
+            found.append(lob)
+    return sorted(set(found))
+
+
+def expanded_vocabulary(synonyms_per_lob: int, rng: random.Random) -> dict[str, list[str]]:
+    lobs = dict(LOB_KEYWORDS)
+    for extra in ("PROPERTY", "UMBRELLA", "CYBER", "EO"):
+        lobs[extra] = [f"{extra.lower()} coverage"]
+    expanded: dict[str, list[str]] = {}
+    for lob, terms in lobs.items():
+        synonyms = list(terms)
+        while len(synonyms) < synonyms_per_lob:
+            word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 9)))
+            synonyms.append(f"{word} {lob.lower()} form")
+        expanded[lob] = synonyms
+    return expanded
+
+
+def synthetic_text(size_bytes: int, rng: random.Random) -> str:
+    words = ["insured", "location", "premium", "schedule", "limit", "policy", "deductible", "class", "loss", "run"]
+    parts: list[str] = []
+    size = 0
+    while size < size_bytes:
+        line = " ".join(rng.choices(words, k=12))
+        parts.append(line)
+        size += len(line) + 1
+    # Keywords appear near the end so neither approach can stop early.
+    parts.append("General Liability; Workers Compensation; commercial auto")
+    return "\n".join(parts)
+
+
+def best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    text = synthetic_text(int(args.size_mb * 1024 * 1024), rng)
+    print(f"text: {len(text) / 1_048_576:.2f} MiB")
+    for synonyms in (3, 25, 100, 400):
+        vocabulary = expanded_vocabulary(synonyms, rng)
+        term_count = sum(len(terms) for terms in vocabulary.values())
+        matcher = KeywordMatcher(vocabulary)
+        assert matcher.matched_labels(text) == legacy_infer_lobs(text, vocabulary)
+
+        legacy = best_of(lambda: legacy_infer_lobs(text, vocabulary), args.repeats)
+        compiled = best_of(lambda: matcher.matched_labels(text), args.repeats)
+        with_offsets = best_of(lambda: matcher.scan(text), args.repeats)
+        print(
+            f"terms={term_count:<5} substring={legacy * 1000:8.1f} ms  matcher={compiled * 1000:8.1f} ms  "
+            f"matcher+offsets={with_offsets * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
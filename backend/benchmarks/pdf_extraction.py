@@ -0,0 +1,70 @@
+"""Wall-clock scaling of page-sharded PDF extraction.
+
+Run from ``backend/``::
+
+    python -m benchmarks.pdf_extraction --pages 240 --max-workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+import fitz
+
+from app.core.config import settings
+from app.services import document_text
+
+LINE = "Location {page}-{row}: 1200 Industrial Pkwy, Payroll $482,000, Class 3632, Vehicles 14, Drivers 18"
+
+
+def build_synthetic_pdf(pages: int, rows_per_page: int = 45) -> bytes:
+    doc = fitz.open()
+    for page_index in range(pages):
+        page = doc.new_page()
+        text = "\n".join(LINE.format(page=page_index, row=row) for row in range(rows_per_page))
+        page.insert_textbox(fitz.Rect(36, 36, 576, 756), text, fontsize=8)
+    payload = doc.tobytes()
+    doc.close()
+    return payload
+
+
+def time_extraction(payload: bytes, workers: int, repeats: int) -> float:
+    settings.pdf_extract_workers = workers
+    settings.pdf_parallel_min_pages = 1
+    document_text._disable_pdf_executor()
+    document_text._pdf_executor_failed = False
+    # Warm the pool so process start-up is not billed to the first sample.
+    document_text.extract_pdf_pages(payload)
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        document_text.extract_pdf_pages(payload)
+        best = min(best, time.perf_counter() - start)
+    document_text._disable_pdf_executor()
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=240)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    payload = build_synthetic_pdf(args.pages)
+    print(f"synthetic pdf: {args.pages} pages, {len(payload) / 1_048_576:.1f} MiB")
+
+    baseline = time_extraction(payload, workers=1, repeats=args.repeats)
+    print(f"workers=1  {baseline * 1000:8.1f} ms  speedup 1.00x")
+    workers = 2
+    while workers <= args.max_workers:
+        elapsed = time_extraction(payload, workers=workers, repeats=args.repeats)
+        print(f"workers={workers:<2} {elapsed * 1000:8.1f} ms  speedup {baseline / elapsed:.2f}x")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Saturate /pipeline/run and sample /health latency against a running API.
+
+Run from ``backend/`` with the API up (e.g. ``docker compose up``)::
+
+    python -m benchmarks.pipeline_load --base-url http://localhost:8000 --concurrency 32 --duration 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+from app.core.config import settings
+
+DEFAULT_DOCUMENT = (
+    b"Insured: Load Test Manufacturing LLC\nAnnual Revenue: $5200000\nAnnual Payroll: $1800000\n"
+    b"General Liability\nWorkers Compensation\n"
+)
+
+
+async def _login(client: httpx.AsyncClient) -> dict[str, str]:
+    response = await client.post(
+        f"{settings.api_prefix}/auth/login",
+        json={"email": settings.auth_seed_email, "password": settings.auth_seed_password},
+    )
+    response.raise_for_status()
+    body = response.json()
+    return {"Authorization": f"Bearer {body['access_token']}", "x-tenant-id": body["tenant_id"]}
+
+
+async def _pipeline_worker(
+    client: httpx.AsyncClient,
+    headers: dict[str, str],
+    document: tuple[str, bytes, str],
+    deadline: float,
+    statuses: Counter,
+) -> None:
+    while time.perf_counter() < deadline:
+        response = await client.post(f"{settings.api_prefix}/pipeline/run", files={"file": document}, headers=headers)
+        statuses[response.status_code] += 1
+        if response.status_code == 503:
+            await asyncio.sleep(float(response.headers.get("retry-after", "1")) / 10)
+
+
+async def _health_sampler(client: httpx.AsyncClient, deadline: float, interval: float) -> list[float]:
+    samples: list[float] = []
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get("/health")
+        response.raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return samples
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run(args: argparse.Namespace) -> None:
+    document_bytes = Path(args.file).read_bytes() if args.file else DEFAULT_DOCUMENT
+    document = (Path(args.file).name if args.file else "load.txt", document_bytes, args.content_type)
+    limits = httpx.Limits(max_connections=args.concurrency + 4)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=120, limits=limits) as client:
+        headers = await _login(client)
+        idle = await _health_sampler(client, time.perf_counter() + 2, args.interval)
+
+        statuses: Counter = Counter()
+        deadline = time.perf_counter() + args.duration
+        workers = [
+            asyncio.create_task(_pipeline_worker(client, headers, document, deadline, statuses))
+            for _ in range(args.concurrency)
+        ]
+        loaded = await _health_sampler(client, deadline, args.interval)
+        await asyncio.gather(*workers)
+
+    for label, samples in (("idle", idle), ("saturated", loaded)):
+        print(
+            f"/health {label:<9} n={len(samples):<5} p50={statistics.median(samples):7.1f} ms "
+            f"p99={_percentile(samples, 99):7.1f} ms"
+        )
+    print("/pipeline/run status codes:", dict(sorted(statuses.items())))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--interval", type=float, default=0.05)
+    parser.add_argument("--file", default="")
+    parser.add_argument("--content-type", default="text/plain")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
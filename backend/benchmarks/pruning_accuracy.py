@@ -0,0 +1,76 @@
+"""Offline check that keyword-window pruning keeps the fields full-text extraction finds.
+
+Runs every fixture packet through extraction twice, on the full text and on the pruned
+text, and compares the extracted fields. Rules extraction is used by default; ``--llm``
+uses the configured OpenAI endpoint (``OPENAI_API_KEY`` / ``OPENAI_BASE_URL``) and also
+reports measured latency. Run from ``backend/``::
+
+    python -m benchmarks.pruning_accuracy
+    python -m benchmarks.pruning_accuracy --llm
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from app.core.config import settings
+from app.services import extraction
+
+FIXTURES = Path(__file__).parent / "fixtures" / "pruning"
+COMPARED_FIELDS = ("insured_name", "revenue", "payroll", "lines_of_business")
+
+
+def extract(text: str, filename: str, use_llm: bool) -> tuple[dict, float]:
+    lobs = extraction.infer_lobs(text)
+    start = time.perf_counter()
+    if use_llm:
+        result = extraction._extract_with_llm(text, filename, lobs)
+        if result is None:
+            raise SystemExit(f"LLM extraction failed for {filename}")
+    else:
+        result = extraction._extract_with_rules(text, filename, lobs)
+    return result["fields"], time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--llm", action="store_true")
+    parser.add_argument("--context-lines", type=int, default=settings.llm_prune_context_lines)
+    parser.add_argument("--token-budget", type=int, default=settings.llm_prune_token_budget)
+    args = parser.parse_args()
+    if args.llm and not settings.openai_api_key:
+        raise SystemExit("--llm needs OPENAI_API_KEY")
+    settings.llm_cache_enabled = False
+    settings.llm_prune_enabled = False
+
+    mismatches = 0
+    total_original = total_kept = 0
+    for path in sorted(FIXTURES.glob("*.txt")):
+        text = path.read_text(encoding="utf-8")
+        pruned = extraction.TEXT_PRUNER.prune(text, args.context_lines, args.token_budget)
+        full_fields, full_seconds = extract(text, path.name, args.llm)
+        pruned_fields, pruned_seconds = extract(pruned.text, path.name, args.llm)
+
+        differing = [field for field in COMPARED_FIELDS if full_fields.get(field) != pruned_fields.get(field)]
+        mismatches += bool(differing)
+        total_original += pruned.original_tokens
+        total_kept += pruned.kept_tokens
+        line = (
+            f"{path.stem:<24} tokens {pruned.original_tokens:>6} -> {pruned.kept_tokens:>6} "
+            f"({pruned.removed_tokens / pruned.original_tokens:5.1%} removed, {pruned.windows} windows)"
+        )
+        if args.llm:
+            line += f"  latency {full_seconds:5.2f}s -> {pruned_seconds:5.2f}s"
+        print(line + ("  OK" if not differing else f"  MISMATCH {differing}"))
+
+    print(f"total tokens {total_original} -> {total_kept} ({1 - total_kept / total_original:.1%} removed)")
+    if mismatches:
+        print(f"{mismatches} packet(s) extracted differently after pruning")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Rule extraction cost as the rule count grows: one regex pass per rule vs the label-keyed engine.
+
+Run from ``backend/``::
+
+    python -m benchmarks.rule_engine
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import string
+import time
+
+from app.services.rules import FIELD_RULES, FieldRule, RuleEngine, _money_value
+
+WORDS = ["insured", "location", "premium", "schedule", "limit", "policy", "deductible", "class", "loss", "run"]
+
+
+def synthetic_rules(count: int, rng: random.Random) -> tuple[FieldRule, ...]:
+    rules = list(FIELD_RULES)
+    while len(rules) < count:
+        label = "".join(rng.choices(string.ascii_lowercase, k=8))
+        rules.append(
+            FieldRule(
+                field=f"synthetic_{len(rules)}",
+                labels=(label, f"annual {label}"),
+                value_pattern=r"\s*[:\-]?\s*\$?(?P<value>[0-9,]+(?:\.[0-9]{1,2})?)",
+                normalizer=_money_value,
+                confidence=0.7,
+            )
+        )
+    return tuple(rules)
+
+
+def per_rule_search(rules: tuple[FieldRule, ...], text: str) -> dict[str, re.Match]:
+    found: dict[str, re.Match] = {}
+    for rule in rules:
+        labels = "|".join(re.escape(label) for label in rule.labels)
+        match = re.search(f"(?:{labels}){rule.value_pattern}", text, re.IGNORECASE | re.MULTILINE)
+        if match:
+            found[rule.field] = match
+    return found
+
+
+def synthetic_text(lines: int, rng: random.Random) -> str:
+    body = [" ".join(rng.choices(WORDS, k=12)) for _ in range(lines)]
+    body.append("Insured: Atlas Fabrication LLC")
+    body.append("Annual Revenue: $5,200,000")
+    body.append("Annual Payroll: $1,800,000")
+    return "\n".join(body)
+
+
+def best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=4000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    text = synthetic_text(args.lines, rng)
+    print(f"text: {len(text) / 1024:.0f} KiB")
+    for count in (3, 10, 30, 100, 300):
+        rules = synthetic_rules(count, rng)
+        engine = RuleEngine(rules)
+        assert set(engine.first_matches(text)) == set(per_rule_search(rules, text))
+
+        naive = best_of(lambda: per_rule_search(rules, text), args.repeats)
+        compiled = best_of(lambda: engine.scan(text), args.repeats)
+        print(f"rules={count:<4} per-rule passes={naive * 1000:8.2f} ms  engine={compiled * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Peak Python heap per upload: whole-body read vs chunked spooling.
+
+Run from ``backend/``::
+
+    python -m benchmarks.upload_memory --size-mb 80
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import tempfile
+import tracemalloc
+from hashlib import sha256
+
+from fastapi import UploadFile
+
+from app.services.uploads import spool_upload
+
+
+def _upload_file(size_bytes: int) -> UploadFile:
+    backing = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    block = b"%PDF-1.7 synthetic payload block\n" * 32768
+    remaining = size_bytes
+    while remaining > 0:
+        backing.write(block[:remaining])
+        remaining -= len(block)
+    backing.seek(0)
+    return UploadFile(file=backing, filename="large.pdf", size=size_bytes)
+
+
+async def legacy_read(file: UploadFile) -> None:
+    payload = await file.read()
+    sha256(payload).hexdigest()
+    base64.b64encode(payload).decode("utf-8")
+
+
+async def spooled(file: UploadFile) -> None:
+    with await spool_upload(file) as upload:
+        view = upload.view()
+        sha256(view).hexdigest()
+
+
+def peak_bytes(handler, size_bytes: int) -> int:
+    file = _upload_file(size_bytes)
+    tracemalloc.start()
+    asyncio.run(handler(file))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    file.file.close()
+    return peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=80)
+    args = parser.parse_args()
+
+    size_bytes = args.size_mb * 1024 * 1024
+    for name, handler in (("read()+b64", legacy_read), ("spooled", spooled)):
+        peak = peak_bytes(handler, size_bytes)
+        print(f"{name:<11} upload={args.size_mb} MiB  peak heap={peak / 1_048_576:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import argparse
+
+from app.services.rescoring import RescoreCheckpoint, RescoreReport, rescore_portfolio
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Recompute contradictions, completeness and questions for every stored submission."
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--checkpoint", default="./storage/rescore-checkpoint.json")
+    parser.add_argument("--tenant", default=None, help="Only rescore this tenant's submissions")
+    args = parser.parse_args()
+
+    def progress(checkpoint: RescoreCheckpoint, report: RescoreReport) -> None:
+        print(
+            f"scanned={checkpoint.scanned} written={checkpoint.written} "
+            f"rows_per_sec={report.rows_per_second:.1f}"
+        )
+
+    report = rescore_portfolio(
+        batch_size=args.batch_size,
+        checkpoint_path=args.checkpoint or None,
+        tenant_external_id=args.tenant,
+        on_batch=progress,
+    )
+    print(
+        f"Rescored {report.scanned} profiles, wrote {report.written} new versions "
+        f"in {report.seconds:.2f}s ({report.rows_per_second:.1f} rows/sec)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
+import json
 import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
 
 os.environ["DATABASE_URL"] = "sqlite+pysqlite:///:memory:"
 os.environ["AUTH_SECRET_KEY"] = "test-secret"
@@ -7,14 +12,29 @@ os.environ["AUTH_DISABLED"] = "false"
 os.environ["AUTH_SEED_EMAIL"] = "admin@ghostwriter.dev"
 os.environ["AUTH_SEED_PASSWORD"] = "ChangeMe123!"
 os.environ["AUTH_SEED_TENANT_ID"] = "demo-brokerage"
+os.environ["TEXT_CACHE_DIR"] = ""
+os.environ["LLM_BREAKER_STATE_PATH"] = ""
+os.environ["PROGRESS_BACKEND"] = "memory"
+os.environ["JOB_STATUS_BACKEND"] = "memory"
+os.environ["JOB_SCHEDULER_BACKEND"] = "memory"
+os.environ["METRICS_BACKEND"] = "memory"
 
 import pytest
 from fastapi.testclient import TestClient
 
+from app.core import metrics
+from app.core.config import settings
 from app.db.base import Base
 from app.db.session import engine
 from app.main import app
 from app.models import entities  # noqa: F401
+from app.services.circuit_breaker import reset_llm_breaker
+from app.services.job_scheduler import reset_job_scheduler
+from app.services.job_status import reset_job_status_store
+from app.services.llm_gateway import reset_llm_gateway
+from app.services.progress import reset_progress_bus
+from app.services.shared_metrics import reset_shared_metrics
+from app.services.text_cache import reset_text_cache
 
 
 @pytest.fixture(autouse=True)
@@ -24,6 +44,21 @@ def reset_db() -> None:
     yield
 
 
+@pytest.fixture(autouse=True)
+def reset_caches() -> None:
+    reset_text_cache()
+    reset_llm_gateway()
+    reset_llm_breaker()
+    reset_progress_bus()
+    reset_job_status_store()
+    reset_job_scheduler()
+    reset_shared_metrics()
+    metrics.reset()
+    yield
+    reset_llm_gateway()
+    reset_llm_breaker()
+
+
 @pytest.fixture()
 def client() -> TestClient:
     return TestClient(app)
@@ -41,3 +76,72 @@ def auth_headers(client: TestClient) -> dict[str, str]:
         "Authorization": f"Bearer {token}",
         "x-tenant-id": "demo-brokerage",
     }
+
+
+class FakeOpenAI:
+    def __init__(self) -> None:
+        self.requests: list[dict] = []
+        self.response: dict | Callable[[dict], dict] = {"insured_name": None, "revenue": None, "payroll": None, "lines_of_business": []}
+        self.base_url = ""
+        self.delay_seconds = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connections: set[int] = set()
+        self._lock = threading.Lock()
+
+    def chat_completion(self, body: dict) -> dict:
+        with self._lock:
+            self.requests.append(body)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        response = self.response(body) if callable(self.response) else self.response
+        try:
+            if self.delay_seconds:
+                time.sleep(self.delay_seconds)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        return {
+            "id": f"chatcmpl-{len(self.requests)}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body.get("model", ""),
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": json.dumps(response)},
+                }
+            ],
+        }
+
+
+@pytest.fixture()
+def fake_openai(monkeypatch) -> FakeOpenAI:
+    fake = FakeOpenAI()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self) -> None:
+            fake.connections.add(self.client_address[1])
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            payload = json.dumps(fake.chat_completion(body)).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    fake.base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    monkeypatch.setattr(settings, "openai_api_key", "test-key")
+    monkeypatch.setattr(settings, "openai_base_url", fake.base_url)
+    yield fake
+    server.shutdown()
+    server.server_close()
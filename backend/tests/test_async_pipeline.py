@@ -1,15 +1,15 @@
-from types import SimpleNamespace
-
 from fastapi.testclient import TestClient
 
+from app.db.session import SessionLocal
 from app.schemas.pipeline import PipelineResponse
+from app.services import storage
+from app.services.repository import create_queued_submission, get_submission_by_job
+from app.services.storage import LocalStorageClient
+from app.services.tasks import process_submission_task
 
 
 def test_pipeline_run_async_accepts_job(client: TestClient, auth_headers: dict[str, str], monkeypatch) -> None:
-    monkeypatch.setattr(
-        "app.api.routes.pipeline.process_submission_task.apply_async",
-        lambda task_id, kwargs: SimpleNamespace(id=task_id),
-    )
+    monkeypatch.setattr("app.services.tasks.enqueue_pipeline_job", lambda job_id, **kwargs: job_id)
 
     response = client.post(
         "/api/v1/pipeline/run-async",
@@ -21,6 +21,79 @@ def test_pipeline_run_async_accepts_job(client: TestClient, auth_headers: dict[s
     assert "submission_id" in response.json()
 
 
+def test_pipeline_run_async_sends_storage_key_not_payload(
+    client: TestClient,
+    auth_headers: dict[str, str],
+    monkeypatch,
+    tmp_path,
+) -> None:
+    monkeypatch.setattr(storage, "_storage", LocalStorageClient(root=str(tmp_path)))
+    sent: dict = {}
+
+    def fake_enqueue(job_id, **kwargs):
+        sent.update(kwargs)
+        return job_id
+
+    monkeypatch.setattr("app.services.tasks.enqueue_pipeline_job", fake_enqueue)
+
+    response = client.post(
+        "/api/v1/pipeline/run-async",
+        files={"file": ("submission.txt", b"Insured: Demo", "text/plain")},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    assert "payload_b64" not in sent
+    assert (tmp_path / sent["source_object_key"]).read_bytes() == b"Insured: Demo"
+
+
+def test_process_submission_task_reads_payload_from_storage(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch, tmp_path
+) -> None:
+    monkeypatch.setattr(storage, "_storage", LocalStorageClient(root=str(tmp_path)))
+    source_key = "submissions/demo-brokerage/sub_claim/submission.txt"
+    storage.get_storage().put_bytes(source_key, b"Insured: Claim Check Co\nGeneral Liability", "text/plain")
+
+    with SessionLocal() as db:
+        create_queued_submission(
+            db=db,
+            tenant_external_id="demo-brokerage",
+            submission_id="sub_claim",
+            filename="submission.txt",
+            content_type="text/plain",
+            source_object_key=source_key,
+            idempotency_key="demo-brokerage:submission.txt:claim",
+            job_id="job_claim",
+        )
+
+    result = process_submission_task.apply(
+        kwargs={
+            "tenant_external_id": "demo-brokerage",
+            "submission_id": "sub_claim",
+            "filename": "submission.txt",
+            "content_type": "text/plain",
+            "source_object_key": source_key,
+        },
+    ).get()
+
+    assert result == {"submission_id": "sub_claim", "version": 1}
+    with SessionLocal() as db:
+        assert get_submission_by_job(db, "job_claim").job_status == "processed"
+
+    # Without a status record, the reference in the result backend is resolved from the database.
+    class FakeResult:
+        status = "SUCCESS"
+
+        def successful(self) -> bool:
+            return True
+
+    FakeResult.result = result
+    monkeypatch.setattr("app.api.routes.pipeline.celery_app.AsyncResult", lambda _job_id: FakeResult())
+    payload = client.get("/api/v1/pipeline/jobs/job_claim", headers=auth_headers).json()
+    assert (payload["status"], payload["submission_id"]) == ("succeeded", "sub_claim")
+    assert payload["result"]["profile"]["insured_name"] == "Claim Check Co"
+
+
 def test_pipeline_job_status_succeeded(client: TestClient, auth_headers: dict[str, str], monkeypatch) -> None:
     result = PipelineResponse.model_validate(
         {
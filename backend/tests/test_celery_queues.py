@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+from app.db.session import SessionLocal
+from app.services import pipeline_engine, storage, tasks
+from app.services.job_status import read_job_status
+from app.services.progress import get_progress_bus
+from app.services.repository import create_queued_submission, get_submission_by_job
+from app.services.tasks import enqueue_pipeline_job
+from app.worker import CPU_QUEUE, IO_QUEUE, PRIORITY_IO_QUEUE, PRIORITY_QUEUE, celery_app
+
+
+def test_parse_and_extraction_tasks_route_to_separate_queues() -> None:
+    router = celery_app.amqp.router
+    assert router.route({}, "pipeline.parse_submission")["queue"].name == CPU_QUEUE
+    assert router.route({}, "pipeline.extract_submission")["queue"].name == IO_QUEUE
+    assert router.route({}, "pipeline.merge_documents")["queue"].name == IO_QUEUE
+    assert router.route({}, "pipeline.parse_document")["queue"].name == CPU_QUEUE
+    assert router.route({}, "pipeline.extract_document")["queue"].name == IO_QUEUE
+
+
+def test_split_pipeline_hands_extracted_text_to_io_task(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(storage, "_storage", storage.LocalStorageClient(root=str(tmp_path)))
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    payload = b"Insured: Split Queue Co\nGeneral Liability"
+    source_key = "submissions/demo-brokerage/sub_split/submission.txt"
+    storage.get_storage().put_bytes(source_key, payload, "text/plain")
+    with SessionLocal() as db:
+        create_queued_submission(
+            db=db,
+            tenant_external_id="demo-brokerage",
+            submission_id="sub_split",
+            filename="submission.txt",
+            content_type="text/plain",
+            source_object_key=source_key,
+            idempotency_key="demo-brokerage:split",
+            job_id="job_split",
+        )
+
+    def no_parsing(**_kwargs):
+        raise AssertionError("the I/O task must not parse the document again")
+
+    # Only the parse task may extract text; the I/O side reads it back from storage.
+    monkeypatch.setattr(pipeline_engine, "extract_text", no_parsing)
+    job_id = enqueue_pipeline_job(
+        "job_split",
+        tenant_external_id="demo-brokerage",
+        submission_id="sub_split",
+        filename="submission.txt",
+        content_type="text/plain",
+        source_object_key=source_key,
+        payload_sha256=pipeline_engine.compute_payload_sha256(payload),
+    )
+
+    assert job_id == "job_split"
+    assert list((tmp_path / "extracted" / "demo-brokerage" / "sub_split").iterdir())
+    record = read_job_status("job_split")
+    assert (record["status"], record["attempt"]) == ("succeeded", 1)
+    assert record["result"] == {"submission_id": "sub_split", "version": 1}
+    events = [event["event"] for event in get_progress_bus()._events["job_split"]]
+    assert events[0] == "running" and events[-1] == "succeeded"
+    with SessionLocal() as db:
+        assert get_submission_by_job(db, "job_split").job_status == "processed"
+
+
+def test_priority_lane_routes_every_step_to_priority_queues(monkeypatch) -> None:
+    sent: list = []
+
+    class CapturedChain:
+        def __init__(self, *steps) -> None:
+            self.steps = steps
+
+        def apply_async(self):
+            sent.append(self.steps)
+            return SimpleNamespace(id=self.steps[-1].options["task_id"])
+
+    monkeypatch.setattr(tasks, "chain", CapturedChain)
+    document = {"filename": "a.txt", "content_type": "text/plain", "source_object_key": "k", "payload_sha256": "0" * 64}
+    for lane in ("priority", "standard"):
+        tasks.enqueue_pipeline_job("job_lane", "demo-brokerage", "sub_lane", lane=lane, **document)
+
+    assert [[step.options.get("queue") for step in steps] for steps in sent] == [
+        [PRIORITY_QUEUE, PRIORITY_IO_QUEUE],
+        [None, None],
+    ]
@@ -0,0 +1,99 @@
+from app.core.config import settings
+from app.services.canonical import build_canonical_profile
+from app.services.chunking import split_text
+from app.services.extraction import extract_risk_facts, reduce_llm_chunks
+
+
+def test_split_text_packs_sections_and_tracks_pages() -> None:
+    text = "Named Insured: Demo Co\n\nSummary\fPayroll schedule\n\nDriver list\fLoss runs summary"
+
+    chunks = split_text(text, max_chars=40)
+
+    assert [chunk.text for chunk in chunks] == [
+        "Named Insured: Demo Co\n\nSummary",
+        "Payroll schedule\n\nDriver list",
+        "Loss runs summary",
+    ]
+    assert [(chunk.first_page, chunk.last_page) for chunk in chunks] == [(1, 1), (2, 2), (3, 3)]
+    assert all(text[chunk.start : chunk.end].strip().replace("\f", "\n\n") == chunk.text for chunk in chunks)
+
+
+def test_split_text_cuts_oversized_sections_on_line_breaks() -> None:
+    text = "\n".join(f"driver {index:03d}" for index in range(20))
+
+    chunks = split_text(text, max_chars=50)
+
+    assert all(len(chunk.text) <= 50 for chunk in chunks)
+    assert "\n".join(chunk.text for chunk in chunks) == text
+    assert chunks[0].first_page is None
+
+
+def test_split_text_grows_chunks_to_respect_max_chunks() -> None:
+    text = "\n\n".join(f"section {index} " + "x" * 80 for index in range(30))
+
+    chunks = split_text(text, max_chars=200, max_chunks=4)
+
+    assert len(chunks) <= 4
+    assert "section 29" in chunks[-1].text
+    assert split_text("  \n ", max_chars=10) == []
+
+
+def test_chunked_llm_extraction_reads_the_whole_document(fake_openai, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "llm_chunk_chars", 2000)
+    monkeypatch.setattr(settings, "llm_max_concurrency", 4)
+    fake_openai.delay_seconds = 0.02
+
+    def respond(body: dict) -> dict:
+        text = body["messages"][1]["content"]
+        found = {"insured_name": None, "revenue": None, "payroll": None, "lines_of_business": ["GL"]}
+        if "Named Insured" in text:
+            found.update(insured_name="Demo Co", field_confidence={"insured_name": 0.95})
+        if "Payroll schedule" in text:
+            found.update(payroll=250000, lines_of_business=["WC"], field_confidence={"payroll": 0.8})
+        return found
+
+    fake_openai.response = respond
+    filler = "\f".join("General liability exposure notes.\n\n" + f"Narrative line {page}.\n" * 100 for page in range(6))
+    text = "Named Insured: Demo Co\n\n" + filler + "\fPayroll schedule\nTotal payroll 250,000"
+
+    result = extract_risk_facts(raw_text=text, filename="packet.pdf")
+
+    assert len(fake_openai.requests) == result["debug"]["chunks"] > 1
+    assert fake_openai.max_in_flight > 1
+    assert result["fields"]["insured_name"] == "Demo Co"
+    assert result["fields"]["payroll"] == 250000.0
+    assert result["fields"]["lines_of_business"] == ["GL", "WC"]
+    assert result["confidence"]["payroll"] == 0.8
+    assert result["citations"]["payroll"][0]["page_end"] == 7
+    profile = build_canonical_profile("sub-1", result)
+    assert (profile.source_citations["payroll"][0].page, profile.source_citations["payroll"][0].page_end) == (6, 7)
+
+
+def test_reducer_prefers_confident_candidates_and_earliest_ties() -> None:
+    first, second, third = split_text("a\n\nb\n\nc", max_chars=1)
+    candidates = [
+        (first, {"revenue": "1,000", "field_confidence": {"revenue": 0.4}, "insured_name": "Early Co"}),
+        (second, {"revenue": 2000, "field_confidence": {"revenue": 0.7}, "insured_name": "Late Co"}),
+        (third, {"revenue": None, "lob_fields": {"GL": {"locations": 3}}}),
+    ]
+
+    result = reduce_llm_chunks(candidates, filename="a.pdf", inferred_lobs=["GL"])
+
+    assert result["fields"]["revenue"] == 2000.0
+    assert result["confidence"]["revenue"] == 0.7
+    assert result["fields"]["insured_name"] == "Early Co"
+    assert result["confidence"]["insured_name"] == 0.9
+    assert result["fields"]["lob_fields"] == {"GL": {"locations": 3}}
+    assert result["debug"]["field_sources"] == {"insured_name": 0, "revenue": 1}
+
+
+def test_malformed_chunk_answers_are_ignored(fake_openai) -> None:
+    fake_openai.response = {"insured_name": "Odd Co", "lines_of_business": [{"line": "GL"}, "WC"], "lob_fields": []}
+
+    result = extract_risk_facts(raw_text="Named Insured: Demo Co\nWorkers comp payroll", filename="a.txt")
+
+    assert result["debug"]["mode"] == "llm"
+    assert result["fields"]["lines_of_business"] == ["WC"]
+    assert reduce_llm_chunks(
+        [(split_text("a", max_chars=10)[0], {"lines_of_business": 5})], filename="a.pdf", inferred_lobs=["GL"]
+    )["fields"]["lines_of_business"] == ["GL"]
@@ -0,0 +1,100 @@
+import socket
+
+from app.core import metrics
+from app.core.config import settings
+from app.services.circuit_breaker import CircuitBreaker, FileBreakerStore, MemoryBreakerStore, get_llm_breaker
+from app.services.extraction import extract_risk_facts
+
+
+def _breaker(store, clock, **overrides) -> CircuitBreaker:
+    options = {
+        "window_seconds": 60,
+        "min_calls": 4,
+        "failure_rate": 0.5,
+        "slow_call_seconds": 5,
+        "slow_call_rate": 0.75,
+        "open_seconds": 30,
+    }
+    options.update(overrides)
+    return CircuitBreaker(name="test", store=store, clock=lambda: clock[0], **options)
+
+
+def test_breaker_opens_on_failure_rate_and_recovers_through_one_probe() -> None:
+    clock = [1000.0]
+    breaker = _breaker(MemoryBreakerStore(), clock)
+
+    for success in (True, False, True, False):
+        assert breaker.allow()
+        breaker.record(success, 0.1)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    clock[0] += 31
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+    breaker.record(True, 0.1)
+    assert breaker.state == "closed"
+    assert metrics.counter_value("llm_breaker_short_circuits", breaker="test") == 2
+
+
+def test_breaker_opens_on_slow_calls_and_failed_probe_reopens() -> None:
+    clock = [1000.0]
+    breaker = _breaker(MemoryBreakerStore(), clock)
+
+    for latency in (6, 7, 1, 8):
+        breaker.record(True, latency)
+    assert breaker.state == "open"
+
+    clock[0] += 31
+    assert breaker.allow()
+    breaker.record(False, 0.1)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_file_store_shares_state_between_breakers(tmp_path) -> None:
+    clock = [1000.0]
+    path = tmp_path / "breaker.json"
+    first = _breaker(FileBreakerStore(str(path)), clock, min_calls=2)
+    second = _breaker(FileBreakerStore(str(path)), clock, min_calls=2)
+
+    first.record(False, 0.1)
+    second.record(False, 0.1)
+
+    assert first.state == second.state == "open"
+    assert not second.allow()
+
+
+def test_open_breaker_routes_extraction_to_rules(monkeypatch) -> None:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        closed_port = probe.getsockname()[1]
+    monkeypatch.setattr(settings, "openai_api_key", "test-key")
+    monkeypatch.setattr(settings, "openai_base_url", f"http://127.0.0.1:{closed_port}/v1")
+    monkeypatch.setattr(settings, "openai_max_retries", 0)
+    monkeypatch.setattr(settings, "llm_breaker_min_calls", 2)
+
+    for _ in range(3):
+        result = extract_risk_facts(raw_text="Insured: Atlas LLC\nGeneral Liability", filename="a.txt")
+        assert result["debug"]["mode"] == "rules"
+
+    assert get_llm_breaker().state == "open"
+    assert metrics.counter_value("llm_request_failures") == 2
+    assert metrics.counter_value("llm_breaker_short_circuits", breaker="llm") == 1
+    assert metrics.snapshot()["gauges"]["llm_breaker_state{breaker=llm}"] == 2
+
+
+def test_probe_without_llm_request_is_released(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "openai_api_key", "test-key")
+    monkeypatch.setattr(settings, "llm_mode", "tiered")
+    monkeypatch.setattr(settings, "llm_breaker_backend", "memory")
+    breaker = get_llm_breaker()
+    breaker.store.transact(lambda state: state.update(state="open", opened_at=0.0))
+
+    # Rules cover every field, so the half-open probe never reaches the LLM.
+    result = extract_risk_facts(raw_text="Insured: Atlas LLC\nGeneral Liability\nRevenue: $100,000", filename="a.txt")
+
+    assert result["debug"]["llm_fields"] == []
+    assert breaker.state == "half_open"
+    assert breaker.allow()
@@ -0,0 +1,61 @@
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.services import versioning
+
+CONTENT = b"Insured: Atlas Fabrication LLC\nAnnual Revenue: $5200000\nGeneral Liability"
+
+
+def _run(client: TestClient, auth_headers: dict[str, str], dedupe: bool) -> dict:
+    response = client.post(
+        "/api/v1/pipeline/run",
+        params={"dedupe": str(dedupe).lower()},
+        files={"file": ("submission.txt", CONTENT, "text/plain")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def _submission_count(client: TestClient, auth_headers: dict[str, str]) -> int:
+    return len(client.get("/api/v1/submissions", headers=auth_headers).json())
+
+
+def test_dedupe_returns_stored_result_for_identical_payload(client: TestClient, auth_headers: dict[str, str]) -> None:
+    first = _run(client, auth_headers, dedupe=True)
+    second = _run(client, auth_headers, dedupe=True)
+
+    assert second["profile"] == first["profile"]
+    assert second["debug"] == {"deduplicated_from": first["profile"]["submission_id"], "profile_version": 1}
+    assert _submission_count(client, auth_headers) == 1
+    assert metrics.counter_value("pipeline_dedupe_hits") == 1
+
+
+def test_dedupe_is_opt_in(client: TestClient, auth_headers: dict[str, str]) -> None:
+    first = _run(client, auth_headers, dedupe=False)
+    second = _run(client, auth_headers, dedupe=False)
+
+    assert second["profile"]["submission_id"] != first["profile"]["submission_id"]
+    assert _submission_count(client, auth_headers) == 2
+
+
+def test_pipeline_version_change_invalidates_dedupe(client: TestClient, auth_headers: dict[str, str], monkeypatch) -> None:
+    first = _run(client, auth_headers, dedupe=True)
+    old_version = versioning.pipeline_version()
+    monkeypatch.setattr(versioning, "PIPELINE_LOGIC_VERSION", "test-bump")
+    assert versioning.pipeline_version() != old_version
+
+    second = _run(client, auth_headers, dedupe=True)
+
+    assert second["profile"]["submission_id"] != first["profile"]["submission_id"]
+    assert "deduplicated_from" not in second["debug"]
+
+
+def test_stage_versions_change_only_with_declared_versions_and_data(monkeypatch) -> None:
+    before = versioning.stage_versions()
+    monkeypatch.setitem(versioning.STAGE_LOGIC_VERSIONS, "generate_questions", "test-bump")
+    monkeypatch.setitem(versioning.REQUIRED_FIELDS_BY_LOB, "GL", ["insured_name"])
+    after = versioning.stage_versions()
+
+    changed = {stage for stage in before if before[stage] != after[stage]}
+    assert changed == {"generate_questions", "score_missingness"}
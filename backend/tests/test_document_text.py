@@ -0,0 +1,53 @@
+import fitz
+
+from app.core.config import settings
+from app.services import document_text
+from app.services.document_text import extract_pdf_pages, extract_text
+
+
+def _build_pdf(page_count: int, blank_pages: tuple[int, ...] = ()) -> bytes:
+    doc = fitz.open()
+    for index in range(page_count):
+        page = doc.new_page()
+        if index not in blank_pages:
+            page.insert_text((72, 72), f"Schedule page {index}")
+    payload = doc.tobytes()
+    doc.close()
+    return payload
+
+
+def test_extract_pdf_pages_serial_keeps_page_order() -> None:
+    pages = extract_pdf_pages(_build_pdf(3))
+    assert [page.strip() for page in pages] == ["Schedule page 0", "Schedule page 1", "Schedule page 2"]
+
+
+def test_extract_pdf_pages_sharded_matches_serial(monkeypatch) -> None:
+    payload = _build_pdf(10)
+    serial = extract_pdf_pages(payload)
+
+    monkeypatch.setattr(settings, "pdf_extract_workers", 2)
+    monkeypatch.setattr(settings, "pdf_parallel_min_pages", 4)
+    monkeypatch.setattr(settings, "pdf_min_pages_per_shard", 3)
+    try:
+        sharded = extract_pdf_pages(payload)
+    finally:
+        document_text._disable_pdf_executor()
+        monkeypatch.setattr(document_text, "_pdf_executor_failed", False)
+
+    assert sharded == serial
+    assert "Schedule page 9" in extract_text("loss_runs.pdf", "application/pdf", payload)
+
+
+def test_pdfplumber_fallback_only_runs_on_empty_pages(monkeypatch) -> None:
+    calls: list[list[int]] = []
+
+    def fake_plumber(payload: bytes, page_indices: list[int]) -> list[str]:
+        calls.append(page_indices)
+        return [f"Scanned page {index}" for index in page_indices]
+
+    monkeypatch.setattr(document_text, "_extract_plumber_pages", fake_plumber)
+
+    text = extract_text("acord.pdf", "application/pdf", _build_pdf(3, blank_pages=(1,)))
+
+    assert calls == [[1]]
+    assert text.splitlines() == ["Schedule page 0", "Scanned page 1", "Schedule page 2"]
@@ -0,0 +1,210 @@
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.redis import reset_redis
+from app.services import storage
+from app.services.job_scheduler import (
+    JobScheduler,
+    MemoryJobSchedulerStore,
+    get_job_scheduler,
+    job_lane,
+    reset_job_scheduler,
+)
+from app.services.job_status import read_job_status
+from app.services.shared_metrics import increment_shared, reset_shared_metrics
+from app.services.storage import LocalStorageClient
+from app.services.tasks import dispatch_scheduled_task, enqueue_pipeline_job
+from app.worker import celery_app
+
+
+def _scheduler(max_in_flight: int = 1, tenant_max_in_flight: int = 8, **kwargs) -> JobScheduler:
+    return JobScheduler(
+        store=MemoryJobSchedulerStore(),
+        max_in_flight=max_in_flight,
+        tenant_max_in_flight=tenant_max_in_flight,
+        tenant_weights=kwargs.pop("tenant_weights", {}),
+        in_flight_timeout_seconds=kwargs.pop("in_flight_timeout_seconds", 3600),
+        **kwargs,
+    )
+
+
+def _job(tenant: str, index: int, lane: str = "standard") -> dict:
+    return {"job_id": f"{tenant}-{index}", "tenant": tenant, "lane": lane, "kind": "pipeline", "queued_at": 0.0}
+
+
+def _drain(scheduler: JobScheduler, first: list[dict], releases: int) -> list[str]:
+    order = [job["job_id"] for job in first]
+    for _ in range(releases):
+        sent = scheduler.release(order[-1])
+        order.extend(job["job_id"] for job in sent)
+    return order
+
+
+def test_bulk_tenant_does_not_starve_others() -> None:
+    scheduler = _scheduler()
+    first = scheduler.submit(_job("bulk", 0))
+    for index in range(1, 50):
+        assert scheduler.submit(_job("bulk", index)) == []
+    assert scheduler.submit(_job("small", 0)) == []
+    assert scheduler.submit(_job("small", 1)) == []
+
+    order = _drain(scheduler, first, 5)
+    assert order == ["bulk-0", "bulk-1", "small-0", "bulk-2", "small-1", "bulk-3"]
+
+
+def test_weights_set_jobs_per_round() -> None:
+    scheduler = _scheduler(tenant_weights={"a": 2})
+    first = scheduler.submit(_job("a", 0))
+    for index in range(1, 6):
+        scheduler.submit(_job("a", index))
+    for index in range(3):
+        scheduler.submit(_job("b", index))
+
+    assert _drain(scheduler, first, 6) == ["a-0", "a-1", "a-2", "b-0", "a-3", "a-4", "b-1"]
+
+
+def test_tenant_in_flight_cap_leaves_room_for_others() -> None:
+    scheduler = _scheduler(max_in_flight=10, tenant_max_in_flight=2)
+    sent = [job["job_id"] for index in range(5) for job in scheduler.submit(_job("a", index))]
+    sent += [job["job_id"] for job in scheduler.submit(_job("b", 0))]
+    assert sent == ["a-0", "a-1", "b-0"]
+    assert [job["job_id"] for job in scheduler.release("a-0")] == ["a-2"]
+
+
+def test_priority_lane_goes_first() -> None:
+    scheduler = _scheduler()
+    first = scheduler.submit(_job("bulk", 0))
+    scheduler.submit(_job("bulk", 1))
+    scheduler.submit(_job("bulk", 2, lane="priority"))
+    assert _drain(scheduler, first, 2) == ["bulk-0", "bulk-2", "bulk-1"]
+
+
+def test_expired_slots_are_reclaimed() -> None:
+    now = [0.0]
+    scheduler = _scheduler(in_flight_timeout_seconds=60, clock=lambda: now[0])
+    scheduler.submit(_job("a", 0))
+    assert scheduler.submit(_job("a", 1)) == []
+    now[0] = 61.0
+    assert [job["job_id"] for job in scheduler.submit(_job("b", 0))] == ["a-1"]
+    assert metrics.counter_value("job_scheduler_expired_slots", tenant="a") == 1
+
+
+def test_run_async_holds_jobs_over_the_tenant_cap(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch, tmp_path
+) -> None:
+    monkeypatch.setattr(storage, "_storage", LocalStorageClient(root=str(tmp_path)))
+    monkeypatch.setattr(settings, "job_scheduler_tenant_max_in_flight", 1)
+    reset_job_scheduler()
+    sent: list[dict] = []
+
+    def fake_enqueue(job_id, **kwargs):
+        sent.append({"job_id": job_id, **kwargs})
+        return job_id
+
+    monkeypatch.setattr("app.services.tasks.enqueue_pipeline_job", fake_enqueue)
+    jobs = [
+        client.post(
+            f"/api/v1/pipeline/run-async{query}",
+            files={"file": (f"submission-{index}.txt", f"Insured: Fair Co {index}".encode(), "text/plain")},
+            headers=auth_headers,
+        ).json()["job_id"]
+        for index, query in enumerate(["?priority=true", ""])
+    ]
+
+    assert [job["job_id"] for job in sent] == jobs[:1]
+    first, second = read_job_status(jobs[0]), read_job_status(jobs[1])
+    assert (first["lane"], second["lane"]) == ("priority", "standard")
+    assert first["dispatched_at"] is not None and "dispatched_at" not in second
+
+    # Finishing the first job frees the tenant's slot for the second.
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    enqueue_pipeline_job(**sent[0])
+    assert [job["job_id"] for job in sent] == jobs
+    assert sent[1]["lane"] == "standard"
+    assert metrics.snapshot()["summaries"]["job_queue_wait_seconds{lane=priority,tenant=demo-brokerage}"]["count"] == 1
+
+
+def test_unsent_jobs_are_requeued(client: TestClient, auth_headers: dict[str, str], monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(storage, "_storage", LocalStorageClient(root=str(tmp_path)))
+    calls: list[str] = []
+
+    def broker_down(job_id, **kwargs):
+        calls.append(job_id)
+        raise ConnectionError("broker unavailable")
+
+    monkeypatch.setattr("app.services.tasks.enqueue_pipeline_job", broker_down)
+    response = client.post(
+        "/api/v1/pipeline/run-async",
+        files={"file": ("submission.txt", b"Insured: Requeue Co", "text/plain")},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    assert metrics.counter_value("job_scheduler_dispatch_failures") == 1
+    assert read_job_status(response.json()["job_id"])["status"] == "queued"
+    monkeypatch.setattr("app.services.tasks.enqueue_pipeline_job", lambda job_id, **kwargs: calls.append(job_id))
+    client.post(
+        "/api/v1/pipeline/run-async",
+        files={"file": ("other.txt", b"Insured: Next Co", "text/plain")},
+        headers=auth_headers,
+    )
+    assert calls[1] == response.json()["job_id"]
+
+
+def test_sweep_dispatches_jobs_held_by_expired_slots(monkeypatch) -> None:
+    now = [0.0]
+    scheduler = _scheduler(in_flight_timeout_seconds=60, clock=lambda: now[0])
+    monkeypatch.setattr("app.services.job_scheduler._scheduler", scheduler)
+    sent: list[str] = []
+    monkeypatch.setattr("app.services.tasks.enqueue_pipeline_job", lambda job_id, **kwargs: sent.append(job_id))
+    scheduler.submit({**_job("a", 0), "kwargs": {}})
+    scheduler.submit({**_job("a", 1), "kwargs": {}})
+
+    assert dispatch_scheduled_task.apply().get() == 0
+    # The worker running a-0 died; nothing else is submitted or released.
+    now[0] = 61.0
+    assert dispatch_scheduled_task.apply().get() == 1
+    assert sent == ["a-1"]
+
+
+def test_priority_lane_is_opt_in(monkeypatch) -> None:
+    assert job_lane(None, 200 * 1024) == "standard"
+    assert job_lane(True, 200 * 1024) == "priority"
+    monkeypatch.setattr(settings, "job_scheduler_priority_max_bytes", 64 * 1024)
+    assert (job_lane(None, 10 * 1024), job_lane(None, 200 * 1024)) == ("priority", "standard")
+
+
+def test_metrics_require_the_operator_token(client: TestClient, auth_headers: dict[str, str], monkeypatch) -> None:
+    assert client.get("/metrics", headers=auth_headers).status_code == 403
+
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+    monkeypatch.setattr(settings, "job_scheduler_tenant_max_in_flight", 1)
+    reset_job_scheduler()
+    assert client.get("/metrics", headers=auth_headers).status_code == 401
+    get_job_scheduler().submit(_job("a", 0))
+    get_job_scheduler().submit(_job("a", 1))
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+
+    assert response.status_code == 200
+    gauges = response.json()["gauges"]
+    assert gauges["job_scheduler_in_flight"] == 1
+    assert gauges["job_scheduler_pending{lane=standard,tenant=a}"] == 1
+
+
+def test_shared_metrics_outage_is_counted_not_raised(client: TestClient, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "metrics_backend", "redis")
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+    monkeypatch.setattr(settings, "redis_url", "redis://127.0.0.1:1/0")
+    reset_redis()
+    reset_shared_metrics()
+    try:
+        increment_shared("job_scheduler_fallbacks")
+        assert metrics.counter_value("shared_metrics_write_failures") == 1
+
+        response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+        assert response.status_code == 200
+        assert response.json()["counters"]["shared_metrics_read_failures"] == 1
+    finally:
+        reset_redis()
+        reset_shared_metrics()
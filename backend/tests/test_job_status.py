@@ -0,0 +1,126 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services import storage
+from app.services.job_status import read_job_status, update_job_status
+from app.services.repository import create_queued_submission
+from app.services.storage import LocalStorageClient
+from app.services.tasks import enqueue_pipeline_job
+from app.worker import celery_app
+
+
+def _enqueue(client: TestClient, auth_headers: dict[str, str], monkeypatch) -> dict:
+    sent: dict = {}
+
+    def fake_enqueue(job_id, **kwargs):
+        sent.update(kwargs, job_id=job_id)
+        return job_id
+
+    monkeypatch.setattr("app.services.tasks.enqueue_pipeline_job", fake_enqueue)
+    response = client.post(
+        "/api/v1/pipeline/run-async",
+        files={"file": ("submission.txt", b"Insured: Status Co\nGeneral Liability", "text/plain")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    return sent
+
+
+def _run_eagerly(monkeypatch, job_id: str, sent: dict) -> None:
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    enqueue_pipeline_job(job_id, **sent)
+
+
+def _no_result_backend(monkeypatch) -> None:
+    def fail(_job_id):
+        raise AssertionError("status reads must not hit the Celery result backend")
+
+    monkeypatch.setattr("app.api.routes.pipeline.celery_app.AsyncResult", fail)
+
+
+def test_status_record_tracks_job_without_result_backend(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch, tmp_path
+) -> None:
+    monkeypatch.setattr(storage, "_storage", LocalStorageClient(root=str(tmp_path)))
+    _no_result_backend(monkeypatch)
+    sent = _enqueue(client, auth_headers, monkeypatch)
+    job_id = sent.pop("job_id")
+
+    queued = client.get(f"/api/v1/pipeline/jobs/{job_id}?include_result=false", headers=auth_headers).json()
+    assert (queued["status"], queued["attempt"], queued["submission_id"]) == ("queued", 0, sent["submission_id"])
+    assert queued["queued_at"] is not None and queued["result_url"] is None
+
+    _run_eagerly(monkeypatch, job_id, sent)
+
+    done = client.get(f"/api/v1/pipeline/jobs/{job_id}?include_result=false", headers=auth_headers).json()
+    assert (done["status"], done["attempt"], done["stage"]) == ("succeeded", 1, None)
+    assert done["finished_at"] is not None
+    assert done["result"] is None
+    assert done["result_url"] == f"/api/v1/pipeline/jobs/{job_id}/result"
+    assert read_job_status(job_id)["result"] == {"submission_id": sent["submission_id"], "version": 1}
+
+    # Existing pollers that read "result" keep getting it by default.
+    with_result = client.get(f"/api/v1/pipeline/jobs/{job_id}", headers=auth_headers).json()
+    assert with_result["result"]["profile"]["insured_name"] == "Status Co"
+
+
+def test_result_endpoint_serves_stored_version_with_etag(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch, tmp_path
+) -> None:
+    monkeypatch.setattr(storage, "_storage", LocalStorageClient(root=str(tmp_path)))
+    sent = _enqueue(client, auth_headers, monkeypatch)
+    job_id = sent.pop("job_id")
+
+    pending = client.get(f"/api/v1/pipeline/jobs/{job_id}/result", headers=auth_headers)
+    assert pending.status_code == 409
+
+    _run_eagerly(monkeypatch, job_id, sent)
+    response = client.get(f"/api/v1/pipeline/jobs/{job_id}/result", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["profile"]["submission_id"] == sent["submission_id"]
+    etag = response.headers["etag"]
+    assert etag == f'"{sent["submission_id"]}-v1"'
+    cached = client.get(f"/api/v1/pipeline/jobs/{job_id}/result", headers={**auth_headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+
+
+def test_status_record_is_tenant_scoped(client: TestClient, auth_headers: dict[str, str], monkeypatch) -> None:
+    _no_result_backend(monkeypatch)
+    update_job_status("job_foreign", status="succeeded", tenant="other-brokerage", submission_id="sub_foreign")
+
+    assert client.get("/api/v1/pipeline/jobs/job_foreign", headers=auth_headers).status_code == 404
+    assert client.get("/api/v1/pipeline/jobs/job_foreign/result", headers=auth_headers).status_code == 404
+
+
+def test_record_without_tenant_falls_back_to_the_submission(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch
+) -> None:
+    with SessionLocal() as db:
+        create_queued_submission(
+            db=db,
+            tenant_external_id="demo-brokerage",
+            submission_id="sub_legacy",
+            filename="submission.txt",
+            content_type="text/plain",
+            source_object_key=None,
+            idempotency_key="demo-brokerage:legacy",
+            job_id="job_legacy",
+        )
+    # A worker picking up a job queued without a status record writes one without a tenant.
+    update_job_status("job_legacy", status="running", stage="extract_facts", attempt=1)
+    pending = SimpleNamespace(status="PENDING", successful=lambda: False, failed=lambda: False)
+    monkeypatch.setattr("app.api.routes.pipeline.celery_app.AsyncResult", lambda _job_id: pending)
+
+    response = client.get("/api/v1/pipeline/jobs/job_legacy", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "queued"
+    assert client.get("/api/v1/pipeline/jobs/job_legacy/result", headers=auth_headers).status_code == 409
+
+
+def test_celery_results_expire() -> None:
+    assert celery_app.conf.result_expires == settings.celery_result_expires_seconds
@@ -0,0 +1,39 @@
+from app.services.extraction import find_lob_matches, infer_lobs
+from app.services.keywords import KeywordMatcher
+
+
+def test_matcher_reports_labels_and_offsets() -> None:
+    text = "Requesting General Liability and a fleet policy"
+    matches = find_lob_matches(text)
+
+    assert sorted(matches) == ["AUTO", "GL"]
+    gl = matches["GL"][0]
+    assert (gl.term, text[gl.start : gl.end]) == ("general liability", "General Liability")
+    assert text[matches["AUTO"][0].start : matches["AUTO"][0].end] == "fleet"
+
+
+def test_matcher_spans_line_breaks_and_overlapping_terms() -> None:
+    matcher = KeywordMatcher({"A": ["commercial auto"], "B": ["auto liability"], "C": ["workers comp"], "D": ["workers compensation"]})
+
+    assert matcher.matched_labels("Commercial\nAuto Liability") == ["A", "B"]
+    assert matcher.matched_labels("workers compensation") == ["C", "D"]
+    assert matcher.matched_labels("nothing relevant") == []
+
+
+def test_matcher_collapses_whitespace_runs_between_words() -> None:
+    assert infer_lobs("Commercial\r\nAuto; General\r\n\tLiability") == ["AUTO", "GL"]
+    assert infer_lobs("Commercial\n   Auto") == ["AUTO"]
+
+    text = "Line one\r\n  General \n\n Liability limits"
+    match = find_lob_matches(text)["GL"][0]
+    assert text[match.start : match.end] == "General \n\n Liability"
+
+
+def test_infer_lobs_matches_substring_semantics() -> None:
+    assert infer_lobs("CGL occurrence form; Workers Comp; driver schedule attached") == ["AUTO", "GL", "WC"]
+
+
+def test_matcher_offsets_index_original_text_with_expanding_case_folds() -> None:
+    text = "İSTANBUL Cyber Liability"
+    match = next(KeywordMatcher({"CYBER": ["cyber liability"]}).finditer(text))
+    assert text[match.start : match.end] == "Cyber Liability"
@@ -0,0 +1,33 @@
+from app.core import metrics
+from app.core.config import settings
+from app.services.extraction import extract_risk_facts
+from app.services.llm_cache import llm_cache_key
+
+
+def test_llm_cache_key_ignores_whitespace_but_not_focus() -> None:
+    base = llm_cache_key("Insured:  Demo\nCo", "template", "gpt-4.1-mini", ["GL", "WC"])
+
+    assert base == llm_cache_key("Insured: Demo Co", "template", "gpt-4.1-mini", ["WC", "GL"])
+    assert base != llm_cache_key("Insured: Demo Co", "template", "gpt-4.1-mini", ["GL"])
+    assert base != llm_cache_key("Insured: Demo Co", "template v2", "gpt-4.1-mini", ["GL", "WC"])
+
+
+def test_repeated_extraction_is_served_from_llm_cache(fake_openai) -> None:
+    fake_openai.response = {"insured_name": "Stub Co", "revenue": 1000, "payroll": None, "lines_of_business": ["GL"]}
+    text = "Named insured is Stub Co\nGeneral Liability"
+
+    first = extract_risk_facts(raw_text=text, filename="a.txt")
+    second = extract_risk_facts(raw_text=text, filename="resubmitted.txt")
+
+    assert len(fake_openai.requests) == 1
+    assert first["fields"] == second["fields"]
+    assert second["fields"]["insured_name"] == "Stub Co"
+    assert metrics.counter_value("llm_cache_hits") == 1
+    assert metrics.counter_value("llm_cache_misses") == 1
+
+
+def test_llm_cache_can_be_disabled(fake_openai, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+    for _ in range(2):
+        extract_risk_facts(raw_text="General Liability", filename="a.txt")
+    assert len(fake_openai.requests) == 2
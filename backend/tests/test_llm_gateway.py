@@ -0,0 +1,63 @@
+import asyncio
+import json
+import threading
+
+from app.core import metrics
+from app.core.config import settings
+from app.services.extraction import extract_risk_facts
+from app.services.llm_gateway import TokenRateLimiter, estimate_tokens, get_llm_gateway
+
+
+def test_gateway_is_shared_and_reuses_connections(fake_openai, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+    fake_openai.response = {"insured_name": "Pool Co", "revenue": None, "payroll": None, "lines_of_business": ["GL"]}
+
+    for _ in range(3):
+        result = extract_risk_facts(raw_text="General Liability", filename="a.txt")
+
+    assert result["fields"]["insured_name"] == "Pool Co"
+    assert get_llm_gateway() is get_llm_gateway()
+    assert len(fake_openai.requests) == 3
+    assert len(fake_openai.connections) == 1
+    assert metrics.counter_value("llm_requests") == 3
+
+
+def test_gateway_caps_concurrent_requests(fake_openai, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "llm_max_concurrency", 2)
+    fake_openai.delay_seconds = 0.05
+    gateway = get_llm_gateway()
+
+    threads = [threading.Thread(target=gateway.complete_json, args=("system", f"user {index}")) for index in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(fake_openai.requests) == 6
+    assert fake_openai.max_in_flight == 2
+
+
+def test_async_gateway_caps_concurrent_requests(fake_openai, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "llm_max_concurrency", 2)
+    fake_openai.delay_seconds = 0.05
+    fake_openai.response = {"ok": True}
+    gateway = get_llm_gateway()
+
+    async def run() -> list[str]:
+        return await asyncio.gather(*(gateway.acomplete_json("system", f"user {index}") for index in range(5)))
+
+    results = asyncio.run(run())
+
+    assert [json.loads(result) for result in results] == [{"ok": True}] * 5
+    assert fake_openai.max_in_flight == 2
+
+
+def test_token_rate_limiter_waits_for_refill() -> None:
+    now = [0.0]
+    limiter = TokenRateLimiter(tokens_per_minute=600, clock=lambda: now[0])
+
+    assert limiter.reserve(500) == 0.0
+    assert limiter.reserve(200) == 10.0
+    now[0] = 30.0
+    assert limiter.reserve(100) == 0.0
+    assert estimate_tokens("x" * 4000) == 1000
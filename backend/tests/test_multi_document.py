@@ -0,0 +1,189 @@
+import json
+from types import SimpleNamespace
+
+from celery.app.task import Context
+from celery.exceptions import ChordError
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.entities import QuarantinedJob
+from app.services import pipeline_engine, storage, tasks
+from app.services.canonical import merge_extractions
+from app.services.document_text import DocumentParseError
+from app.services.job_scheduler import get_job_scheduler
+from app.services.job_status import read_job_status
+from app.services.repository import get_latest_profile_version, get_submission_by_job
+from app.services.storage import LocalStorageClient
+from app.services.tasks import extract_document_task, merge_documents_task
+from app.worker import celery_app
+
+EMAIL = ("email.eml.txt", b"Insured: Atlas Fabrication LLC\nGeneral Liability renewal", "text/plain")
+ACORD = ("acord.txt", b"Annual Revenue: $5200000\nAnnual Payroll: $800000\nWorkers Compensation", "text/plain")
+
+
+def _extraction(value: str | None, confidence: float, filename: str, lobs: list[str]) -> dict:
+    return {
+        "fields": {"insured_name": value, "lines_of_business": lobs},
+        "confidence": {"insured_name": confidence, "lines_of_business": 0.7 if lobs else 0.0},
+        "citations": {
+            "insured_name": [{"source_document": filename, "page": 1, "snippet": value}],
+            "lines_of_business": [{"source_document": filename, "page": None, "snippet": ", ".join(lobs)}],
+        },
+        "debug": {"mode": "rules"},
+    }
+
+
+def test_merge_prefers_confident_document_and_keeps_every_citation() -> None:
+    merged = merge_extractions(
+        [
+            ("email.eml", _extraction("Atlas", 0.6, "email.eml", ["GL"])),
+            ("acord.pdf", _extraction("Atlas Fabrication LLC", 0.9, "acord.pdf", ["WC"])),
+            ("loss-runs.pdf", _extraction(None, 0.0, "loss-runs.pdf", [])),
+        ]
+    )
+
+    assert merged["fields"]["insured_name"] == "Atlas Fabrication LLC"
+    assert merged["confidence"]["insured_name"] == 0.9
+    assert [cite["source_document"] for cite in merged["citations"]["insured_name"]] == ["acord.pdf", "email.eml"]
+    assert merged["fields"]["lines_of_business"] == ["GL", "WC"]
+    assert merged["debug"]["field_sources"] == {"insured_name": "acord.pdf"}
+    assert [document["filename"] for document in merged["debug"]["documents"]] == ["email.eml", "acord.pdf", "loss-runs.pdf"]
+
+
+def test_run_multi_merges_documents_into_one_profile(client: TestClient, auth_headers: dict[str, str]) -> None:
+    response = client.post("/api/v1/pipeline/run-multi", files=[("files", EMAIL), ("files", ACORD)], headers=auth_headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    profile = body["profile"]
+    assert profile["insured_name"] == "Atlas Fabrication LLC"
+    assert (profile["revenue"], profile["payroll"]) == (5200000.0, 800000.0)
+    assert profile["lines_of_business"] == ["GL", "WC"]
+    assert profile["source_citations"]["insured_name"][0]["source_document"] == "email.eml.txt"
+    assert profile["source_citations"]["revenue"][0]["source_document"] == "acord.txt"
+    assert [item["line_of_business"] for item in body["completeness"]] == ["GL", "WC"]
+    assert all(document["source_object_key"] for document in profile["metadata"]["documents"])
+    stages = {timing["stage"] for timing in body["debug"]["stage_timings"]}
+    assert {"extract_document:0", "extract_document:1", "merge_extractions"} <= stages
+
+    submissions = client.get("/api/v1/submissions", headers=auth_headers).json()
+    assert len(submissions) == 1
+    assert submissions[0]["filename"] == "email.eml.txt, acord.txt"
+
+
+def test_run_multi_rejects_too_many_documents(client: TestClient, auth_headers: dict[str, str], monkeypatch) -> None:
+    monkeypatch.setattr(settings, "pipeline_max_documents", 1)
+
+    response = client.post("/api/v1/pipeline/run-multi", files=[("files", EMAIL), ("files", ACORD)], headers=auth_headers)
+
+    assert response.status_code == 400
+
+
+def test_run_multi_async_fans_out_and_merges(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch, tmp_path
+) -> None:
+    monkeypatch.setattr(storage, "_storage", LocalStorageClient(root=str(tmp_path)))
+    enqueued: dict = {}
+
+    def fake_enqueue(job_id, tenant_external_id, submission_id, documents, lane):
+        enqueued.update(job_id=job_id, submission_id=submission_id, documents=documents)
+        return job_id
+
+    monkeypatch.setattr("app.services.tasks.enqueue_multi_document_job", fake_enqueue)
+
+    response = client.post(
+        "/api/v1/pipeline/run-multi-async", files=[("files", EMAIL), ("files", ACORD)], headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["job_id"] == enqueued["job_id"]
+
+    # Run the chord by hand: the header tasks, then the callback with their results in order.
+    extractions = [
+        extract_document_task.apply(
+            kwargs={key: document[key] for key in ("filename", "content_type", "source_object_key", "payload_sha256")}
+        ).get()
+        for document in enqueued["documents"]
+    ]
+    result = merge_documents_task.apply(
+        args=(extractions,),
+        kwargs={
+            "tenant_external_id": "demo-brokerage",
+            "submission_id": enqueued["submission_id"],
+            "documents": enqueued["documents"],
+        },
+    ).get()
+
+    assert result == {"submission_id": enqueued["submission_id"], "version": 1}
+    with SessionLocal() as db:
+        version = get_latest_profile_version(db, "demo-brokerage", enqueued["submission_id"])
+        profile = json.loads(version.profile_json)
+        assert profile["insured_name"] == "Atlas Fabrication LLC"
+        assert profile["lines_of_business"] == ["GL", "WC"]
+        assert get_submission_by_job(db, enqueued["job_id"]).job_status == "processed"
+
+
+def test_run_multi_async_parses_on_cpu_and_extracts_from_stored_text(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch, tmp_path
+) -> None:
+    monkeypatch.setattr(storage, "_storage", LocalStorageClient(root=str(tmp_path)))
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+
+    def no_parsing(**_kwargs):
+        raise AssertionError("the I/O task must not parse the document again")
+
+    monkeypatch.setattr(pipeline_engine, "extract_text", no_parsing)
+    response = client.post(
+        "/api/v1/pipeline/run-multi-async", files=[("files", EMAIL), ("files", ACORD)], headers=auth_headers
+    )
+
+    job_id = response.json()["job_id"]
+    assert read_job_status(job_id)["status"] == "succeeded"
+    assert len(list((tmp_path / "extracted" / "demo-brokerage").glob("*/*.txt"))) == 2
+    with SessionLocal() as db:
+        assert get_submission_by_job(db, job_id).job_status == "processed"
+
+
+def test_failed_document_quarantines_the_chord(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch, tmp_path
+) -> None:
+    monkeypatch.setattr(storage, "_storage", LocalStorageClient(root=str(tmp_path)))
+    chords: list = []
+
+    def capture_chord(header):
+        def apply(callback):
+            chords.append((header, callback))
+            return SimpleNamespace(id=callback.options["task_id"])
+
+        return apply
+
+    monkeypatch.setattr(tasks, "chord", capture_chord)
+    response = client.post(
+        "/api/v1/pipeline/run-multi-async", files=[("files", EMAIL), ("files", ACORD)], headers=auth_headers
+    )
+    job_id = response.json()["job_id"]
+    header, callback = chords[0]
+    assert [[step.task for step in part.tasks] for part in header] == [
+        ["pipeline.parse_document", "pipeline.extract_document"]
+    ] * 2
+
+    # What the result backend does when a header part fails: call the callback's errbacks with
+    # a ChordError naming the failed part, whose own result holds the real exception.
+    cause = DocumentParseError("Could not parse PDF: broken xref table")
+    monkeypatch.setattr(celery_app, "AsyncResult", lambda task_id: SimpleNamespace(result=cause))
+    request = Context(id=job_id, errbacks=callback.options["link_error"], delivery_info={})
+    celery_app.backend._call_task_errbacks(request, ChordError("Dependency part-1 raised DocumentParseError()"), None)
+
+    with SessionLocal() as db:
+        row = db.scalar(select(QuarantinedJob))
+        assert (row.job_id, row.job_kind, row.failure_class) == (job_id, "multi_document", "permanent")
+        assert row.task_name == "pipeline.extract_document"
+        assert [document["filename"] for document in json.loads(row.payload_json)["documents"]] == [
+            EMAIL[0],
+            ACORD[0],
+        ]
+        assert get_submission_by_job(db, job_id).job_status == "failed"
+    assert read_job_status(job_id)["status"] == "failed"
+    # The job's scheduler slot is free again.
+    assert get_job_scheduler().store.transact(lambda state, _queues: state["in_flight"]) == {}
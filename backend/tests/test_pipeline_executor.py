@@ -0,0 +1,44 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.pipeline_executor import BoundedExecutor, ExecutorSaturatedError
+
+
+def test_bounded_executor_rejects_when_all_slots_are_taken() -> None:
+    executor = BoundedExecutor(name="test", max_workers=1, max_queued=1)
+    gate = threading.Event()
+    running = [executor.submit(gate.wait), executor.submit(gate.wait)]
+
+    with pytest.raises(ExecutorSaturatedError):
+        executor.submit(gate.wait)
+
+    gate.set()
+    for future in running:
+        future.result(timeout=5)
+    assert executor.submit(lambda: "ok").result(timeout=5) == "ok"
+
+
+def test_pipeline_run_returns_503_with_retry_after_when_saturated(
+    client: TestClient,
+    auth_headers: dict[str, str],
+    monkeypatch,
+) -> None:
+    saturated = BoundedExecutor(name="saturated", max_workers=1, max_queued=0)
+    gate = threading.Event()
+    blocker = saturated.submit(gate.wait)
+    monkeypatch.setattr("app.api.routes.pipeline.get_pipeline_executor", lambda: saturated)
+
+    try:
+        response = client.post(
+            "/api/v1/pipeline/run",
+            files={"file": ("submission.txt", b"Insured: Busy Co", "text/plain")},
+            headers=auth_headers,
+        )
+    finally:
+        gate.set()
+        blocker.result(timeout=5)
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
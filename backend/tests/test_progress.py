@@ -0,0 +1,143 @@
+import json
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.redis import reset_redis
+from app.db.session import SessionLocal
+from app.services import storage
+from app.services.progress import get_progress_bus, publish_progress, reset_progress_bus
+from app.services.repository import create_queued_submission, mark_submission_job_status
+from app.services.tasks import process_submission_task
+
+
+def _queue(job_id: str, submission_id: str, source_object_key: str | None = None) -> None:
+    with SessionLocal() as db:
+        create_queued_submission(
+            db=db,
+            tenant_external_id="demo-brokerage",
+            submission_id=submission_id,
+            filename="submission.txt",
+            content_type="text/plain",
+            source_object_key=source_object_key,
+            idempotency_key=f"demo-brokerage:{job_id}",
+            job_id=job_id,
+        )
+
+
+def _events(client: TestClient, auth_headers: dict[str, str], job_id: str) -> list[dict]:
+    with client.stream("GET", f"/api/v1/pipeline/jobs/{job_id}/events", headers=auth_headers) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = "".join(response.iter_text())
+    return [json.loads(line[len("data: ") :]) for line in body.splitlines() if line.startswith("data: ")]
+
+
+def test_worker_publishes_stage_events(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(storage, "_storage", storage.LocalStorageClient(root=str(tmp_path)))
+    storage.get_storage().put_bytes("src/submission.txt", b"Insured: Progress Co\nGeneral Liability", "text/plain")
+    _queue("job_progress", "sub_progress", "src/submission.txt")
+
+    process_submission_task.apply(
+        task_id="job_progress",
+        kwargs={
+            "tenant_external_id": "demo-brokerage",
+            "submission_id": "sub_progress",
+            "filename": "submission.txt",
+            "content_type": "text/plain",
+            "source_object_key": "src/submission.txt",
+        },
+    ).get()
+
+    events = [event["event"] for event in get_progress_bus()._events["job_progress"]]
+    assert events[0] == "running"
+    assert events[-2:] == ["persisted", "succeeded"]
+    assert {"text_extracted", "fields_extracted", "scored", "questions_generated"} <= set(events)
+    assert events.index("text_extracted") < events.index("fields_extracted") < events.index("scored")
+
+
+def test_stream_replays_backlog_and_ends_on_terminal_event(client: TestClient, auth_headers: dict[str, str]) -> None:
+    _queue("job_replay", "sub_replay")
+    publish_progress("job_replay", "running", attempt=1)
+    publish_progress("job_replay", "text_extracted")
+    publish_progress("job_replay", "succeeded", submission_id="sub_replay")
+
+    events = _events(client, auth_headers, "job_replay")
+
+    assert [event["event"] for event in events] == ["running", "text_extracted", "succeeded"]
+    assert [event["seq"] for event in events] == [1, 2, 3]
+
+
+def test_seq_keeps_counting_past_the_trimmed_backlog() -> None:
+    for index in range(150):
+        publish_progress("job_long", "stage", index=index)
+
+    backlog = get_progress_bus()._events["job_long"]
+    assert [event["seq"] for event in backlog] == list(range(51, 151))
+    assert backlog[-1]["index"] == 149
+
+
+def test_stream_pushes_live_events(client: TestClient, auth_headers: dict[str, str]) -> None:
+    _queue("job_live", "sub_live")
+
+    def worker() -> None:
+        publish_progress("job_live", "scored")
+        publish_progress("job_live", "failed", error="boom")
+
+    timer = threading.Timer(0.2, worker)
+    timer.start()
+    events = _events(client, auth_headers, "job_live")
+    timer.join()
+
+    assert [event["event"] for event in events] == ["scored", "failed"]
+
+
+def test_stream_falls_back_to_stored_status_on_heartbeat(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch
+) -> None:
+    monkeypatch.setattr(settings, "progress_heartbeat_seconds", 0.05)
+    _queue("job_lost", "sub_lost")
+
+    def finish() -> None:
+        with SessionLocal() as db:
+            mark_submission_job_status(db, "sub_lost", "processed")
+
+    timer = threading.Timer(0.2, finish)
+    timer.start()
+    events = _events(client, auth_headers, "job_lost")
+    timer.join()
+
+    assert [event["event"] for event in events] == ["succeeded"]
+
+
+def test_finished_job_returns_terminal_event_without_subscribing(client: TestClient, auth_headers: dict[str, str]) -> None:
+    _queue("job_done", "sub_done")
+    with SessionLocal() as db:
+        mark_submission_job_status(db, "sub_done", "processed")
+
+    assert _events(client, auth_headers, "job_done") == [
+        {"event": "succeeded", "job_id": "job_done", "submission_id": "sub_done"}
+    ]
+
+
+def test_stream_requires_tenant_job(client: TestClient, auth_headers: dict[str, str]) -> None:
+    response = client.get("/api/v1/pipeline/jobs/job_unknown/events", headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_redis_outage_degrades_gracefully(client: TestClient, auth_headers: dict[str, str], monkeypatch) -> None:
+    monkeypatch.setattr(settings, "progress_backend", "redis")
+    monkeypatch.setattr(settings, "redis_url", "redis://127.0.0.1:1/0")
+    reset_redis()
+    reset_progress_bus()
+    try:
+        publish_progress("job_outage", "running")
+        assert metrics.counter_value("progress_publish_failures") == 1
+
+        _queue("job_outage", "sub_outage")
+        assert [event["event"] for event in _events(client, auth_headers, "job_outage")] == ["unavailable"]
+    finally:
+        reset_redis()
+        reset_progress_bus()
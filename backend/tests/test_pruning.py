@@ -0,0 +1,72 @@
+from pathlib import Path
+
+from app.core import metrics
+from app.core.config import settings
+from app.services.extraction import TEXT_PRUNER, _extract_with_rules, extract_risk_facts, infer_lobs
+from app.services.pruning import TextPruner
+
+BOILERPLATE = "Any person who knowingly files a false application commits a fraudulent act.\n" * 40
+CORPUS = Path(__file__).resolve().parents[1] / "benchmarks" / "fixtures" / "pruning"
+
+
+def test_pruner_keeps_cue_windows_and_page_breaks() -> None:
+    text = "Cover letter\n" + BOILERPLATE + "\f" + BOILERPLATE + "\fSchedule\nAnnual Payroll: 50,000\n" + BOILERPLATE
+
+    result = TEXT_PRUNER.prune(text, context_lines=1, token_budget=1000)
+
+    assert "Annual Payroll: 50,000" in result.text
+    assert "Cover letter" in result.text
+    assert result.text.count("\f") == 2
+    assert result.removed_tokens > result.kept_tokens
+    assert result.windows == 2
+
+
+def test_pruner_leaves_text_without_cues_untouched() -> None:
+    text = "Living in a classic basic vineyard\n" + BOILERPLATE
+
+    result = TEXT_PRUNER.prune(text, context_lines=1, token_budget=1000)
+
+    assert result.text == text
+    assert result.removed_tokens == 0
+
+
+def test_pruner_drops_low_scoring_windows_over_budget() -> None:
+    dense = "Named Insured: Demo Co\nPayroll: 10\nRevenue: 20\nGeneral liability"
+    text = BOILERPLATE + "Drivers listed\n" + BOILERPLATE + dense + "\n" + BOILERPLATE
+
+    result = TEXT_PRUNER.prune(text, context_lines=0, token_budget=18)
+
+    assert "Named Insured: Demo Co" in result.text
+    assert "Drivers listed" not in result.text
+
+
+def test_pruned_extraction_matches_full_text_on_fixture_corpus() -> None:
+    packets = sorted(CORPUS.glob("*.txt"))
+    assert packets
+    for path in packets:
+        text = path.read_text(encoding="utf-8")
+        pruned = TEXT_PRUNER.prune(text, settings.llm_prune_context_lines, settings.llm_prune_token_budget)
+        full = _extract_with_rules(text, path.name, infer_lobs(text))["fields"]
+        assert _extract_with_rules(pruned.text, path.name, infer_lobs(pruned.text))["fields"] == full
+        assert pruned.removed_tokens > 0
+
+
+def test_llm_extraction_sends_pruned_text_when_enabled(fake_openai, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "llm_prune_enabled", True)
+    text = BOILERPLATE + "Named Insured: Demo Co\n" + BOILERPLATE
+
+    result = extract_risk_facts(raw_text=text, filename="packet.txt")
+
+    sent = fake_openai.requests[0]["messages"][1]["content"]
+    assert "Named Insured: Demo Co" in sent
+    assert len(sent) < len(text) / 4
+    report = result["debug"]["pruning"]
+    assert report["removed_tokens"] == report["original_tokens"] - report["kept_tokens"] > 0
+    assert report["estimated_latency_saved_ms"] > 0
+    assert metrics.counter_value("llm_pruned_tokens") == report["removed_tokens"]
+
+
+def test_windows_stop_at_line_and_page_boundaries() -> None:
+    text = "head\nfiller one\nfiller two\fpage two\nbefore\nPayroll: 10\nafter\nfar away\n"
+    result = TextPruner({"payroll": ["payroll"]}).prune(text, context_lines=1, token_budget=1000)
+    assert result.text == "head\nfiller one\n\n\fbefore\nPayroll: 10\nafter"
@@ -0,0 +1,196 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select, update
+from sqlalchemy.exc import OperationalError
+
+from app.core import metrics
+from app.db.session import SessionLocal
+from app.models.entities import AuditLog, QuarantinedJob, User
+from app.services import storage, tasks
+from app.services.document_text import DocumentParseError
+from app.services.job_status import read_job_status
+from app.services.repository import get_submission
+from app.services.storage import LocalStorageClient
+from app.worker import celery_app
+
+
+@pytest.fixture()
+def eager(monkeypatch, tmp_path) -> LocalStorageClient:
+    client = LocalStorageClient(root=str(tmp_path))
+    monkeypatch.setattr(storage, "_storage", client)
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    send = tasks.enqueue_pipeline_job
+
+    def enqueue(job_id, **kwargs):
+        # An eager chain re-raises the task's error from apply_async; a broker never would.
+        try:
+            send(job_id, **kwargs)
+        except Exception:
+            pass
+        return job_id
+
+    monkeypatch.setattr(tasks, "enqueue_pipeline_job", enqueue)
+    return client
+
+
+def _submit(client: TestClient, auth_headers: dict[str, str], filename: str, payload: bytes) -> dict:
+    response = client.post(
+        "/api/v1/pipeline/run-async", files={"file": (filename, payload, "application/octet-stream")}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def _audit_events(submission_id: str) -> list[str]:
+    with SessionLocal() as db:
+        rows = db.scalars(select(AuditLog).where(AuditLog.submission_id == submission_id).order_by(AuditLog.id))
+        return [row.event_type for row in rows]
+
+
+def test_parse_error_is_quarantined_without_retries(
+    client: TestClient, auth_headers: dict[str, str], eager, monkeypatch
+) -> None:
+    attempts: list[int] = []
+
+    def corrupt(**_kwargs):
+        attempts.append(1)
+        raise DocumentParseError("Could not parse PDF: broken xref table")
+
+    monkeypatch.setattr("app.services.tasks.extract_text", corrupt)
+    accepted = _submit(client, auth_headers, "broken.pdf", b"%PDF-1.4 truncated")
+
+    assert len(attempts) == 1
+    with SessionLocal() as db:
+        row = db.scalar(select(QuarantinedJob))
+        assert (row.job_id, row.failure_class, row.error_type) == (accepted["job_id"], "permanent", "DocumentParseError")
+        assert row.task_name == "pipeline.parse_submission"
+        assert row.source_object_key.endswith("/broken.pdf")
+        assert get_submission(db, "demo-brokerage", accepted["submission_id"]).job_status == "failed"
+    assert "job_retrying" not in _audit_events(accepted["submission_id"])
+    record = read_job_status(accepted["job_id"])
+    assert (record["status"], record["failure_class"]) == ("failed", "permanent")
+    assert metrics.counter_value("jobs_quarantined", failure_class="permanent") == 1
+
+
+def test_transient_errors_are_retried(client: TestClient, auth_headers: dict[str, str], eager, monkeypatch) -> None:
+    real_get_bytes = eager.get_bytes
+    failures = [ConnectionError("storage connection reset")]
+
+    def flaky_get_bytes(key: str) -> bytes:
+        if failures:
+            raise failures.pop()
+        return real_get_bytes(key)
+
+    monkeypatch.setattr(eager, "get_bytes", flaky_get_bytes)
+    accepted = _submit(client, auth_headers, "submission.txt", b"Insured: Flaky Storage Co\nGeneral Liability")
+
+    assert read_job_status(accepted["job_id"])["status"] == "succeeded"
+    assert "job_retrying" in _audit_events(accepted["submission_id"])
+    with SessionLocal() as db:
+        assert db.scalar(select(QuarantinedJob)) is None
+
+
+def test_admin_lists_and_replays_quarantined_jobs(
+    client: TestClient, auth_headers: dict[str, str], eager, monkeypatch
+) -> None:
+    real_extract_text = tasks.extract_text
+
+    def corrupt(**_kwargs):
+        raise DocumentParseError("Unsupported encoding")
+
+    monkeypatch.setattr("app.services.tasks.extract_text", corrupt)
+    accepted = [
+        _submit(client, auth_headers, f"submission-{index}.txt", f"Insured: Replay Co {index}".encode())
+        for index in range(2)
+    ]
+
+    listed = client.get("/api/v1/admin/quarantine", headers=auth_headers).json()
+    assert [item["job_id"] for item in listed] == [job["job_id"] for job in accepted]
+
+    # The parser is fixed; a bulk replay runs every quarantined job again under a new job id.
+    monkeypatch.setattr("app.services.tasks.extract_text", real_extract_text)
+    response = client.post("/api/v1/admin/quarantine/replay", json={}, headers=auth_headers)
+
+    assert response.status_code == 200
+    replayed = response.json()["replayed"]
+    assert [item["replay_of"] for item in replayed] == [job["job_id"] for job in accepted]
+    with SessionLocal() as db:
+        for item in replayed:
+            submission = get_submission(db, "demo-brokerage", item["submission_id"])
+            assert (submission.job_id, submission.job_status) == (item["job_id"], "processed")
+    assert all(read_job_status(item["job_id"])["status"] == "succeeded" for item in replayed)
+    assert client.get("/api/v1/admin/quarantine", headers=auth_headers).json() == []
+    history = client.get("/api/v1/admin/quarantine?status=replayed", headers=auth_headers).json()
+    assert [item["replayed_at"] is not None for item in history] == [True, True]
+    audit = client.get(f"/api/v1/submissions/{accepted[0]['submission_id']}/audit", headers=auth_headers).json()
+    replay_event = next(event for event in audit if event["event_type"] == "job_replayed")
+    assert json.loads(replay_event["details"])["replay_of"] == accepted[0]["job_id"]
+
+
+def test_replay_reports_rows_that_fail_and_keeps_them_quarantined(
+    client: TestClient, auth_headers: dict[str, str], eager, monkeypatch
+) -> None:
+    real_extract_text = tasks.extract_text
+
+    def corrupt(**_kwargs):
+        raise DocumentParseError("Unsupported encoding")
+
+    monkeypatch.setattr("app.services.tasks.extract_text", corrupt)
+    accepted = [
+        _submit(client, auth_headers, f"submission-{index}.txt", f"Insured: Partial Co {index}".encode())
+        for index in range(2)
+    ]
+    monkeypatch.setattr("app.services.tasks.extract_text", real_extract_text)
+    real_requeue = tasks.requeue_quarantined_job
+
+    def database_down_for_first(db, row, job_id: str) -> bool:
+        if row.job_id == accepted[0]["job_id"]:
+            raise OperationalError("UPDATE quarantined_jobs", {}, ConnectionError("database unavailable"))
+        return real_requeue(db, row, job_id)
+
+    monkeypatch.setattr(tasks, "requeue_quarantined_job", database_down_for_first)
+    body = client.post("/api/v1/admin/quarantine/replay", json={}, headers=auth_headers).json()
+
+    assert [item["replay_of"] for item in body["replayed"]] == [accepted[1]["job_id"]]
+    assert [item["submission_id"] for item in body["failed"]] == [accepted[0]["submission_id"]]
+    assert "database unavailable" in body["failed"][0]["error"]
+    assert metrics.counter_value("quarantine_replay_failures") == 1
+    listed = client.get("/api/v1/admin/quarantine", headers=auth_headers).json()
+    assert [item["job_id"] for item in listed] == [accepted[0]["job_id"]]
+
+    # A repeated request replays only what is still quarantined.
+    monkeypatch.setattr(tasks, "requeue_quarantined_job", real_requeue)
+    retried = client.post("/api/v1/admin/quarantine/replay", json={}, headers=auth_headers).json()
+    assert ([item["replay_of"] for item in retried["replayed"]], retried["failed"]) == ([accepted[0]["job_id"]], [])
+
+
+def test_quarantine_endpoints_require_admin(client: TestClient, auth_headers: dict[str, str]) -> None:
+    with SessionLocal() as db:
+        db.execute(update(User).values(role="csr"))
+        db.commit()
+
+    assert client.get("/api/v1/admin/quarantine", headers=auth_headers).status_code == 403
+    assert client.post("/api/v1/admin/quarantine/replay", json={}, headers=auth_headers).status_code == 403
+
+
+def test_database_errors_before_parsing_are_quarantined_after_retries(
+    client: TestClient, auth_headers: dict[str, str], eager, monkeypatch
+) -> None:
+    real_mark = tasks.mark_submission_job_status
+
+    def database_down(db, submission_id: str, status: str) -> None:
+        if status == "running":
+            raise OperationalError("UPDATE submissions", {}, ConnectionError("database unavailable"))
+        real_mark(db, submission_id=submission_id, status=status)
+
+    monkeypatch.setattr(tasks, "mark_submission_job_status", database_down)
+    accepted = _submit(client, auth_headers, "submission.txt", b"Insured: Offline Co")
+
+    with SessionLocal() as db:
+        row = db.scalar(select(QuarantinedJob))
+        assert (row.job_id, row.failure_class, row.error_type) == (accepted["job_id"], "transient", "OperationalError")
+        assert row.attempts == tasks.parse_submission_task.max_retries + 1
+    assert read_job_status(accepted["job_id"])["status"] == "failed"
+    assert _audit_events(accepted["submission_id"]).count("job_retrying") == tasks.parse_submission_task.max_retries
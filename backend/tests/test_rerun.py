@@ -0,0 +1,154 @@
+import json
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.entities import StageOutput
+from app.services import missingness, pipeline_engine
+from app.services.repository import get_stage_outputs, list_audit_logs
+from app.services.stage_graph import Stage
+from app.services.stage_memo import stage_cache_keys, store_stage_outputs
+from app.services.versioning import stage_versions
+
+CONTENT = b"Insured: Atlas Fabrication LLC\nAnnual Revenue: $5200000\nGeneral Liability"
+
+
+def _upload(client: TestClient, auth_headers: dict[str, str]) -> dict:
+    response = client.post(
+        "/api/v1/pipeline/run",
+        files={"file": ("submission.txt", CONTENT, "text/plain")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def _rerun(client: TestClient, auth_headers: dict[str, str], submission_id: str) -> dict:
+    response = client.post(f"/api/v1/submissions/{submission_id}/rerun", headers=auth_headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def _ran(body: dict) -> set[str]:
+    return {timing["stage"] for timing in body["debug"]["stage_timings"] if not timing["seeded"]}
+
+
+def _bump_stage_version(monkeypatch, stage: str) -> None:
+    def bumped() -> dict[str, str]:
+        versions = stage_versions()
+        versions[stage] = f"{versions[stage]}-changed"
+        return versions
+
+    monkeypatch.setattr(pipeline_engine, "stage_versions", bumped)
+
+
+def _fail_text_extraction(monkeypatch) -> None:
+    def fail(**_):
+        raise AssertionError("text extraction should come from the stage memo")
+
+    monkeypatch.setattr(pipeline_engine, "extract_text", fail)
+
+
+def test_rerun_without_changes_reuses_every_stage(client: TestClient, auth_headers: dict[str, str], monkeypatch) -> None:
+    first = _upload(client, auth_headers)
+    submission_id = first["profile"]["submission_id"]
+    _fail_text_extraction(monkeypatch)
+
+    # A first run memoizes only the extraction; the first re-run rebuilds the rest from it.
+    warm = _rerun(client, auth_headers, submission_id)
+    rerun = _rerun(client, auth_headers, submission_id)
+
+    assert _ran(warm) == {"build_profile", "score_missingness", "generate_questions", "store_source", "persist"}
+    assert _ran(rerun) == {"store_source", "persist"}
+    assert rerun["profile"]["version"] == 3
+    assert rerun["questions"] == first["questions"]
+    export = client.get(f"/api/v1/submissions/{submission_id}/export?format=json", headers=auth_headers).json()
+    assert export["profile"]["version"] == 3
+    with SessionLocal() as db:
+        events = [log.event_type for log in list_audit_logs(db, "demo-brokerage", submission_id)]
+    assert events == ["pipeline_run", "pipeline_rerun", "pipeline_rerun"]
+
+
+def test_rerun_after_question_change_only_regenerates_questions(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch
+) -> None:
+    first = _upload(client, auth_headers)
+    _fail_text_extraction(monkeypatch)
+    warm = _rerun(client, auth_headers, first["profile"]["submission_id"])
+    _bump_stage_version(monkeypatch, "generate_questions")
+    original = pipeline_engine.generate_question_set
+
+    def reworded(insured_name, completeness):
+        question_set = original(insured_name, completeness)
+        question_set.email_draft = question_set.email_draft.replace("Hi team", "Hello")
+        return question_set
+
+    monkeypatch.setattr(pipeline_engine, "generate_question_set", reworded)
+
+    rerun = _rerun(client, auth_headers, first["profile"]["submission_id"])
+
+    assert _ran(rerun) == {"generate_questions", "store_source", "persist"}
+    assert "Hello" in rerun["questions"]["email_draft"]
+    assert rerun["profile"] == {**warm["profile"], "version": 3}
+    assert metrics.counter_value("stage_memo_misses", stage="generate_questions") >= 1
+
+
+def test_rerun_after_required_field_change_rescores(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch
+) -> None:
+    first = _upload(client, auth_headers)
+    assert "payroll" not in first["completeness"][0]["missing_fields"]
+    _fail_text_extraction(monkeypatch)
+    _rerun(client, auth_headers, first["profile"]["submission_id"])
+    _bump_stage_version(monkeypatch, "score_missingness")
+    monkeypatch.setitem(missingness.REQUIRED_FIELDS_BY_LOB, "GL", ["insured_name", "revenue", "locations", "payroll"])
+
+    rerun = _rerun(client, auth_headers, first["profile"]["submission_id"])
+
+    assert _ran(rerun) == {"score_missingness", "generate_questions", "store_source", "persist"}
+    assert "payroll" in rerun["completeness"][0]["missing_fields"]
+
+
+def test_rerun_unknown_submission_returns_404(client: TestClient, auth_headers: dict[str, str]) -> None:
+    response = client.post("/api/v1/submissions/sub_missing/rerun", headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_refused_output_is_not_memoized_downstream() -> None:
+    stages = [Stage("a", lambda: 1), Stage("b", lambda a: a, ("a",)), Stage("c", lambda: 2)]
+    versions = {"a": "1", "b": "1", "c": "1"}
+    keys = stage_cache_keys(stages, versions, {})
+    encoders = {"a": lambda _: None, "b": json.dumps, "c": json.dumps}
+
+    store_stage_outputs(stages, keys, versions, {"a": 1, "b": 1, "c": 2}, encoders)
+
+    with SessionLocal() as db:
+        stored = get_stage_outputs(db, list(keys.values()))
+    assert set(stored) == {keys["c"]}
+
+
+def test_first_runs_memoize_only_the_extraction(client: TestClient, auth_headers: dict[str, str]) -> None:
+    _upload(client, auth_headers)
+
+    with SessionLocal() as db:
+        assert [row.stage for row in db.scalars(select(StageOutput))] == ["extract_facts"]
+
+
+def test_expired_and_overflowing_stage_outputs_are_pruned(monkeypatch) -> None:
+    stages = [Stage("a", lambda: 1), Stage("b", lambda: 2)]
+    versions = {"a": "1", "b": "1"}
+    keys = stage_cache_keys(stages, versions, {})
+    with SessionLocal() as db:
+        db.add(StageOutput(cache_key="stale", stage="a", stage_version="1", output_json="0", created_at=datetime(2020, 1, 1)))
+        db.commit()
+    monkeypatch.setattr(settings, "stage_memo_max_entries", 1)
+
+    store_stage_outputs(stages, keys, versions, {"a": 1, "b": 2}, {"a": json.dumps, "b": json.dumps})
+
+    with SessionLocal() as db:
+        assert db.scalar(select(func.count(StageOutput.id))) == 1
+        assert get_stage_outputs(db, ["stale"]) == {}
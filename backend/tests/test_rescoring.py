@@ -0,0 +1,115 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db.session import SessionLocal
+from app.services import missingness, rescoring
+from app.services.pipeline_engine import build_pipeline_result
+from app.services.repository import get_latest_profile_version, list_audit_logs, store_pipeline_result
+from app.services.rescoring import RescoreCheckpoint, rescore_portfolio
+
+TENANT = "demo-brokerage"
+
+
+def _upload_portfolio(client: TestClient, auth_headers: dict[str, str], count: int) -> list[str]:
+    submission_ids = []
+    for index in range(count):
+        response = client.post(
+            "/api/v1/pipeline/run",
+            files={"file": (f"packet-{index}.txt", f"Insured: Insured {index} LLC\nGeneral Liability".encode(), "text/plain")},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        submission_ids.append(response.json()["profile"]["submission_id"])
+    return submission_ids
+
+
+def _require_payroll_for_gl(monkeypatch) -> None:
+    monkeypatch.setitem(missingness.REQUIRED_FIELDS_BY_LOB, "GL", ["insured_name", "revenue", "locations", "payroll"])
+
+
+def test_rescore_writes_new_versions_from_stored_profiles(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch, tmp_path
+) -> None:
+    submission_ids = _upload_portfolio(client, auth_headers, 3)
+    _require_payroll_for_gl(monkeypatch)
+
+    report = rescore_portfolio(batch_size=2, checkpoint_path=str(tmp_path / "checkpoint.json"))
+
+    assert (report.scanned, report.written) == (3, 3)
+    assert report.rows_per_second > 0
+    assert not (tmp_path / "checkpoint.json").exists()
+    with SessionLocal() as db:
+        for submission_id in submission_ids:
+            latest = get_latest_profile_version(db, TENANT, submission_id)
+            assert latest.version == 2
+            assert json.loads(latest.profile_json)["version"] == 2
+            assert "payroll" in json.loads(latest.completeness_json)[0]["missing_fields"]
+            assert list_audit_logs(db, TENANT, submission_id)[-1].event_type == "profile_rescored"
+
+    # Nothing changed since: the second pass writes nothing.
+    assert rescore_portfolio(batch_size=2).written == 0
+
+
+def test_rescore_resumes_from_checkpoint(client: TestClient, auth_headers: dict[str, str], monkeypatch, tmp_path) -> None:
+    _upload_portfolio(client, auth_headers, 5)
+    _require_payroll_for_gl(monkeypatch)
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+
+    def crash(checkpoint: RescoreCheckpoint, _report) -> None:
+        raise RuntimeError("worker killed")
+
+    with pytest.raises(RuntimeError):
+        rescore_portfolio(batch_size=2, checkpoint_path=checkpoint_path, on_batch=crash)
+    checkpoint = RescoreCheckpoint.load(checkpoint_path)
+    assert (checkpoint.scanned, checkpoint.written) == (2, 2)
+
+    report = rescore_portfolio(batch_size=2, checkpoint_path=checkpoint_path)
+
+    assert (report.scanned, report.written) == (3, 3)
+    assert rescore_portfolio(batch_size=2).written == 0
+
+
+def test_rescore_can_target_one_tenant(client: TestClient, auth_headers: dict[str, str], monkeypatch) -> None:
+    _upload_portfolio(client, auth_headers, 2)
+    _require_payroll_for_gl(monkeypatch)
+
+    assert rescore_portfolio(tenant_external_id="other-brokerage").scanned == 0
+    assert rescore_portfolio(tenant_external_id=TENANT).written == 2
+
+
+def test_concurrent_versions_are_renumbered_or_skipped(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch
+) -> None:
+    submission_ids = _upload_portfolio(client, auth_headers, 2)
+    _require_payroll_for_gl(monkeypatch)
+    rescore_batch = rescoring._rescore_batch
+    raced: list[bool] = []
+
+    def race(rows):
+        # A rerun lands version 2 of the first submission while the page is being scored.
+        batch = rescore_batch(rows)
+        if raced:
+            return batch
+        raced.append(True)
+        with SessionLocal() as db:
+            latest = get_latest_profile_version(db, TENANT, submission_ids[0])
+            result = build_pipeline_result(submission_ids[0], {"fields": {}, "confidence": {}, "citations": {}})
+            # Stale version number: the write is renumbered past the existing row.
+            result.profile.version = latest.version
+            store_pipeline_result(db, TENANT, "packet-0.txt", "text/plain", result)
+            assert result.profile.version == 2
+        return batch
+
+    monkeypatch.setattr(rescoring, "_rescore_batch", race)
+    report = rescore_portfolio(batch_size=10)
+
+    assert report.written == 1
+    with SessionLocal() as db:
+        first = get_latest_profile_version(db, TENANT, submission_ids[0])
+        assert (first.version, [log.event_type for log in list_audit_logs(db, TENANT, submission_ids[0])][-1]) == (
+            2,
+            "pipeline_run",
+        )
+        assert get_latest_profile_version(db, TENANT, submission_ids[1]).version == 2
@@ -0,0 +1,47 @@
+from app.services.extraction import _extract_with_rules
+from app.services.rules import FIELD_RULES, FieldRule, RuleEngine, RULE_ENGINE
+
+
+def test_rule_engine_returns_all_matches_with_offsets() -> None:
+    text = "Named Insured: Atlas Fabrication LLC\nAnnual Revenue: $5,200,000\nPayroll - 1800000.50\nPrior revenue: 10"
+    matches = RULE_ENGINE.scan(text)
+
+    assert [(m.field, m.value) for m in matches] == [
+        ("insured_name", "Atlas Fabrication LLC"),
+        ("revenue", 5200000.0),
+        ("payroll", 1800000.5),
+        ("revenue", 10.0),
+    ]
+    revenue = matches[1]
+    assert text[revenue.start : revenue.end] == "Annual Revenue: $5,200,000"
+
+
+def test_rule_engine_respects_line_start_rules() -> None:
+    matches = RULE_ENGINE.first_matches("Additional insured: Someone Else\nInsured: Harbor Clinical Group")
+    assert matches["insured_name"].value == "Harbor Clinical Group"
+
+
+def test_rule_registry_is_extensible() -> None:
+    engine = RuleEngine(
+        FIELD_RULES
+        + (FieldRule(field="vehicle_count", labels=("vehicles",), value_pattern=r"\s*[:\-]?\s*(?P<value>\d+)", normalizer=int, confidence=0.7),)
+    )
+    assert engine.first_matches("Vehicles: 14")["vehicle_count"].value == 14
+
+
+def test_extract_with_rules_keeps_output_shape() -> None:
+    result = _extract_with_rules("Insured: Demo Co\nAnnual Payroll: $900,000\nWorkers Comp", "submission.txt")
+
+    assert result["fields"] == {"insured_name": "Demo Co", "revenue": None, "payroll": 900000.0, "lines_of_business": ["WC"]}
+    assert result["confidence"]["payroll"] == 0.78
+    assert result["citations"]["payroll"][0]["snippet"] == "Annual Payroll: $900,000"
+
+
+def test_rule_offsets_survive_case_folding_that_expands_text() -> None:
+    # "İ".lower() is two characters; hits must still index the original text.
+    text = "Broker: İİİİ Agency\nAnnual Revenue: $5,000,000\nInsured: Demo Co\n"
+    matches = RULE_ENGINE.first_matches(text)
+
+    assert matches["insured_name"].value == "Demo Co"
+    assert matches["revenue"].value == 5000000.0
+    assert text[matches["revenue"].start : matches["revenue"].end] == "Annual Revenue: $5,000,000"
@@ -0,0 +1,62 @@
+import time
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.extraction import extract_risk_facts_speculative
+from app.services.pipeline_engine import run_pipeline_bytes
+from app.services.repository import get_latest_profile_version
+
+TEXT = "Insured: Atlas Fabrication LLC\nAnnual Revenue: $5200000\nGeneral Liability"
+
+
+def test_rules_result_is_returned_when_llm_misses_deadline(fake_openai) -> None:
+    fake_openai.delay_seconds = 1.0
+    fake_openai.response = {"insured_name": "Atlas (LLM)", "lines_of_business": ["GL"]}
+
+    started = time.monotonic()
+    result, late = extract_risk_facts_speculative(raw_text=TEXT, filename="a.txt", deadline_seconds=0.1)
+
+    assert time.monotonic() - started < 0.8
+    assert result["debug"]["mode"] == "rules"
+    assert result["debug"]["degraded"] is True
+    assert result["debug"]["degraded_reason"] == "llm_deadline"
+    assert result["fields"]["insured_name"] == "Atlas Fabrication LLC"
+    assert late.result(timeout=5)["fields"]["insured_name"] == "Atlas (LLM)"
+    assert metrics.counter_value("llm_deadline_missed") == 1
+
+
+def test_llm_result_wins_inside_deadline(fake_openai) -> None:
+    fake_openai.response = {"insured_name": "Atlas (LLM)", "lines_of_business": ["GL"]}
+
+    result, late = extract_risk_facts_speculative(raw_text=TEXT, filename="a.txt", deadline_seconds=5)
+
+    assert late is None
+    assert result["debug"]["mode"] == "llm"
+    assert "degraded" not in result["debug"]
+
+
+def test_late_llm_result_upgrades_stored_profile(fake_openai, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+    fake_openai.delay_seconds = 0.3
+    fake_openai.response = {"insured_name": "Atlas (LLM)", "revenue": 5200000, "lines_of_business": ["GL"]}
+
+    with SessionLocal() as db:
+        result = run_pipeline_bytes(
+            db=db,
+            tenant_external_id="demo-brokerage",
+            filename="a.txt",
+            content_type="text/plain",
+            payload=TEXT.encode("utf-8"),
+            llm_deadline_seconds=0.05,
+            upgrade_late_extraction=True,
+        )
+    assert result.profile.metadata["debug"]["degraded"] is True
+
+    deadline = time.monotonic() + 5
+    while metrics.counter_value("llm_late_upgrades") == 0 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    with SessionLocal() as db:
+        latest = get_latest_profile_version(db, "demo-brokerage", result.profile.submission_id)
+    assert latest.version == 2
+    assert "Atlas (LLM)" in latest.profile_json
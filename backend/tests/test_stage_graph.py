@@ -0,0 +1,91 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db.session import SessionLocal
+from app.services.repository import list_audit_logs
+from app.services.stage_graph import Stage, StageGraph
+
+
+def _sleep_then(value, seconds=0.2):
+    def stage(**_):
+        time.sleep(seconds)
+        return value
+
+    return stage
+
+
+def test_independent_stages_overlap_and_feed_dependents() -> None:
+    graph = StageGraph(
+        [
+            Stage("left", _sleep_then(2)),
+            Stage("right", _sleep_then(3)),
+            Stage("product", lambda left, right: left * right, ("left", "right")),
+        ]
+    )
+
+    started = time.perf_counter()
+    run = graph.run()
+
+    assert time.perf_counter() - started < 0.35
+    assert run.outputs["product"] == 6
+    timings = {timing.stage: timing for timing in run.timings}
+    assert timings["left"].wall_ms >= 200
+    assert timings["left"].cpu_ms < timings["left"].wall_ms
+    assert timings["product"].started_ms >= 200
+
+
+def test_seeded_stages_are_not_run() -> None:
+    calls = []
+    graph = StageGraph(
+        [
+            Stage("text", lambda: calls.append("text") or "fresh"),
+            Stage("upper", lambda text: text.upper(), ("text",)),
+        ]
+    )
+
+    run = graph.run(seeds={"text": "cached"})
+
+    assert calls == []
+    assert run.outputs["upper"] == "CACHED"
+    assert [timing.stage for timing in run.timings if timing.seeded] == ["text"]
+
+
+def test_invalid_graphs_and_stage_failures() -> None:
+    with pytest.raises(ValueError):
+        StageGraph([Stage("a", lambda b: b, ("b",)), Stage("b", lambda a: a, ("a",))])
+    with pytest.raises(ValueError):
+        StageGraph([Stage("a", lambda missing: missing, ("missing",))])
+
+    def broken() -> None:
+        raise RuntimeError("boom")
+
+    graph = StageGraph([Stage("slow", _sleep_then(1, 0.05)), Stage("broken", broken)])
+    with pytest.raises(RuntimeError, match="boom"):
+        graph.run()
+
+
+def test_pipeline_reports_stage_timings(client: TestClient, auth_headers: dict[str, str]) -> None:
+    response = client.post(
+        "/api/v1/pipeline/run",
+        files={"file": ("submission.txt", b"Insured: Atlas LLC\nGeneral Liability", "text/plain")},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    stages = [timing["stage"] for timing in body["debug"]["stage_timings"]]
+    assert set(stages) == {
+        "extract_text",
+        "store_source",
+        "extract_facts",
+        "build_profile",
+        "score_missingness",
+        "generate_questions",
+        "persist",
+    }
+    with SessionLocal() as db:
+        logs = list_audit_logs(db, "demo-brokerage", body["profile"]["submission_id"])
+    run_log = next(log for log in logs if log.event_type == "pipeline_run")
+    assert "extract_facts" in run_log.details
@@ -10,3 +10,9 @@ def test_local_storage_put_bytes(tmp_path) -> None:
     key = client.put_bytes("submissions/demo/doc.txt", b"hello", "text/plain")
     assert key == "submissions/demo/doc.txt"
     assert (tmp_path / "submissions/demo/doc.txt").read_bytes() == b"hello"
+
+
+def test_local_storage_get_bytes_round_trips(tmp_path) -> None:
+    client = LocalStorageClient(root=str(tmp_path))
+    client.put_bytes("submissions/demo/doc.pdf", memoryview(b"%PDF-1.7"), "application/pdf")
+    assert client.get_bytes("submissions/demo/doc.pdf") == b"%PDF-1.7"
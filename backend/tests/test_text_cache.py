@@ -0,0 +1,60 @@
+import os
+
+from app.core import metrics
+from app.services import document_text
+from app.services.text_cache import ExtractedTextCache
+
+
+def test_memory_tier_evicts_least_recently_used_by_size() -> None:
+    cache = ExtractedTextCache(max_memory_bytes=10)
+    cache.put("1/text/a", "aaaa")
+    cache.put("1/text/b", "bbbb")
+    assert cache.get("1/text/a") == "aaaa"
+
+    cache.put("1/text/c", "cccc")
+
+    assert cache.get("1/text/b") is None
+    assert cache.get("1/text/a") == "aaaa"
+    assert cache.get("1/text/c") == "cccc"
+
+
+def test_disk_tier_serves_entries_evicted_from_memory(tmp_path) -> None:
+    cache = ExtractedTextCache(max_memory_bytes=4, disk_root=str(tmp_path))
+    cache.put("1/pdf/abc123", "long extracted text")
+
+    assert cache.get("1/pdf/abc123") == "long extracted text"
+    assert metrics.counter_value("text_cache_hits", tier="disk") == 1
+    assert (tmp_path / "1" / "pdf" / "ab" / "abc123.txt").exists()
+
+
+def test_extract_text_reuses_cached_text_for_identical_payload(monkeypatch) -> None:
+    calls: list[str] = []
+    original = document_text._extract_uncached
+
+    def counting_extract(kind: str, payload: bytes) -> str:
+        calls.append(kind)
+        return original(kind, payload)
+
+    monkeypatch.setattr(document_text, "_extract_uncached", counting_extract)
+
+    first = document_text.extract_text("acord.txt", "text/plain", b"Insured: Demo Co")
+    second = document_text.extract_text("resend.txt", "text/plain", b"Insured: Demo Co")
+
+    assert first == second == "Insured: Demo Co"
+    assert calls == ["text"]
+    assert metrics.counter_value("text_cache_misses") == 1
+    assert metrics.counter_value("text_cache_hits", tier="memory") == 1
+
+
+def test_disk_tier_evicts_least_recently_read_files(tmp_path) -> None:
+    cache = ExtractedTextCache(max_memory_bytes=0, disk_root=str(tmp_path), max_disk_bytes=25)
+    for index, key in enumerate(["1/text/aa01", "1/text/bb02"]):
+        cache.put(key, "x" * 10)
+        os.utime(tmp_path / "1" / "text" / key[-4:-2] / f"{key[-4:]}.txt", (index, index))
+    assert cache.get("1/text/aa01") == "x" * 10
+
+    cache.put("1/text/cc03", "x" * 10)
+
+    assert cache.get("1/text/bb02") is None
+    assert cache.get("1/text/aa01") == cache.get("1/text/cc03") == "x" * 10
+    assert metrics.counter_value("text_cache_evictions", tier="disk") == 1
@@ -0,0 +1,50 @@
+import pytest
+
+from app.core import metrics
+from app.core.config import settings
+from app.services.extraction import extract_risk_facts
+
+CLEAN_FORM = "Named Insured: Harbor Foods LLC\nGeneral Liability\nWorkers Compensation\nRevenue: 1,200,000\nPayroll: 300,000"
+
+
+@pytest.fixture()
+def tiered(fake_openai, monkeypatch):
+    monkeypatch.setattr(settings, "llm_mode", "tiered")
+    return fake_openai
+
+
+def test_tiered_mode_skips_llm_when_rules_are_confident(tiered) -> None:
+    result = extract_risk_facts(raw_text=CLEAN_FORM, filename="acord.pdf")
+
+    assert tiered.requests == []
+    assert result["fields"]["insured_name"] == "Harbor Foods LLC"
+    assert result["debug"]["mode"] == "tiered"
+    assert result["debug"]["llm_fields"] == []
+    assert metrics.counter_value("llm_calls_avoided") == 1
+
+
+def test_tiered_mode_asks_llm_only_for_missing_fields(tiered) -> None:
+    tiered.response = {"payroll": 410000, "insured_name": "Wrong Co", "field_confidence": {"payroll": 0.8}}
+    text = "Named Insured: Harbor Foods LLC\nGeneral Liability\nWorkers Compensation\nRevenue: 1,200,000"
+
+    result = extract_risk_facts(raw_text=text, filename="acord.pdf")
+
+    system_prompt = tiered.requests[0]["messages"][0]["content"]
+    assert "payroll (number|null)" in system_prompt
+    assert "insured_name" not in system_prompt
+    assert result["fields"]["payroll"] == 410000.0
+    assert result["confidence"]["payroll"] == 0.8
+    assert result["fields"]["insured_name"] == "Harbor Foods LLC"
+    assert result["debug"]["llm_fields"] == ["payroll"]
+    assert metrics.counter_value("llm_calls_avoided") == 0
+
+
+def test_tiered_threshold_is_configurable(tiered, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "llm_confidence_threshold", 0.8)
+    tiered.response = {"revenue": None, "payroll": None}
+
+    result = extract_risk_facts(raw_text=CLEAN_FORM, filename="acord.pdf")
+
+    assert result["debug"]["llm_fields"] == ["lines_of_business", "revenue", "payroll"]
+    assert len(tiered.requests) == 1
+    assert result["fields"]["revenue"] == 1200000.0
@@ -0,0 +1,92 @@
+import asyncio
+from hashlib import sha256
+from io import BytesIO
+
+import pytest
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import RequestBodyLimitMiddleware
+from app.services.uploads import UploadTooLargeError, spool_upload
+
+
+def _spool(content: bytes, max_bytes: int | None = None):
+    upload = UploadFile(file=BytesIO(content), filename="loss_runs.pdf")
+    return asyncio.run(spool_upload(upload, max_bytes=max_bytes))
+
+
+def test_spool_upload_hashes_incrementally_and_spills_to_disk(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "upload_chunk_bytes", 4)
+    monkeypatch.setattr(settings, "upload_spool_memory_bytes", 8)
+    content = b"0123456789abcdefghij"
+
+    with _spool(content) as upload:
+        assert upload.on_disk
+        assert upload.size == len(content)
+        assert upload.sha256 == sha256(content).hexdigest()
+        assert upload.view() == content
+
+
+def test_spool_upload_keeps_small_payloads_in_memory() -> None:
+    with _spool(b"Insured: Demo") as upload:
+        assert not upload.on_disk
+        assert bytes(upload.view()) == b"Insured: Demo"
+
+
+def test_spool_upload_enforces_max_size() -> None:
+    with pytest.raises(UploadTooLargeError):
+        _spool(b"x" * 32, max_bytes=16)
+
+
+def test_pipeline_run_rejects_oversized_upload(client: TestClient, auth_headers: dict[str, str], monkeypatch) -> None:
+    monkeypatch.setattr(settings, "upload_max_bytes", 8)
+    response = client.post(
+        "/api/v1/pipeline/run",
+        files={"file": ("submission.txt", b"Insured: Atlas Fabrication LLC", "text/plain")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 413
+
+
+def test_oversized_body_is_rejected_before_the_handler_reads_it(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch
+) -> None:
+    monkeypatch.setattr(settings, "upload_max_bytes", 1024)
+
+    async def never_called(*_args, **_kwargs):
+        raise AssertionError("the body must be rejected before the upload is spooled")
+
+    monkeypatch.setattr("app.api.routes.pipeline.spool_upload", never_called)
+    response = client.post(
+        "/api/v1/pipeline/run",
+        files={"file": ("submission.txt", b"x" * (128 * 1024), "text/plain")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 413
+
+
+def test_chunked_body_is_cut_off_at_the_limit() -> None:
+    sent: list[dict] = []
+    chunks = [{"type": "http.request", "body": b"x" * 40 * 1024, "more_body": True} for _ in range(4)]
+
+    async def app(scope, receive, send) -> None:
+        while (await receive()).get("more_body"):
+            pass
+        raise AssertionError("the body should have been cut off")
+
+    async def receive():
+        return chunks.pop(0)
+
+    async def send(message) -> None:
+        sent.append(message)
+
+    settings_limit = settings.upload_max_bytes
+    try:
+        settings.upload_max_bytes = 1024
+        scope = {"type": "http", "path": "/api/v1/pipeline/run", "headers": [], "method": "POST"}
+        asyncio.run(RequestBodyLimitMiddleware(app)(scope, receive, send))
+    finally:
+        settings.upload_max_bytes = settings_limit
+    assert sent[0]["status"] == 413
+    assert chunks
@@ -17,6 +17,16 @@ const API_BASE = process.env.NEXT_PUBLIC_API_BASE_URL ?? "http://localhost:8000"
 const DEMO_EMAIL = process.env.NEXT_PUBLIC_DEMO_EMAIL ?? "admin@ghostwriter.dev";
 const DEMO_PASSWORD = process.env.NEXT_PUBLIC_DEMO_PASSWORD ?? "ChangeMe123!";
 
+type JobEvent = { event: string; job_id: string; seq?: number };
+
+const STATE_FOR_EVENT: Record<string, UIState> = {
+  running: "Parsing",
+  text_extracted: "Structuring",
+  document_extracted: "Structuring",
+  fields_extracted: "Scoring",
+  profile_built: "Scoring",
+};
+
 export default function DashboardPage() {
   const [file, setFile] = useState<File | null>(null);
   const [running, setRunning] = useState(false);
@@ -107,17 +117,70 @@ export default function DashboardPage() {
   async function pollJob(jobId: string): Promise<PipelineResponse> {
     for (let attempt = 0; attempt < 80; attempt += 1) {
       const headers = await authHeaders();
-      const res = await fetch(`${API_BASE}/api/v1/pipeline/jobs/${jobId}`, { headers });
+      const res = await fetch(`${API_BASE}/api/v1/pipeline/jobs/${jobId}?include_result=false`, { headers });
       if (!res.ok) throw new Error("Job status request failed");
 
-      const payload = (await res.json()) as { status: string; result?: PipelineResponse; error?: string };
-      if (payload.status === "succeeded" && payload.result) return payload.result;
+      const payload = (await res.json()) as { status: string; error?: string };
+      if (payload.status === "succeeded") return fetchJobResult(jobId);
       if (payload.status === "failed") throw new Error(payload.error ?? "Pipeline failed");
       await new Promise((resolve) => setTimeout(resolve, 1200));
     }
     throw new Error("Pipeline timed out");
   }
 
+  async function fetchJobResult(jobId: string): Promise<PipelineResponse> {
+    const headers = await authHeaders();
+    const res = await fetch(`${API_BASE}/api/v1/pipeline/jobs/${jobId}/result`, { headers });
+    if (!res.ok) throw new Error("Job result request failed");
+    return (await res.json()) as PipelineResponse;
+  }
+
+  // Follows the job's server-sent progress events; the status endpoint is read once at the end
+  // for the result, and is polled only when the stream is unavailable.
+  async function streamJob(jobId: string): Promise<PipelineResponse> {
+    let res: Response;
+    try {
+      const headers = await authHeaders();
+      res = await fetch(`${API_BASE}/api/v1/pipeline/jobs/${jobId}/events`, { headers });
+    } catch {
+      return pollJob(jobId);
+    }
+    if (!res.ok || !res.body) return pollJob(jobId);
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    try {
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary = buffer.indexOf("\n\n");
+        while (boundary >= 0) {
+          const block = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+          boundary = buffer.indexOf("\n\n");
+          const data = block.split("\n").find((line) => line.startsWith("data: "));
+          if (!data) continue;
+
+          const event = JSON.parse(data.slice("data: ".length)) as JobEvent;
+          const nextState = STATE_FOR_EVENT[event.event];
+          if (nextState) {
+            stopStateProgression();
+            setUiState(nextState);
+          }
+          if (["succeeded", "failed", "unavailable", "timeout"].includes(event.event)) {
+            await reader.cancel();
+            return pollJob(jobId);
+          }
+        }
+      }
+    } catch {
+      // Stream dropped; fall back to polling below.
+    }
+    return pollJob(jobId);
+  }
+
   async function runPipeline() {
     if (!file) {
       setError("Drop a packet before starting AI structuring.");
@@ -134,7 +197,7 @@ export default function DashboardPage() {
 
     try {
       const headers = await authHeaders();
-      const enqueue = await fetch(`${API_BASE}/api/v1/pipeline/run-async`, {
+      const enqueue = await fetch(`${API_BASE}/api/v1/pipeline/run-async?priority=true`, {
         method: "POST",
         headers,
         body: form,
@@ -146,7 +209,7 @@ export default function DashboardPage() {
 
       const queued = (await enqueue.json()) as { job_id: string; submission_id: string };
       setSelectedSubmissionId(queued.submission_id);
-      const final = await pollJob(queued.job_id);
+      const final = await streamJob(queued.job_id);
       setResult(final);
       await loadAudit(final.profile.submission_id);
       await loadSubmissions();